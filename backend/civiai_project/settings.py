@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'permitting.instrumentation.InstrumentationMiddleware',  # first, so its total covers the rest
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -112,3 +113,11 @@ CORS_ALLOW_ALL_ORIGINS = True
 # AI Integration
 ANTHROPIC_API_KEY = config('ANTHROPIC_API_KEY', default='')
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+
+# Where the Claude and MCP clients connect, e.g. the local stubs for load
+# testing: manage.py run_claude_stub, and the MCP server's loadtest profile
+ANTHROPIC_BASE_URL = config('ANTHROPIC_BASE_URL', default='') or None
+ANTHROPIC_TIMEOUT = config('ANTHROPIC_TIMEOUT', default=600, cast=float)
+ANTHROPIC_MAX_RETRIES = config('ANTHROPIC_MAX_RETRIES', default=2, cast=int)
+MCP_SERVER_URL = config('MCP_SERVER_URL', default='https://5000-i949ezw629r8b2x60289e-d8f6014d.manusvm.computer')
+MCP_TIMEOUT = config('MCP_TIMEOUT', default=30, cast=float)
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'permitting.instrumentation.InstrumentationMiddleware',  # first, so its total covers the rest
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files
@@ -156,6 +157,53 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 ANTHROPIC_API_KEY = config('ANTHROPIC_API_KEY', default='')
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 
+# Where the Claude and MCP clients connect, e.g. the local stubs for load
+# testing: manage.py run_claude_stub, and the MCP server's loadtest profile
+ANTHROPIC_BASE_URL = config('ANTHROPIC_BASE_URL', default='') or None
+ANTHROPIC_TIMEOUT = config('ANTHROPIC_TIMEOUT', default=600, cast=float)
+ANTHROPIC_MAX_RETRIES = config('ANTHROPIC_MAX_RETRIES', default=2, cast=int)
+MCP_SERVER_URL = config('MCP_SERVER_URL', default='https://5000-i949ezw629r8b2x60289e-d8f6014d.manusvm.computer')
+MCP_TIMEOUT = config('MCP_TIMEOUT', default=30, cast=float)
+
+# Models of the fast and deep tiers Claude calls are routed to by task
+# complexity (permitting/routing.py); empty keeps the default
+CLAUDE_MODELS = {
+    'fast': config('CLAUDE_FAST_MODEL', default=''),
+    'deep': config('CLAUDE_DEEP_MODEL', default=''),
+}
+
+# Input token budget of each Claude call (permitting/claude_service.py);
+# longer documents and context are trimmed to fit (permitting/prompting.py)
+CLAUDE_PROMPT_BUDGETS = {
+    'question': config('CLAUDE_QUESTION_TOKEN_BUDGET', default=8000, cast=int),
+    'document': config('CLAUDE_DOCUMENT_TOKEN_BUDGET', default=16000, cast=int),
+    'staff_report': config('CLAUDE_STAFF_REPORT_TOKEN_BUDGET', default=6000, cast=int),
+    'statewide_goals': config('CLAUDE_STATEWIDE_GOALS_TOKEN_BUDGET', default=6000, cast=int),
+}
+
+# Planning knowledge base (answers and municipal code snippets) indexed for
+# the assistant; defaults to the bundled permitting/data/planning_knowledge.json
+PLANNING_KNOWLEDGE_FILE = config('PLANNING_KNOWLEDGE_FILE', default='') or None
+
+# Stored Claude answers are reused for questions at least this similar
+# (cosine of hashed n-gram vectors), for up to ANSWER_CACHE_MAX_AGE_DAYS
+ANSWER_CACHE_SIMILARITY = config('ANSWER_CACHE_SIMILARITY', default=0.82, cast=float)
+ANSWER_CACHE_MAX_AGE_DAYS = config('ANSWER_CACHE_MAX_AGE_DAYS', default=90, cast=int)
+
+# Identical Claude and MCP calls made at the same time share one call
+# (permitting/coalescing.py), whose result is reused for this many seconds;
+# a worker's lock on a call is taken over after COALESCE_LOCK_SECONDS
+COALESCE_RESULT_SECONDS = config('COALESCE_RESULT_SECONDS', default=30, cast=int)
+COALESCE_LOCK_SECONDS = config('COALESCE_LOCK_SECONDS', default=120, cast=int)
+
+# Build the AI services (permitting/services.py) when a worker boots
+SERVICES_WARM_UP = config('SERVICES_WARM_UP', default=True, cast=bool)
+
+# Request instrumentation (permitting/instrumentation.py): per-stage timings
+# in a Server-Timing header, and the window of the staff metrics endpoint
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+INSTRUMENTATION_WINDOW_SECONDS = config('INSTRUMENTATION_WINDOW_SECONDS', default=300, cast=int)
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -190,11 +238,34 @@ LOGGING = {
     },
 }
 
-# Cache configuration (optional, for better performance)
+# Cache configuration
+# 'default' is a per-process L1 in front of a SQLite cache shared by all
+# gunicorn workers on the host; it survives worker restarts and deploys.
 CACHES = {
     'default': {
+        'BACKEND': 'permitting.cache.TieredCache',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'L1': 'local',
+            'L2': 'shared',
+            'L1_TIMEOUT': config('CACHE_L1_TIMEOUT', default=5, cast=int),
+        },
+    },
+    'local': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+        'LOCATION': 'civiai-l1',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    'shared': {
+        'BACKEND': 'permitting.cache.SQLiteCache',
+        'LOCATION': config('CACHE_SQLITE_PATH', default=str(BASE_DIR / 'cache' / 'shared_cache.sqlite3')),
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+            'CULL_FREQUENCY': 4,
+        },
+    },
 }
 
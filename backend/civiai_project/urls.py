@@ -5,10 +5,13 @@ from django.contrib import admin
 from django.urls import path
 from django.http import HttpResponse
 
+from .views import metrics_view
+
 def test_view(request):
     return HttpResponse("CivAI is working!")
 
 urlpatterns = [
     path('test/', test_view, name='test'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -1,9 +1,11 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import os
 from datetime import datetime
 
+from permitting.metrics import render as render_metrics
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def health_check(request):
@@ -34,6 +36,16 @@ def health_check(request):
         
         return JsonResponse(error_data, status=500)
 
+@csrf_exempt
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Prometheus metrics in the text exposition format, merged across all
+    worker processes when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def root_view(request):
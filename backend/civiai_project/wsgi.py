@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'civiai_project.settings')
 
 application = get_wsgi_application()
+
+# Build the AI services in each worker before it takes traffic, so the
+# first requests do not pay for it
+from django.conf import settings
+
+if getattr(settings, 'SERVICES_WARM_UP', False):
+    from permitting.services import registry
+    registry.warm_up()
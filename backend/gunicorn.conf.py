@@ -0,0 +1,39 @@
+"""
+Gunicorn configuration for CiviAI
+
+    gunicorn -c gunicorn.conf.py civiai_project.wsgi:application
+"""
+
+import glob
+import os
+
+# Workers write their Prometheus metrics (permitting/metrics.py) to files in
+# this directory and /metrics merges them; it must be set before a worker
+# imports prometheus_client
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'prometheus'),
+)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# A streamed Claude answer (/api/ask-question/stream/) holds its thread
+# until the last token, up to a minute for a staff report; threads keep
+# streams from blocking a whole worker, and the timeout outlasts them
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+
+def on_starting(server):
+    # Metric files of a previous run would be merged into this run's totals
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (requests in progress, active jobs) of a dead worker
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
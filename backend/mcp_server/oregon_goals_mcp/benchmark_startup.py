@@ -0,0 +1,131 @@
+"""
+Startup benchmark for the Oregon Goals MCP Server
+
+Measures cold start to first served request for a worker:
+
+  development  each worker imports and builds the app itself, then
+               serves its first /mcp/check-compliance request
+  production   the app is built once (gunicorn preload_app); the timed
+               worker starts at fork and serves its first request
+
+Runs against a temporary copy of the database.
+
+    python benchmark_startup.py [--trials 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE_PATH = os.path.join(BASE_DIR, 'src', 'database', 'app.db')
+
+FIRST_REQUEST = {
+    'project_id': 'startup_benchmark',
+    'project_description': 'New residential home with parking and street access near the river',
+    'property_context': {'zoning': 'R1', 'in_floodplain': False, 'riparian_overlay': True},
+    'record_history': False,
+}
+
+
+def _serve_first_request(app):
+    response = app.test_client().post('/mcp/check-compliance', json=FIRST_REQUEST)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def run_child(profile):
+    """
+    Runs inside a fresh interpreter; prints timings as JSON
+    """
+    start = time.perf_counter()
+    sys.path.insert(0, BASE_DIR)
+    from src.main import create_app
+    imported = time.perf_counter()
+
+    if profile == 'development':
+        app = create_app('development')
+        built = time.perf_counter()
+        _serve_first_request(app)
+        served = time.perf_counter()
+        result = {
+            'import_s': imported - start,
+            'build_s': built - imported,
+            'first_request_s': served - built,
+            'worker_cold_start_s': served - start,
+        }
+    else:
+        app = create_app('production')
+        built = time.perf_counter()
+
+        read_fd, write_fd = os.pipe()
+        forked_at = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _serve_first_request(app)
+            os.write(write_fd, str(time.perf_counter() - forked_at).encode('ascii'))
+            os._exit(0)
+
+        os.close(write_fd)
+        worker_s = float(os.read(read_fd, 64).decode('ascii'))
+        os.waitpid(pid, 0)
+        result = {
+            'import_s': imported - start,
+            'build_s': built - imported,
+            'first_request_s': worker_s,
+            'worker_cold_start_s': worker_s,
+        }
+
+    print(json.dumps(result))
+
+
+def run_trials(profile, trials, database_url):
+    env = dict(os.environ, MCP_DATABASE_URL=database_url)
+    samples = []
+    for _ in range(trials):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', profile],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        key: round(statistics.median(sample[key] for sample in samples) * 1000, 2)
+        for key in samples[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--child', choices=['development', 'production'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_copy = os.path.join(tmp_dir, 'app.db')
+        shutil.copyfile(DATABASE_PATH, database_copy)
+        database_url = f"sqlite:///{database_copy}"
+
+        print(f"MCP server startup benchmark ({args.trials} trials, median ms)")
+        results = {}
+        for profile in ('development', 'production'):
+            results[profile] = run_trials(profile, args.trials, database_url)
+            timings = ', '.join(f"{key}={value}" for key, value in results[profile].items())
+            print(f"  {profile:<12} {timings}")
+
+        speedup = results['development']['worker_cold_start_s'] / max(results['production']['worker_cold_start_s'], 0.001)
+        print(f"\nWorker cold start to first served request: {speedup:.1f}x faster with the production profile")
+
+
+if __name__ == '__main__':
+    main()
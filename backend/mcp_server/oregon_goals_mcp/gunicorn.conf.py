@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration for the Oregon Goals MCP Server
+
+    gunicorn -c gunicorn.conf.py src.wsgi:application
+"""
+
+import glob
+import multiprocessing
+import os
+
+# Workers write their Prometheus metrics (src/services/metrics.py) to files in
+# this directory and /metrics merges them; it must be set before the app
+# (and prometheus_client) is loaded
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'prometheus'),
+)
+
+
+def _prepare_metrics_directory():
+    # Done here, not in on_starting: with preload_app the master imports the
+    # app, which writes its own metric files, before on_starting runs. Metric
+    # files of a previous run would be merged into this run's totals; they
+    # are cleared once, as gunicorn reads this file again on HUP.
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(directory, exist_ok=True)
+    if not os.environ.get('MCP_METRICS_DIRECTORY_CLEARED'):
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+        os.environ['MCP_METRICS_DIRECTORY_CLEARED'] = '1'
+
+
+_prepare_metrics_directory()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '2'))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = 5
+
+# Build the app (tables, goal catalog, static index) once in the master;
+# workers inherit it copy-on-write instead of each loading it cold
+preload_app = True
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (requests in progress, pool usage) of a dead worker
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared across processes
+    from src.models.user import db
+    from src.wsgi import application
+
+    with application.app_context():
+        db.engine.dispose(close=False)
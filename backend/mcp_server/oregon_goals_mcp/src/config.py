@@ -0,0 +1,60 @@
+"""
+Configuration profiles for the Oregon Goals MCP Server
+"""
+
+import os
+
+DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+
+class Config:
+    """
+    Development profile - used by `python src/main.py`
+    """
+    SECRET_KEY = os.getenv('MCP_SECRET_KEY', 'oregon_goals_mcp_secret_key_2024')
+    SQLALCHEMY_DATABASE_URI = os.getenv('MCP_DATABASE_URL', f"sqlite:///{DATABASE_PATH}")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Create missing tables/indexes when the app is built
+    CREATE_TABLES = True
+    # Load the goal catalog into memory when the app is built
+    PRELOAD_CATALOG = False
+    # Index the static folder once instead of stat()ing it per request
+    STATIC_FILE_INDEX = False
+
+
+class ProductionConfig(Config):
+    """
+    Production profile - used by src/wsgi.py under gunicorn with preload_app,
+    so table creation and catalog loading happen once in the master process
+    and forked workers share the catalog copy-on-write
+    """
+    CREATE_TABLES = os.getenv('MCP_CREATE_TABLES', '1') == '1'
+    PRELOAD_CATALOG = True
+    STATIC_FILE_INDEX = True
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+
+
+class LoadTestConfig(ProductionConfig):
+    """
+    Load test profile - the production profile with injected latency and
+    errors on the /mcp/ API (services/faults.py), so CiviAI's concurrency
+    limits and timeouts can be tried offline:
+
+        MCP_PROFILE=loadtest MCP_FAULT_LATENCY_MS=80 MCP_FAULT_JITTER_MS=40 \
+            gunicorn -c gunicorn.conf.py src.wsgi:application
+
+    Point the database at a copy (MCP_DATABASE_URL) to keep the compliance
+    checks it records out of the real history.
+    """
+    FAULT_LATENCY_MS = float(os.getenv('MCP_FAULT_LATENCY_MS', '50'))
+    FAULT_JITTER_MS = float(os.getenv('MCP_FAULT_JITTER_MS', '0'))
+    FAULT_ERROR_RATE = float(os.getenv('MCP_FAULT_ERROR_RATE', '0'))
+    FAULT_SEED = os.getenv('MCP_FAULT_SEED')
+
+
+CONFIGS = {
+    'development': Config,
+    'production': ProductionConfig,
+    'loadtest': LoadTestConfig,
+}
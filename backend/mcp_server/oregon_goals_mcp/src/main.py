@@ -3,51 +3,113 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, Response, send_from_directory
 from flask_cors import CORS
+from src.config import CONFIGS
 from src.models.user import db
+from src.models.oregon_goals import ComplianceCheck
 from src.routes.user import user_bp
 from src.routes.mcp_api import mcp_bp
+from src.services.catalog import load_catalog
+from src.services import faults, metrics
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'oregon_goals_mcp_secret_key_2024'
+DEFAULT_MESSAGE = "Oregon Statewide Planning Goals MCP Server - API Available at /mcp/"
 
-# Enable CORS for all routes
-CORS(app)
 
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(mcp_bp, url_prefix='/mcp')
+def create_app(profile=None, **overrides):
+    """
+    Application factory. ``profile`` is 'development', 'production' or
+    'loadtest' (default: MCP_PROFILE env var, else development);
+    ``overrides`` are applied on top of the profile's config.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config.from_object(CONFIGS[profile or os.getenv('MCP_PROFILE', 'development')])
+    app.config.update(overrides)
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    metrics.init_app(app)
+    # After the metrics hooks, so injected latency and errors are measured
+    faults.init_app(app)
 
-# Initialize database
-db.init_app(app)
+    # Enable CORS for all routes
+    CORS(app)
 
-with app.app_context():
-    db.create_all()
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(mcp_bp, url_prefix='/mcp')
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    # Initialize database
+    db.init_app(app)
+
+    with app.app_context():
+        metrics.instrument_engine(db.engine)
+
+        if app.config['CREATE_TABLES']:
+            db.create_all()
+            # create_all() does not add new indexes to tables that already exist
+            for index in ComplianceCheck.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+
+        if app.config['PRELOAD_CATALOG']:
+            load_catalog()
+
+    static_files = _index_static_folder(app.static_folder) if app.config['STATIC_FILE_INDEX'] else None
+
+    def static_file_exists(path):
+        if static_files is not None:
+            return path in static_files
+        return os.path.exists(os.path.join(app.static_folder, path))
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+        if path != "" and static_file_exists(path):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "Oregon Statewide Planning Goals MCP Server - API Available at /mcp/", 200
+            if static_file_exists('index.html'):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return DEFAULT_MESSAGE, 200
+
+    @app.route('/health')
+    def health():
+        return {"status": "healthy", "service": "Oregon Goals MCP Server"}
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        body, content_type = metrics.render()
+        return Response(body, content_type=content_type)
+
+    return app
+
+
+def _index_static_folder(static_folder_path):
+    """
+    Relative paths of every file under the static folder
+    """
+    if static_folder_path is None or not os.path.isdir(static_folder_path):
+        return frozenset()
+
+    files = set()
+    for root, _dirs, filenames in os.walk(static_folder_path):
+        for filename in filenames:
+            relative_path = os.path.relpath(os.path.join(root, filename), static_folder_path)
+            files.add(relative_path.replace(os.sep, '/'))
+    return frozenset(files)
+
+
+def __getattr__(name):
+    # Keep `from src.main import app` working without building an app
+    # (and touching the database) at import time
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.route('/health')
-def health():
-    return {"status": "healthy", "service": "Oregon Goals MCP Server"}
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
@@ -42,6 +42,10 @@ class ComplianceCheck(db.Model):
     Track compliance checks against statewide goals
     """
     __tablename__ = 'compliance_checks'
+    __table_args__ = (
+        # Backs keyset pagination of a project's history (newest first)
+        db.Index('ix_compliance_checks_project_created', 'project_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.String(100), nullable=False)  # External project reference
@@ -73,6 +77,21 @@ class ComplianceCheck(db.Model):
             'checked_by': self.checked_by,
             'created_at': self.created_at.isoformat()
         }
+    
+    def to_history_row(self):
+        """
+        Lightweight projection for history listings - references the goal by
+        number instead of embedding the full goal on every row
+        """
+        return {
+            'id': self.id,
+            'goal_number': self.goal.goal_number if self.goal else None,
+            'compliance_status': self.compliance_status,
+            'findings': self.findings,
+            'recommendations': self.recommendations,
+            'checked_by': self.checked_by,
+            'created_at': self.created_at.isoformat()
+        }
 
 class GoalRequirement(db.Model):
     """
@@ -104,3 +123,26 @@ class GoalRequirement(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+class CatalogState(db.Model):
+    """
+    One row per goal catalog load that changed something; the latest row's
+    version is the catalog version downstream caches key on
+    """
+    __tablename__ = 'catalog_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, unique=True)
+    data_version = db.Column(db.String(50))  # Version string from the goals data file
+    goal_hashes = db.Column(db.Text, nullable=False)  # JSON {goal_number: content hash}
+    loaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CatalogState v{self.version} ({self.data_version})>'
+    
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'data_version': self.data_version,
+            'goal_hashes': json.loads(self.goal_hashes),
+            'loaded_at': self.loaded_at.isoformat()
+        }
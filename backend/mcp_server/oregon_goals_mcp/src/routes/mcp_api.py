@@ -3,8 +3,15 @@ MCP API Routes for Oregon Statewide Planning Goals
 Model Context Protocol server for planning compliance
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, load_only
 from src.models.oregon_goals import db, StatewideGoal, ComplianceCheck, GoalRequirement
+from src.services.applicability import get_applicability_matrix
+from src.services.catalog import catalog_version, get_catalog
+from src.services.metrics import RESULT_CACHE_REQUESTS
+from src.services.result_cache import result_cache
+import base64
 import json
 from datetime import datetime
 import logging
@@ -13,13 +20,17 @@ logger = logging.getLogger(__name__)
 
 mcp_bp = Blueprint('mcp', __name__)
 
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+COMPLIANCE_STATUSES = ('COMPLIANT', 'NON_COMPLIANT', 'NEEDS_REVIEW')
+
 @mcp_bp.route('/goals', methods=['GET'])
 def get_all_goals():
     """
     Get all Oregon Statewide Planning Goals
     """
     try:
-        goals = StatewideGoal.query.order_by(StatewideGoal.goal_number).all()
+        goals = sorted(get_catalog().goals, key=lambda goal: goal.goal_number)
         return jsonify({
             'success': True,
             'goals': [goal.to_dict() for goal in goals],
@@ -56,7 +67,11 @@ def get_goal_by_number(goal_number):
 @mcp_bp.route('/check-compliance', methods=['POST'])
 def check_project_compliance():
     """
-    Check project compliance against applicable statewide goals
+    Check project compliance against applicable statewide goals.
+
+    The evaluation is memoized per (description, property context, catalog
+    version); history rows are still recorded on every call unless
+    ``record_history`` is false. The ETag identifies the evaluation.
     """
     try:
         data = request.get_json()
@@ -64,61 +79,46 @@ def check_project_compliance():
         project_id = data.get('project_id', f"project_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}")
         project_description = data.get('project_description', '')
         property_context = data.get('property_context', {})
+        record_history = data.get('record_history', True)
         
         if not project_description:
             return jsonify({'success': False, 'error': 'Project description is required'}), 400
         
-        # Determine applicable goals based on project type and location
-        applicable_goals = _determine_applicable_goals(project_description, property_context)
-        
-        compliance_results = []
-        
-        for goal in applicable_goals:
-            # Check compliance for each applicable goal
-            compliance_result = _check_goal_compliance(goal, project_description, property_context)
-            
-            # Save compliance check to database
-            compliance_check = ComplianceCheck(
-                project_id=project_id,
-                goal_id=goal.id,
-                project_description=project_description,
-                property_context=json.dumps(property_context),
-                compliance_status=compliance_result['status'],
-                findings=compliance_result['findings'],
-                recommendations=compliance_result['recommendations'],
-                checked_by='MCP_AI_System'
-            )
-            
-            db.session.add(compliance_check)
-            compliance_results.append({
-                'goal': goal.to_dict(),
-                'compliance': compliance_result
-            })
-        
-        db.session.commit()
+        evaluation, etag, cache_status = _memoized(
+            'check-compliance', project_description, property_context,
+            lambda: _evaluate_project_compliance(project_description, property_context)
+        )
         
-        # Calculate overall compliance summary
-        total_goals = len(compliance_results)
-        compliant_goals = sum(1 for result in compliance_results if result['compliance']['status'] == 'COMPLIANT')
-        compliance_rate = (compliant_goals / total_goals * 100) if total_goals > 0 else 100
+        if record_history:
+            # Save compliance checks to database
+            db.session.add_all([
+                ComplianceCheck(
+                    project_id=project_id,
+                    goal_id=result['goal']['id'],
+                    project_description=project_description,
+                    property_context=json.dumps(property_context),
+                    compliance_status=result['compliance']['status'],
+                    findings=result['compliance']['findings'],
+                    recommendations=result['compliance']['recommendations'],
+                    checked_by='MCP_AI_System'
+                )
+                for result in evaluation['compliance_results']
+            ])
+            db.session.commit()
         
-        overall_status = "COMPLIANT" if compliant_goals == total_goals else "NEEDS_REVIEW"
-        if compliant_goals < total_goals * 0.5:
-            overall_status = "NON_COMPLIANT"
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag, cache_status)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'project_id': project_id,
-            'compliance_results': compliance_results,
-            'summary': {
-                'total_goals_checked': total_goals,
-                'compliant_goals': compliant_goals,
-                'non_compliant_goals': total_goals - compliant_goals,
-                'compliance_rate': round(compliance_rate, 1),
-                'overall_status': overall_status
-            },
+            'compliance_results': evaluation['compliance_results'],
+            'summary': evaluation['summary'],
             'checked_at': datetime.utcnow().isoformat()
         })
+        response.set_etag(etag)
+        response.headers['X-Cache'] = cache_status
+        return response
         
     except Exception as e:
         logger.error(f"Error checking compliance: {str(e)}")
@@ -128,45 +128,135 @@ def check_project_compliance():
 @mcp_bp.route('/compliance-history/<project_id>', methods=['GET'])
 def get_compliance_history(project_id):
     """
-    Get compliance check history for a project
+    Get compliance check history for a project, newest first.
+
+    Keyset-paginated on (created_at, id): pass the returned ``next_cursor``
+    back as ``cursor`` to fetch the next page. Optional ``status`` filter
+    and ``limit`` (default 50, max 200).
     """
     try:
-        checks = ComplianceCheck.query.filter_by(project_id=project_id).order_by(ComplianceCheck.created_at.desc()).all()
+        try:
+            limit = min(max(int(request.args.get('limit', HISTORY_PAGE_SIZE)), 1), HISTORY_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+        
+        status = request.args.get('status', '').upper()
+        if status and status not in COMPLIANCE_STATUSES:
+            return jsonify({'success': False, 'error': f'Unknown status: {status}'}), 400
+        
+        query = ComplianceCheck.query.options(
+            load_only(
+                ComplianceCheck.id, ComplianceCheck.goal_id, ComplianceCheck.compliance_status,
+                ComplianceCheck.findings, ComplianceCheck.recommendations,
+                ComplianceCheck.checked_by, ComplianceCheck.created_at
+            ),
+            joinedload(ComplianceCheck.goal).load_only(StatewideGoal.goal_number, StatewideGoal.title)
+        ).filter(ComplianceCheck.project_id == project_id)
+        
+        if status:
+            query = query.filter(ComplianceCheck.compliance_status == status)
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = _decode_history_cursor(cursor)
+            except ValueError:
+                return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+            query = query.filter(or_(
+                ComplianceCheck.created_at < cursor_created_at,
+                and_(ComplianceCheck.created_at == cursor_created_at, ComplianceCheck.id < cursor_id)
+            ))
+        
+        # Fetch one extra row to know whether another page exists
+        checks = query.order_by(ComplianceCheck.created_at.desc(), ComplianceCheck.id.desc()).limit(limit + 1).all()
+        has_more = len(checks) > limit
+        checks = checks[:limit]
+        
+        goals = {}
+        for check in checks:
+            if check.goal:
+                goals[check.goal.goal_number] = check.goal.title
         
         return jsonify({
             'success': True,
             'project_id': project_id,
-            'compliance_history': [check.to_dict() for check in checks],
-            'count': len(checks)
+            'compliance_history': [check.to_history_row() for check in checks],
+            'goals': goals,
+            'count': len(checks),
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': _encode_history_cursor(checks[-1]) if has_more else None
         })
     except Exception as e:
         logger.error(f"Error getting compliance history: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@mcp_bp.route('/applicable-goals', methods=['POST'])
+@mcp_bp.route('/applicable-goals', methods=['GET', 'POST'])
 def get_applicable_goals():
     """
-    Get applicable statewide goals for a project without running full compliance check
+    Get applicable statewide goals for a project without running full compliance check.
+
+    Accepts a JSON body (POST) or ``project_description`` and JSON-encoded
+    ``property_context`` query parameters (GET). Responses carry an ETag
+    and honor If-None-Match.
     """
     try:
-        data = request.get_json()
-        project_description = data.get('project_description', '')
-        property_context = data.get('property_context', {})
+        if request.method == 'GET':
+            project_description = request.args.get('project_description', '')
+            try:
+                property_context = json.loads(request.args.get('property_context') or '{}')
+            except ValueError:
+                return jsonify({'success': False, 'error': 'property_context must be JSON'}), 400
+        else:
+            data = request.get_json()
+            project_description = data.get('project_description', '')
+            property_context = data.get('property_context', {})
         
         if not project_description:
             return jsonify({'success': False, 'error': 'Project description is required'}), 400
         
-        applicable_goals = _determine_applicable_goals(project_description, property_context)
+        applicable_goals, etag, cache_status = _memoized(
+            'applicable-goals', project_description, property_context,
+            lambda: [goal.to_dict() for goal in _determine_applicable_goals(project_description, property_context)]
+        )
         
-        return jsonify({
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag, cache_status)
+        
+        response = jsonify({
             'success': True,
-            'applicable_goals': [goal.to_dict() for goal in applicable_goals],
+            'applicable_goals': applicable_goals,
             'count': len(applicable_goals)
         })
+        response.set_etag(etag)
+        response.headers['X-Cache'] = cache_status
+        return response
     except Exception as e:
         logger.error(f"Error getting applicable goals: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@mcp_bp.route('/applicability-matrix', methods=['GET'])
+def get_applicability_matrix_endpoint():
+    """
+    Precomputed goal applicability by (zoning, in_floodplain, riparian_overlay, in_ugb).
+    Clients cache this and only evaluate keyword-dependent goals locally.
+    """
+    try:
+        matrix = get_applicability_matrix(get_catalog().goal_numbers)
+        
+        response = jsonify({
+            'success': True,
+            'version': matrix.version,
+            'matrix': matrix.to_dict()
+        })
+        response.set_etag(matrix.version)
+        response.cache_control.public = True
+        response.cache_control.max_age = 3600
+        return response.make_conditional(request)
+    except Exception as e:
+        logger.error(f"Error building applicability matrix: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @mcp_bp.route('/health', methods=['GET'])
 def health_check():
     """
@@ -180,6 +270,7 @@ def health_check():
             'success': True,
             'status': 'healthy',
             'goals_loaded': goal_count,
+            'result_cache': result_cache.stats(),
             'timestamp': datetime.utcnow().isoformat()
         })
     except Exception as e:
@@ -192,116 +283,99 @@ def health_check():
 
 # Helper functions
 
+def _memoized(kind, project_description, property_context, evaluate):
+    """
+    Return (result, etag, 'HIT'|'MISS') from the result cache, evaluating on a miss
+    """
+    version = catalog_version()
+    result_cache.sync_catalog_version(version)
+    
+    key = result_cache.make_key(kind, project_description, property_context, version)
+    result = result_cache.get(key)
+    if result is not None:
+        RESULT_CACHE_REQUESTS.labels(kind, 'hit').inc()
+        return result, key, 'HIT'
+    
+    RESULT_CACHE_REQUESTS.labels(kind, 'miss').inc()
+    result = evaluate()
+    result_cache.set(key, result)
+    return result, key, 'MISS'
+
+def _not_modified(etag, cache_status):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def _evaluate_project_compliance(project_description, property_context):
+    """
+    Evaluate every applicable goal and summarize; the result is cacheable
+    """
+    compliance_results = []
+    
+    # Determine applicable goals based on project type and location
+    for goal in _determine_applicable_goals(project_description, property_context):
+        compliance_results.append({
+            'goal': goal.to_dict(),
+            'compliance': _check_goal_compliance(goal, project_description, property_context)
+        })
+    
+    # Calculate overall compliance summary
+    total_goals = len(compliance_results)
+    compliant_goals = sum(1 for result in compliance_results if result['compliance']['status'] == 'COMPLIANT')
+    compliance_rate = (compliant_goals / total_goals * 100) if total_goals > 0 else 100
+    
+    overall_status = "COMPLIANT" if compliant_goals == total_goals else "NEEDS_REVIEW"
+    if compliant_goals < total_goals * 0.5:
+        overall_status = "NON_COMPLIANT"
+    
+    return {
+        'compliance_results': compliance_results,
+        'summary': {
+            'total_goals_checked': total_goals,
+            'compliant_goals': compliant_goals,
+            'non_compliant_goals': total_goals - compliant_goals,
+            'compliance_rate': round(compliance_rate, 1),
+            'overall_status': overall_status
+        }
+    }
+
+def _encode_history_cursor(check):
+    """
+    Opaque keyset cursor for the last row of a history page
+    """
+    raw = json.dumps([check.created_at.isoformat(), check.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def _decode_history_cursor(cursor):
+    """
+    Decode a history cursor into (created_at, id); raises ValueError if malformed
+    """
+    try:
+        created_at, check_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(check_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 def _determine_applicable_goals(project_description, property_context):
     """
     Determine which statewide goals apply to a project
     """
-    # Get all goals
-    all_goals = StatewideGoal.query.all()
-    applicable_goals = []
-    
-    # Convert to lowercase for keyword matching
-    description_lower = project_description.lower()
+    catalog = get_catalog()
     
-    # Goal applicability logic
-    for goal in all_goals:
-        is_applicable = False
-        
-        if goal.goal_number == 1:  # Citizen Involvement
-            # Always applicable for public projects
-            is_applicable = True
-            
-        elif goal.goal_number == 2:  # Land Use Planning
-            # Always applicable
-            is_applicable = True
-            
-        elif goal.goal_number == 3:  # Agricultural Lands
-            # Applicable if in agricultural zone or near farm land
-            zoning = property_context.get('zoning', '').upper()
-            is_applicable = 'AG' in zoning or 'FARM' in zoning or 'agricultural' in description_lower
-            
-        elif goal.goal_number == 4:  # Forest Lands
-            # Applicable if in forest zone or involves trees
-            zoning = property_context.get('zoning', '').upper()
-            is_applicable = 'F' in zoning or 'forest' in description_lower or 'tree' in description_lower
-            
-        elif goal.goal_number == 5:  # Natural Resources, Scenic and Historic Areas
-            # Applicable if near natural resources or historic areas
-            is_applicable = any(keyword in description_lower for keyword in [
-                'historic', 'scenic', 'natural', 'resource', 'wetland', 'habitat'
-            ])
-            
-        elif goal.goal_number == 6:  # Air, Water and Land Resources Quality
-            # Applicable for most development projects
-            is_applicable = any(keyword in description_lower for keyword in [
-                'construction', 'development', 'building', 'industrial', 'commercial'
-            ])
-            
-        elif goal.goal_number == 7:  # Areas Subject to Natural Disasters and Hazards
-            # Applicable if in floodplain or hazard areas
-            in_floodplain = property_context.get('in_floodplain', False)
-            is_applicable = in_floodplain or any(keyword in description_lower for keyword in [
-                'flood', 'hazard', 'slope', 'earthquake', 'landslide'
-            ])
-            
-        elif goal.goal_number == 8:  # Recreational Needs
-            # Applicable for recreational projects
-            is_applicable = any(keyword in description_lower for keyword in [
-                'recreation', 'park', 'trail', 'sports', 'playground'
-            ])
-            
-        elif goal.goal_number == 9:  # Economic Development
-            # Applicable for commercial/industrial projects
-            is_applicable = any(keyword in description_lower for keyword in [
-                'commercial', 'business', 'industrial', 'economic', 'employment'
-            ])
-            
-        elif goal.goal_number == 10:  # Housing
-            # Applicable for residential projects
-            is_applicable = any(keyword in description_lower for keyword in [
-                'residential', 'housing', 'home', 'apartment', 'adu', 'dwelling'
-            ])
-            
-        elif goal.goal_number == 11:  # Public Facilities and Services
-            # Applicable for projects requiring public services
-            is_applicable = any(keyword in description_lower for keyword in [
-                'public', 'utility', 'sewer', 'water', 'school', 'fire', 'police'
-            ])
-            
-        elif goal.goal_number == 12:  # Transportation
-            # Applicable for most development projects
-            is_applicable = any(keyword in description_lower for keyword in [
-                'access', 'parking', 'traffic', 'transportation', 'road', 'street'
-            ])
-            
-        elif goal.goal_number == 13:  # Energy Conservation
-            # Applicable for building projects
-            is_applicable = any(keyword in description_lower for keyword in [
-                'building', 'construction', 'energy', 'heating', 'cooling'
-            ])
-            
-        elif goal.goal_number == 14:  # Urbanization
-            # Applicable within urban growth boundaries
-            is_applicable = property_context.get('in_ugb', True)  # Assume in UGB if not specified
-            
-        elif goal.goal_number in [15, 16, 17, 18, 19]:  # Willamette River, Estuarine, Coastal, Beaches, Ocean
-            # Applicable if near water bodies (Shady Cove has Rogue River)
-            riparian_overlay = property_context.get('riparian_overlay', False)
-            is_applicable = riparian_overlay or any(keyword in description_lower for keyword in [
-                'river', 'water', 'riparian', 'wetland', 'stream'
-            ])
-        
-        if is_applicable:
-            applicable_goals.append(goal)
+    # Zoning and overlays decide most goals; only keyword-dependent
+    # goals are matched against the description
+    matrix = get_applicability_matrix(catalog.goal_numbers)
+    applicable_numbers = matrix.applicable_goal_numbers(project_description, property_context)
     
-    return applicable_goals
+    return [goal for goal in catalog.goals if goal.goal_number in applicable_numbers]
 
 def _check_goal_compliance(goal, project_description, property_context):
     """
     Check compliance with a specific statewide goal
     """
-    # Get detailed requirements for this goal
-    requirements = GoalRequirement.query.filter_by(goal_id=goal.id).all()
+    # Detailed requirements come preloaded with the catalog goal
+    requirements = goal.requirements
     
     findings = []
     recommendations = []
@@ -0,0 +1,169 @@
+"""
+Goal Applicability Matrix
+Precomputed statewide goal applicability by zoning and overlay flags
+"""
+
+from itertools import product
+import hashlib
+import json
+
+ALWAYS = 'always'
+NEVER = 'never'
+KEYWORDS = 'keywords'
+
+# Zoning districts used by the permitting app (Property.ZONING_CHOICES)
+ZONING_CODES = ('R1', 'R2', 'R3', 'CG', 'I', 'A', 'PF')
+
+# Description keywords that make a goal applicable when the property
+# itself does not already decide it
+GOAL_KEYWORDS = {
+    3: ['agricultural'],  # Agricultural Lands
+    4: ['forest', 'tree'],  # Forest Lands
+    5: ['historic', 'scenic', 'natural', 'resource', 'wetland', 'habitat'],  # Natural Resources
+    6: ['construction', 'development', 'building', 'industrial', 'commercial'],  # Air, Water and Land Quality
+    7: ['flood', 'hazard', 'slope', 'earthquake', 'landslide'],  # Natural Hazards
+    8: ['recreation', 'park', 'trail', 'sports', 'playground'],  # Recreational Needs
+    9: ['commercial', 'business', 'industrial', 'economic', 'employment'],  # Economic Development
+    10: ['residential', 'housing', 'home', 'apartment', 'adu', 'dwelling'],  # Housing
+    11: ['public', 'utility', 'sewer', 'water', 'school', 'fire', 'police'],  # Public Facilities
+    12: ['access', 'parking', 'traffic', 'transportation', 'road', 'street'],  # Transportation
+    13: ['building', 'construction', 'energy', 'heating', 'cooling'],  # Energy Conservation
+}
+
+# Willamette River, Estuarine, Coastal, Beaches, Ocean - near water bodies
+# (Shady Cove has the Rogue River)
+WATER_GOALS = (15, 16, 17, 18, 19)
+WATER_KEYWORDS = ['river', 'water', 'riparian', 'wetland', 'stream']
+for _goal_number in WATER_GOALS:
+    GOAL_KEYWORDS[_goal_number] = WATER_KEYWORDS
+
+# Rows memoized for zoning codes outside ZONING_CODES
+MAX_MATRIX_ROWS = 1024
+
+
+def property_key(property_context):
+    """
+    Reduce a property context to the facts that decide structural applicability
+    """
+    return (
+        (property_context.get('zoning') or '').upper(),
+        bool(property_context.get('in_floodplain', False)),
+        bool(property_context.get('riparian_overlay', False)),
+        bool(property_context.get('in_ugb', True)),  # Assume in UGB if not specified
+    )
+
+
+def structural_applicability(goal_number, zoning, in_floodplain, riparian_overlay, in_ugb):
+    """
+    Decide a goal from property facts alone: ALWAYS, NEVER or KEYWORDS
+    (applicable only if the project description matches its keywords)
+    """
+    if goal_number in (1, 2):  # Citizen Involvement, Land Use Planning
+        return ALWAYS
+    if goal_number == 3:  # Agricultural zone or near farm land
+        return ALWAYS if 'AG' in zoning or 'FARM' in zoning else KEYWORDS
+    if goal_number == 4:  # Forest zone
+        return ALWAYS if 'F' in zoning else KEYWORDS
+    if goal_number == 7:  # Floodplain
+        return ALWAYS if in_floodplain else KEYWORDS
+    if goal_number == 14:  # Urbanization - within urban growth boundaries
+        return ALWAYS if in_ugb else NEVER
+    if goal_number in WATER_GOALS:
+        return ALWAYS if riparian_overlay else KEYWORDS
+    if goal_number in GOAL_KEYWORDS:
+        return KEYWORDS
+    return NEVER
+
+
+class ApplicabilityMatrix:
+    """
+    Always/never/keyword-dependent goal sets keyed by
+    (zoning, in_floodplain, riparian_overlay, in_ugb)
+    """
+
+    def __init__(self, goal_numbers):
+        self.goal_numbers = tuple(sorted(goal_numbers))
+        self._rows = {}
+
+        for zoning, flags in product(ZONING_CODES, product((False, True), repeat=3)):
+            self.row(zoning, *flags)
+
+        self.version = hashlib.sha256(
+            json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+
+    def row(self, zoning, in_floodplain, riparian_overlay, in_ugb):
+        """
+        Get (computing on first use) the goal sets for one property key
+        """
+        key = (zoning, in_floodplain, riparian_overlay, in_ugb)
+        row = self._rows.get(key)
+        if row is not None:
+            return row
+
+        sets = {ALWAYS: [], NEVER: [], KEYWORDS: []}
+        for goal_number in self.goal_numbers:
+            sets[structural_applicability(goal_number, *key)].append(goal_number)
+
+        row = {name: tuple(numbers) for name, numbers in sets.items()}
+        if len(self._rows) < MAX_MATRIX_ROWS:
+            self._rows[key] = row
+        return row
+
+    def applicable_goal_numbers(self, project_description, property_context):
+        """
+        Goal numbers applicable to a project; only keyword-dependent goals
+        are evaluated against the description
+        """
+        row = self.row(*property_key(property_context))
+        applicable = set(row[ALWAYS])
+
+        if row[KEYWORDS]:
+            description_lower = project_description.lower()
+            for goal_number in row[KEYWORDS]:
+                if any(keyword in description_lower for keyword in GOAL_KEYWORDS[goal_number]):
+                    applicable.add(goal_number)
+
+        return applicable
+
+    def to_dict(self):
+        """
+        Serializable matrix for the precomputed zoning codes
+        """
+        rows = []
+        for zoning, flags in product(ZONING_CODES, product((False, True), repeat=3)):
+            row = self.row(zoning, *flags)
+            rows.append({
+                'zoning': zoning,
+                'in_floodplain': flags[0],
+                'riparian_overlay': flags[1],
+                'in_ugb': flags[2],
+                'always': list(row[ALWAYS]),
+                'never': list(row[NEVER]),
+                'keyword_dependent': list(row[KEYWORDS]),
+            })
+
+        return {
+            'goal_numbers': list(self.goal_numbers),
+            'zoning_codes': list(ZONING_CODES),
+            'rows': rows,
+            'keyword_rules': {
+                str(goal_number): keywords
+                for goal_number, keywords in sorted(GOAL_KEYWORDS.items())
+                if goal_number in self.goal_numbers
+            },
+        }
+
+
+_matrix = None
+
+
+def get_applicability_matrix(goal_numbers):
+    """
+    Process-wide matrix, rebuilt only when the loaded goal numbers change
+    """
+    global _matrix
+    goal_numbers = tuple(sorted(goal_numbers))
+    if _matrix is None or _matrix.goal_numbers != goal_numbers:
+        _matrix = ApplicabilityMatrix(goal_numbers)
+    return _matrix
@@ -0,0 +1,105 @@
+"""
+Goal Catalog
+In-memory snapshot of the statewide goals and their requirements
+"""
+
+from collections import namedtuple
+import threading
+from flask import g, has_app_context
+from sqlalchemy import func
+from src.models.oregon_goals import db, StatewideGoal, GoalRequirement, CatalogState
+
+CatalogRequirement = namedtuple('CatalogRequirement', ['requirement_text', 'compliance_criteria'])
+
+
+class CatalogGoal(namedtuple('CatalogGoal', ['id', 'goal_number', 'title', 'data', 'requirements'])):
+    """
+    Read-only goal snapshot; ``data`` is the precomputed to_dict() payload
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        return self.data
+
+
+class GoalCatalog:
+    """
+    Goals (ordered by id, like StatewideGoal.query.all()) with their
+    requirements, loaded in two queries
+    """
+
+    def __init__(self, version, goals):
+        self.version = version
+        self.goals = tuple(goals)
+        self.goal_numbers = tuple(goal.goal_number for goal in self.goals)
+
+    @classmethod
+    def load(cls, version):
+        requirements = {}
+        for requirement in GoalRequirement.query.order_by(GoalRequirement.id):
+            requirements.setdefault(requirement.goal_id, []).append(
+                CatalogRequirement(requirement.requirement_text, requirement.compliance_criteria)
+            )
+
+        goals = [
+            CatalogGoal(goal.id, goal.goal_number, goal.title, goal.to_dict(), tuple(requirements.get(goal.id, ())))
+            for goal in StatewideGoal.query.order_by(StatewideGoal.id)
+        ]
+        return cls(version, goals)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def catalog_version():
+    """
+    Version of the loaded catalog, bumped by load_oregon_goals only when
+    goal content actually changes. Computed once per request.
+    """
+    if has_app_context() and 'catalog_version' in g:
+        return g.catalog_version
+
+    state_version = db.session.query(CatalogState.version).order_by(CatalogState.version.desc()).limit(1).scalar()
+    if state_version is not None:
+        version = f"v{state_version}"
+    else:
+        version = _legacy_catalog_stamp()
+
+    if has_app_context():
+        g.catalog_version = version
+    return version
+
+
+def _legacy_catalog_stamp():
+    """
+    Stamp for databases loaded before catalog versioning existed
+    """
+    goal_count, last_updated = db.session.query(
+        func.count(StatewideGoal.id), func.max(StatewideGoal.updated_at)
+    ).one()
+    requirement_count, last_requirement_id = db.session.query(
+        func.count(GoalRequirement.id), func.max(GoalRequirement.id)
+    ).one()
+
+    return f"legacy:{goal_count}:{last_updated.isoformat() if last_updated else ''}:{requirement_count}:{last_requirement_id or 0}"
+
+
+def load_catalog():
+    """
+    (Re)load the process-wide catalog; called before fork in production
+    """
+    global _catalog
+    with _catalog_lock:
+        _catalog = GoalCatalog.load(catalog_version())
+        return _catalog
+
+
+def get_catalog():
+    """
+    Process-wide catalog, reloaded only when the catalog version changes
+    """
+    catalog = _catalog
+    if catalog is None or catalog.version != catalog_version():
+        catalog = load_catalog()
+    return catalog
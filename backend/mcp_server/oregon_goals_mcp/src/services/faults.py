@@ -0,0 +1,36 @@
+"""
+Fault Injection
+Added latency, jitter and errors on the /mcp/ API, for load testing clients
+against the loadtest profile without a slow or flaky network
+"""
+
+import random
+import time
+
+from flask import jsonify, request
+
+
+def init_app(app):
+    """
+    Delay every /mcp/ request by FAULT_LATENCY_MS +/- FAULT_JITTER_MS and fail
+    a FAULT_ERROR_RATE fraction of them with a 503. Does nothing when all
+    three are zero, as in every profile but loadtest.
+    """
+    latency = app.config.get('FAULT_LATENCY_MS', 0) / 1000
+    jitter = app.config.get('FAULT_JITTER_MS', 0) / 1000
+    error_rate = app.config.get('FAULT_ERROR_RATE', 0)
+    if not (latency or jitter or error_rate):
+        return
+
+    rng = random.Random(app.config.get('FAULT_SEED'))
+
+    @app.before_request
+    def _inject_faults():
+        if not request.path.startswith('/mcp/'):
+            return None
+        delay = max(latency + rng.uniform(-jitter, jitter), 0)
+        if delay:
+            time.sleep(delay)
+        if error_rate and rng.random() < error_rate:
+            return jsonify({'success': False, 'error': 'Injected fault'}), 503
+        return None
@@ -0,0 +1,122 @@
+"""
+Prometheus Metrics
+Request latency per route, result cache hits, database query latency and
+connection pool usage, merged across gunicorn workers through
+prometheus_client's file-backed multiprocess mode (PROMETHEUS_MULTIPROC_DIR)
+"""
+
+import os
+import time
+
+from flask import g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+HTTP_REQUEST_DURATION = Histogram(
+    'mcp_http_request_duration_seconds', 'Request latency by route',
+    ['method', 'route'], buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    'mcp_http_requests', 'Requests by route and status code (error rate = 5xx / all)',
+    ['method', 'route', 'status'],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'mcp_http_requests_in_progress', 'Requests being served', multiprocess_mode='livesum',
+)
+RESULT_CACHE_REQUESTS = Counter(
+    'mcp_result_cache_requests', 'Result cache lookups (hit ratio = hit / all)', ['kind', 'result'],
+)
+DB_QUERY_DURATION = Histogram('mcp_db_query_duration_seconds', 'Database query latency', buckets=QUERY_BUCKETS)
+DB_POOL_CHECKED_OUT = Gauge(
+    'mcp_db_pool_checked_out', 'Pooled database connections in use', multiprocess_mode='livesum',
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'mcp_db_pool_connections', 'Open pooled database connections', multiprocess_mode='livesum',
+)
+
+
+def init_app(app):
+    """
+    Time every request of ``app``. Call before registering other
+    before_request hooks so the timing covers them.
+    """
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+            HTTP_REQUEST_DURATION.labels(request.method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+        return response
+
+    @app.teardown_request
+    def _finish_request(exception=None):
+        if g.pop('metrics_started', None) is not None:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, so a failed query leaves nothing behind
+    context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_started', None)
+    if started is not None:
+        DB_QUERY_DURATION.observe(time.perf_counter() - started)
+
+
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.inc()
+
+
+def _on_close(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.dec()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    # Also called for connections invalidated while checked out
+    DB_POOL_CHECKED_OUT.dec()
+
+
+def instrument_engine(engine):
+    """Time queries and track pool usage of a SQLAlchemy engine"""
+    listeners = (
+        (engine, 'before_cursor_execute', _before_cursor_execute),
+        (engine, 'after_cursor_execute', _after_cursor_execute),
+        (engine.pool, 'connect', _on_connect),
+        (engine.pool, 'close', _on_close),
+        (engine.pool, 'checkout', _on_checkout),
+        (engine.pool, 'checkin', _on_checkin),
+    )
+    for target, name, listener in listeners:
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
+
+
+def render():
+    """
+    (body, content type) of the metrics exposition, merged from every
+    worker's files when PROMETHEUS_MULTIPROC_DIR is set
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
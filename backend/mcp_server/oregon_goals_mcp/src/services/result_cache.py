@@ -0,0 +1,84 @@
+"""
+Result Cache
+Bounded LRU memoization of goal applicability and compliance evaluations
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache keyed by a canonical hash of
+    (normalized description, sorted property context, catalog version)
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._catalog_version = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(kind, project_description, property_context, catalog_version):
+        """
+        Canonical key; also used as the response ETag
+        """
+        # Goal matching is case-insensitive substring matching on single
+        # words, so case and whitespace runs do not affect the result
+        normalized_description = ' '.join(project_description.lower().split())
+        payload = json.dumps(
+            [kind, normalized_description, property_context or {}, catalog_version],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def sync_catalog_version(self, catalog_version):
+        """
+        Drop every entry when the goal catalog has been reloaded
+        """
+        with self._lock:
+            if catalog_version != self._catalog_version:
+                self._entries.clear()
+                self._catalog_version = catalog_version
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'catalog_version': self._catalog_version
+            }
+
+
+result_cache = ResultCache(max_entries=int(os.getenv('MCP_RESULT_CACHE_SIZE', '1024')))
@@ -0,0 +1,13 @@
+"""
+WSGI entry point for the Oregon Goals MCP Server (production profile)
+
+    gunicorn -c gunicorn.conf.py src.wsgi:application
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import create_app
+
+application = create_app(os.getenv('MCP_PROFILE', 'production'))
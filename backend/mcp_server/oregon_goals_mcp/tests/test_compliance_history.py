@@ -0,0 +1,91 @@
+"""
+Compliance history paging (/mcp/compliance-history/<project_id>)
+
+    python -m unittest discover tests
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from src.main import create_app
+from src.models.oregon_goals import ComplianceCheck, StatewideGoal
+from src.models.user import db
+
+
+class ComplianceHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('development', SQLALCHEMY_DATABASE_URI='sqlite://', TESTING=True)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            goals = [
+                StatewideGoal(goal_number=number, title=f'Goal {number}', description='-', requirements='[]')
+                for number in (1, 5)
+            ]
+            db.session.add_all(goals)
+            db.session.flush()
+            start = datetime(2024, 1, 1)
+            # Pairs of checks share a timestamp, so pages split on the id too
+            for number in range(7):
+                db.session.add(ComplianceCheck(
+                    project_id='APP-1', goal_id=goals[number % 2].id, project_description='Deck',
+                    compliance_status='NEEDS_REVIEW' if number % 3 == 0 else 'COMPLIANT',
+                    created_at=start + timedelta(minutes=number // 2),
+                ))
+            db.session.add(ComplianceCheck(
+                project_id='APP-2', goal_id=goals[0].id, project_description='Fence',
+                compliance_status='COMPLIANT', created_at=start,
+            ))
+            db.session.commit()
+            self.expected = [
+                check.id for check in ComplianceCheck.query.filter_by(project_id='APP-1').order_by(
+                    ComplianceCheck.created_at.desc(), ComplianceCheck.id.desc())
+            ]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def history(self, **params):
+        response = self.client.get('/mcp/compliance-history/APP-1', query_string=params)
+        return response.status_code, response.get_json()
+
+    def test_pages_cover_the_history_once_newest_first(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            status, body = self.history(**params)
+            self.assertEqual(status, 200)
+            seen += [row['id'] for row in body['compliance_history']]
+            pages += 1
+            cursor = body['next_cursor']
+            self.assertEqual(body['has_more'], cursor is not None)
+            if not cursor:
+                break
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_rows_reference_goals_by_number(self):
+        status, body = self.history(limit=2)
+        self.assertEqual(body['goals'], {'1': 'Goal 1', '5': 'Goal 5'})
+        self.assertEqual({row['goal_number'] for row in body['compliance_history']}, {1, 5})
+        self.assertNotIn('goal', body['compliance_history'][0])
+
+    def test_status_filter(self):
+        status, body = self.history(status='needs_review')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['count'], 3)
+        self.assertTrue(all(row['compliance_status'] == 'NEEDS_REVIEW' for row in body['compliance_history']))
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.history(cursor='not-a-cursor')[0], 400)
+        self.assertEqual(self.history(status='MAYBE')[0], 400)
+        self.assertEqual(self.history(limit='ten')[0], 400)
+        self.assertEqual(self.history(limit=100000)[1]['limit'], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
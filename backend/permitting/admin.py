@@ -1,9 +1,11 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
     Property, PermitType, PermitApplication, 
-    ApplicationDocument, ZoningRule, ComplianceCheck
+    ApplicationDocument, ZoningRule, ComplianceCheck, AnsweredQuestion
 )
+from .fees import get_fee_engine
 
 
 @admin.register(Property)
@@ -71,6 +73,7 @@ class PermitApplicationAdmin(admin.ModelAdmin):
     list_filter = ['status', 'permit_type', 'compliance_check_passed', 'fee_paid']
     search_fields = ['applicant_name', 'applicant_email', 'property__address', 'project_description']
     readonly_fields = ['application_id', 'calculated_fee', 'created_at', 'updated_at']
+    list_select_related = ['property', 'permit_type']
     
     inlines = [ApplicationDocumentInline, ComplianceCheckInline]
     
@@ -119,10 +122,15 @@ class PermitApplicationAdmin(admin.ModelAdmin):
     actions = ['calculate_fees', 'run_compliance_check']
     
     def calculate_fees(self, request, queryset):
-        for application in queryset:
-            application.calculate_fee()
-            application.save()
-        self.message_user(request, f"Fees calculated for {queryset.count()} applications.")
+        engine = get_fee_engine()
+        # Active permit types are already compiled, so no join is needed
+        applications = list(queryset.only('id', 'square_footage', 'project_value', 'permit_type'))
+        now = timezone.now()
+        for application in applications:
+            application.calculated_fee = engine.quote_application(application).total_fee
+            application.updated_at = now
+        PermitApplication.objects.bulk_update(applications, ['calculated_fee', 'updated_at'], batch_size=500)
+        self.message_user(request, f"Fees calculated for {len(applications)} applications (fee schedule {engine.version}).")
     calculate_fees.short_description = "Recalculate fees for selected applications"
     
     def run_compliance_check(self, request, queryset):
@@ -138,6 +146,7 @@ class ApplicationDocumentAdmin(admin.ModelAdmin):
     list_filter = ['document_type', 'ai_processed']
     search_fields = ['filename', 'application__applicant_name']
     readonly_fields = ['file_size', 'uploaded_at']
+    list_select_related = ['application__property', 'application__permit_type']
     
     def file_size_mb(self, obj):
         return f"{obj.file_size / (1024*1024):.2f} MB"
@@ -170,12 +179,26 @@ class ComplianceCheckAdmin(admin.ModelAdmin):
     list_filter = ['result', 'rule_checked__rule_type', 'rule_checked__zoning_district']
     search_fields = ['application__applicant_name', 'rule_checked__rule_type']
     readonly_fields = ['checked_at']
+    list_select_related = ['application__property', 'application__permit_type', 'rule_checked']
     
     def rule_type(self, obj):
         return obj.rule_checked.rule_type
     rule_type.short_description = "Rule Type"
 
 
+
+@admin.register(AnsweredQuestion)
+class AnsweredQuestionAdmin(admin.ModelAdmin):
+    list_display = ['question_preview', 'source', 'is_active', 'hit_count', 'last_hit_at', 'created_at']
+    list_filter = ['is_active', 'source']
+    search_fields = ['question', 'answer']
+    readonly_fields = ['context_key', 'source', 'hit_count', 'last_hit_at', 'created_at']
+    
+    def question_preview(self, obj):
+        return obj.question[:80]
+    question_preview.short_description = "Question"
+
+
 # Customize the admin site header and title
 admin.site.site_header = "CiviAI Administration"
 admin.site.site_title = "CiviAI Admin"
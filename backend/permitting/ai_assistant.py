@@ -8,6 +8,7 @@ import re
 from typing import Dict, List, Tuple, Optional
 from django.conf import settings
 from .models import Property, PermitType, ZoningRule, ComplianceCheck
+from .knowledge_index import KnowledgeIndex, SearchHit, get_knowledge_index
 
 
 class PlanningKnowledgeBase:
@@ -15,86 +16,29 @@ class PlanningKnowledgeBase:
     Knowledge base for planning regulations, procedures, and common questions
     """
     
-    def __init__(self):
-        self.knowledge_base = {
-            # Zoning Questions
-            "zoning": {
-                "what_is_my_zoning": "Your property's zoning determines what types of uses are allowed and what development standards apply. I can look this up for you using your address or tax lot number.",
-                "r1_requirements": "R-1 Low Density Residential allows single-family homes with maximum 35-foot height, 40% lot coverage, and setbacks of 20 feet front, 10 feet rear, 5 feet side.",
-                "r2_requirements": "R-2 Medium Density Residential allows single-family and duplex homes with maximum 35-foot height, 50% lot coverage, and setbacks of 15 feet front, 10 feet rear, 5 feet side.",
-                "commercial_requirements": "C-G General Commercial allows retail, office, and service uses with maximum 45-foot height, 70% lot coverage, and setbacks of 10 feet from residential zones."
-            },
-            
-            # Permit Questions
-            "permits": {
-                "do_i_need_permit": "Most construction, alterations, and additions require permits. I can help determine what permits you need based on your project description.",
-                "building_permit_required": "Building permits are required for new construction, additions, structural changes, electrical work, plumbing, and HVAC installations.",
-                "deck_permit": "Decks over 30 inches high or attached to the house require a building permit. The fee is $75.00 plus any additional review fees.",
-                "fence_permit": "Fences over 6 feet high or in front yards require permits. Standard residential fences under 6 feet in rear/side yards typically don't need permits.",
-                "adu_permit": "Accessory Dwelling Units require building permits and must comply with size limits, parking requirements, and design standards."
-            },
-            
-            # Process Questions
-            "process": {
-                "how_long_review": "Review times vary by permit type: Simple permits (deck, fence) typically 1-2 weeks, residential additions 2-3 weeks, new construction 3-4 weeks.",
-                "public_notice_required": "Public notice is required for conditional use permits, variances, and some commercial developments. Most residential permits don't require public notice.",
-                "appeal_process": "Planning decisions can be appealed to the Planning Commission within 14 days of the decision. Appeals require a $200 fee and written statement.",
-                "variance_needed": "Variances are required when you can't meet standard setbacks, height limits, or other zoning requirements due to unique property constraints."
-            },
-            
-            # Fees
-            "fees": {
-                "permit_fees": "Permit fees vary by type: Residential addition $200, New house $500, Commercial building $1000, Deck $75, Fence $50, ADU $300.",
-                "additional_fees": "Additional fees may apply for plan review, inspections, public notices, or engineering review depending on project complexity.",
-                "fee_calculation": "Fees are calculated based on permit type, project value, and square footage. I can calculate exact fees when you provide project details."
-            },
-            
-            # Special Requirements
-            "special": {
-                "floodplain": "Properties in the floodplain require special permits and must meet FEMA requirements. Substantial improvements require elevation certificates.",
-                "riparian": "Properties near the Rogue River have riparian setback requirements. Development within 50 feet of the river may require special review.",
-                "historic": "Properties in historic districts require design review for exterior changes. Contact the planning department for historic guidelines.",
-                "environmental": "Environmental review may be required for large developments, wetland impacts, or steep slope construction."
-            }
-        }
+    FALLBACK_ANSWER = (
+        "I'd be happy to help with your planning question. Could you be more specific about what you need to know? "
+        "I can help with zoning requirements, permit applications, fees, review processes, and special requirements."
+    )
+    
+    def __init__(self, index: Optional[KnowledgeIndex] = None):
+        self.index = index if index is not None else get_knowledge_index()
+    
+    def search(self, question: str, k: int = 5) -> List[SearchHit]:
+        """
+        Ranked top-k knowledge entries with their BM25 scores
+        """
+        return self.index.search(question, k)
     
     def search_knowledge(self, question: str) -> str:
         """
         Search the knowledge base for relevant information
         """
-        question_lower = question.lower()
+        hits = self.index.search(question, k=1)
+        if hits:
+            return hits[0].entry.answer
         
-        # Keywords to category mapping
-        keyword_mapping = {
-            "zoning": ["zoning", "zone", "r-1", "r-2", "commercial", "residential"],
-            "permits": ["permit", "building", "deck", "fence", "adu", "addition"],
-            "process": ["how long", "review time", "appeal", "variance", "notice"],
-            "fees": ["fee", "cost", "price", "how much", "payment"],
-            "special": ["floodplain", "riparian", "river", "historic", "environmental"]
-        }
-        
-        # Find the most relevant category
-        best_category = None
-        best_score = 0
-        
-        for category, keywords in keyword_mapping.items():
-            score = sum(1 for keyword in keywords if keyword in question_lower)
-            if score > best_score:
-                best_score = score
-                best_category = category
-        
-        if best_category and best_score > 0:
-            # Find the most relevant answer in the category
-            category_knowledge = self.knowledge_base[best_category]
-            
-            for key, answer in category_knowledge.items():
-                if any(keyword in question_lower for keyword in key.split("_")):
-                    return answer
-            
-            # Return first answer in category if no specific match
-            return list(category_knowledge.values())[0]
-        
-        return "I'd be happy to help with your planning question. Could you be more specific about what you need to know? I can help with zoning requirements, permit applications, fees, review processes, and special requirements."
+        return self.FALLBACK_ANSWER
 
 
 class ComplianceEngine:
@@ -279,6 +223,9 @@ class ComplianceEngine:
         return answer
 
 
-# Global instance for use throughout the application
-compliance_engine = ComplianceEngine()
-
+# Global instance, built on first use by the service registry (services.py)
+def __getattr__(name):
+    if name == 'compliance_engine':
+        from .services import get_service
+        return get_service('compliance_engine')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
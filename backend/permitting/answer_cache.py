@@ -0,0 +1,309 @@
+"""
+Answer Cache for CiviAI
+Reuses stored Claude answers for near-duplicate planning questions, using
+hashed n-gram vectors and cosine similarity computed locally on the CPU.
+Municipal code text is not indexed here: it is searched by knowledge_index
+(BM25) for local answers and sent to Claude in the municipal reference.
+"""
+
+import hashlib
+import json
+import math
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import timedelta
+from typing import Dict, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import ANSWERED_QUESTIONS, namespace_version
+from .knowledge_index import tokenize
+from .metrics import CACHE_REQUESTS
+from .models import AnsweredQuestion
+
+# Cosine similarity at or above which a stored answer is reused. Rewordings
+# of the same question score about 0.85-1.0; questions on the same topic that
+# ask something different ("front" vs "rear setback") stay around 0.75.
+DEFAULT_SIMILARITY_THRESHOLD = 0.82
+# Older answers are not reused; regulations and fees change
+DEFAULT_MAX_AGE_DAYS = 90
+
+FEATURE_BITS = 20
+FEATURE_MASK = (1 << FEATURE_BITS) - 1
+CHAR_NGRAM = 4
+
+# Weights of the three feature families. Word bigrams separate "front
+# setback" from "rear setback"; character n-grams tolerate typos and
+# inflections that the tokenizer does not fold.
+FAMILY_WEIGHTS = {'w': 1.0, 'b': 0.7, 'c': 0.6}
+
+METRICS = ('lookups', 'hits', 'stores')
+
+# Answers are added to a built index incrementally, weighted with the idf of
+# the answers it was built from; it is rebuilt from the database once it
+# has grown by this fraction (and at least REBUILD_MIN_ADDED answers), or
+# is this old (answers age out by ANSWER_CACHE_MAX_AGE_DAYS)
+REBUILD_GROWTH = 0.25
+REBUILD_MIN_ADDED = 50
+REBUILD_SECONDS = 24 * 3600
+# Shared count of stored answers; a worker whose index has seen fewer
+# fetches the new rows
+ADDED_KEY = 'answer-cache:added'
+# New rows are fetched by created_at from this long before the newest row
+# indexed: created_at is set when a row is inserted, and a row may commit
+# after a later one
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+def _feature(kind: str, value: str) -> int:
+    # crc32 rather than hash(): features must agree across processes
+    return zlib.crc32(f'{kind}:{value}'.encode('utf-8')) & FEATURE_MASK
+
+
+def features(text: str) -> Dict[int, float]:
+    """
+    Hashed word, word bigram and character n-gram features of a text, with
+    sublinear term frequency scaled by the family weight
+    """
+    words = tokenize(text)
+    occurrences = Counter()
+    for word in words:
+        occurrences[('w', word)] += 1
+        padded = f' {word} '
+        for start in range(max(len(padded) - CHAR_NGRAM + 1, 1)):
+            occurrences[('c', padded[start:start + CHAR_NGRAM])] += 1
+    for first, second in zip(words, words[1:]):
+        occurrences[('b', f'{first} {second}')] += 1
+
+    vector = defaultdict(float)
+    for (kind, value), count in occurrences.items():
+        vector[_feature(kind, value)] += FAMILY_WEIGHTS[kind] * (1 + math.log(count))
+    return vector
+
+
+def context_key(context: Optional[dict]) -> str:
+    """
+    Stable key for the property / permit context of a question; answers are
+    only reused for questions asked with the same context
+    """
+    if not context:
+        return ''
+    canonical = json.dumps(context, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CachedAnswer(NamedTuple):
+    id: int
+    question: str
+    answer: str
+    source: str
+    similarity: float
+
+
+class AnswerIndex:
+    """
+    In-memory vector index over stored answers. Document vectors are
+    TF-IDF weighted, L2-normalised and kept in an inverted index, so a
+    lookup only touches answers that share a feature with the question.
+    """
+
+    def __init__(self, rows, added_count=0):
+        rows = list(rows)
+        vectors = [features(row.question) for row in rows]
+
+        document_frequency = Counter()
+        for vector in vectors:
+            document_frequency.update(vector.keys())
+        document_count = len(rows)
+        self.idf = {
+            feature: math.log((1 + document_count) / (1 + df)) + 1
+            for feature, df in document_frequency.items()
+        }
+
+        self.rows = []
+        self.ids = set()
+        self.postings = defaultdict(list)
+        self.built_size = document_count
+        self.built_at = time.monotonic()
+        # Newest created_at fetched from the database, and the shared added
+        # count (ADDED_KEY) the index is up to date with
+        self.synced_at = max((row.created_at for row in rows), default=None)
+        self.added_count = added_count
+        for row, vector in zip(rows, vectors):
+            self._add(row, vector)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _add(self, row, vector):
+        if row.id in self.ids:
+            return
+        doc_id = len(self.rows)
+        # The row goes in before its postings: lookups read without the lock
+        self.rows.append(row)
+        self.ids.add(row.id)
+        for feature, weight in self._normalise(vector).items():
+            self.postings[feature].append((doc_id, weight))
+
+    def add(self, rows):
+        """Index more answers, weighted with the idf the index was built with; known ones are skipped"""
+        for row in rows:
+            self._add(row, features(row.question))
+            if self.synced_at is None or row.created_at > self.synced_at:
+                self.synced_at = row.created_at
+
+    def stale(self) -> bool:
+        added = len(self.rows) - self.built_size
+        return (added > max(self.built_size * REBUILD_GROWTH, REBUILD_MIN_ADDED)
+                or time.monotonic() - self.built_at > REBUILD_SECONDS)
+
+    def _normalise(self, vector):
+        # Features never seen in a stored question get the maximum idf
+        default_idf = math.log(1 + len(self.rows)) + 1
+        weighted = {feature: weight * self.idf.get(feature, default_idf) for feature, weight in vector.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weighted.values()))
+        if not norm:
+            return {}
+        return {feature: weight / norm for feature, weight in weighted.items()}
+
+    def nearest(self, question: str, key: str = '') -> Optional[CachedAnswer]:
+        """Most similar stored answer asked with the same context, if any"""
+        scores = defaultdict(float)
+        for feature, weight in self._normalise(features(question)).items():
+            for doc_id, doc_weight in self.postings.get(feature, ()):
+                scores[doc_id] += weight * doc_weight
+
+        best = None
+        for doc_id, score in scores.items():
+            row = self.rows[doc_id]
+            if row.context_key == key and (best is None or score > best[1]):
+                best = (doc_id, score)
+        if best is None:
+            return None
+
+        row = self.rows[best[0]]
+        return CachedAnswer(row.id, row.question, row.answer, row.source, min(best[1], 1.0))
+
+
+_index = None
+_index_namespace_version = None
+_index_lock = threading.Lock()
+
+
+def _max_age():
+    return timedelta(days=getattr(settings, 'ANSWER_CACHE_MAX_AGE_DAYS', DEFAULT_MAX_AGE_DAYS))
+
+
+def _answers():
+    return AnsweredQuestion.objects.filter(
+        is_active=True, created_at__gte=timezone.now() - _max_age()
+    ).only('id', 'question', 'context_key', 'answer', 'source', 'created_at')
+
+
+def _added_count() -> int:
+    return _metrics_cache().get(ADDED_KEY, 0)
+
+
+def get_answer_index() -> AnswerIndex:
+    """
+    Process-wide index of active, recent answers. Answers stored by any
+    process are added to it as they appear; it is rebuilt when an
+    AnsweredQuestion is edited or deleted (signals.py), or has grown or
+    aged past REBUILD_GROWTH / REBUILD_SECONDS.
+    """
+    global _index, _index_namespace_version
+    current = namespace_version(ANSWERED_QUESTIONS)
+    added = _added_count()
+    index = _index
+    if index is None or _index_namespace_version != current or index.stale():
+        with _index_lock:
+            if _index is None or _index_namespace_version != current or _index.stale():
+                _index = AnswerIndex(_answers(), added)
+                _index_namespace_version = current
+            return _index
+    if index.added_count != added:
+        with _index_lock:
+            if index.added_count != added:
+                rows = _answers()
+                if index.synced_at is not None:
+                    rows = rows.filter(created_at__gte=index.synced_at - SYNC_OVERLAP)
+                index.add(rows.order_by('created_at', 'id'))
+                index.added_count = added
+    return index
+
+
+def _metrics_cache():
+    # Counters live in the shared tier so every worker adds to the same totals
+    cache = caches['default']
+    return getattr(cache, 'shared', cache)
+
+
+def _count(metric):
+    _increment(f'answer-cache:{metric}')
+
+
+def _increment(key):
+    cache = _metrics_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def lookup(question: str, context: Optional[dict] = None, threshold: Optional[float] = None) -> Optional[CachedAnswer]:
+    """
+    Stored answer for a near-duplicate question, or None when nothing is
+    similar enough (the caller then asks Claude and stores the answer)
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'ANSWER_CACHE_SIMILARITY', DEFAULT_SIMILARITY_THRESHOLD)
+
+    _count('lookups')
+    match = get_answer_index().nearest(question, context_key(context))
+    if match is None or match.similarity < threshold:
+        CACHE_REQUESTS.labels('answers', 'miss').inc()
+        return None
+
+    _count('hits')
+    CACHE_REQUESTS.labels('answers', 'hit').inc()
+    AnsweredQuestion.objects.filter(pk=match.id).update(hit_count=F('hit_count') + 1, last_hit_at=timezone.now())
+    return match
+
+
+def store(question: str, context: Optional[dict], answer: str, source: str) -> AnsweredQuestion:
+    """
+    Remember a Claude answer for later near-duplicates. It is added to this
+    process's index at once and fetched by the others on their next lookup;
+    no index is rebuilt.
+    """
+    _count('stores')
+    row = AnsweredQuestion.objects.create(
+        question=question, context_key=context_key(context), answer=answer, source=source
+    )
+    # Counted once committed, so other workers do not sync before they can see it
+    transaction.on_commit(lambda: _increment(ADDED_KEY))
+    with _index_lock:
+        if _index is not None:
+            _index.add([row])
+    return row
+
+
+def stats() -> dict:
+    """Hit-rate metrics since the last reset"""
+    counters = _metrics_cache().get_many([f'answer-cache:{metric}' for metric in METRICS])
+    values = {metric: counters.get(f'answer-cache:{metric}', 0) for metric in METRICS}
+    values['misses'] = values['lookups'] - values['hits']
+    values['hit_rate'] = round(values['hits'] / values['lookups'], 4) if values['lookups'] else 0.0
+    values['indexed_answers'] = len(get_answer_index())
+    return values
+
+
+def reset_stats():
+    _metrics_cache().delete_many([f'answer-cache:{metric}' for metric in METRICS])
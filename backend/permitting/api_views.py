@@ -3,17 +3,26 @@ API Views for CiviAI AI Assistant
 Provides REST API endpoints for planning questions and compliance checking
 """
 
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db import models
 import json
 
 from .models import Property, PermitType, PermitApplication
-from .ai_assistant import compliance_engine
+from .services import get_service
 from .serializers import PropertySerializer, PermitApplicationSerializer
+from .pagination import KeysetPagination
+from .exporters import filter_applications, stream_export
+from .fast_serializers import serialize_applications, serialize_properties
+from .fees import get_fee_engine
+from .instrumentation import histogram
+
+# Upper bound for one batch fee request
+MAX_FEE_SCENARIOS = 10000
 
 
 @api_view(['POST'])
@@ -41,7 +50,7 @@ def ask_planning_question(request):
                 pass
         
         # Get AI answer
-        answer = compliance_engine.answer_planning_question(question, context)
+        answer = get_service('compliance_engine').answer_planning_question(question, context)
         
         return Response({
             'question': question,
@@ -79,7 +88,7 @@ def check_project_compliance(request):
         permit_type = get_object_or_404(PermitType, id=permit_type_id)
         
         # Run compliance check
-        compliance_results = compliance_engine.check_project_compliance(
+        compliance_results = get_service('compliance_engine').check_project_compliance(
             property_obj, permit_type, project_details
         )
         
@@ -161,27 +170,71 @@ def calculate_fees(request):
         permit_type_id = data.get('permit_type_id')
         project_details = data.get('project_details', {})
         
-        permit_type = get_object_or_404(PermitType, id=permit_type_id)
-        
-        # Calculate fees
-        base_fee = float(permit_type.base_fee)
-        additional_fees = _calculate_additional_fees(permit_type, project_details)
-        total_fee = base_fee + additional_fees
+        quote = get_fee_engine().quote_development(
+            permit_type_id,
+            project_details.get('square_footage'),
+            project_details.get('project_value'),
+        )
         
         return Response({
-            'permit_type': permit_type.name,
-            'base_fee': base_fee,
-            'additional_fees': additional_fees,
-            'total_fee': total_fee,
-            'fee_breakdown': _get_fee_breakdown(permit_type, project_details)
+            'permit_type': quote.permit_type,
+            'base_fee': float(quote.base_fee),
+            'additional_fees': float(quote.additional_fees),
+            'total_fee': float(quote.total_fee),
+            'fee_breakdown': [{'item': item, 'amount': float(amount)} for item, amount in quote.breakdown],
+            'schedule_version': quote.schedule_version,
         })
         
+    except PermitType.DoesNotExist:
+        return Response({
+            'error': 'Permit type not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'error': f'Error calculating fees: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+def calculate_fees_batch(request):
+    """
+    Quote many applications or what-if scenarios against one fee schedule
+    version. Body: {"scenarios": [{"permit_type_id", "square_footage",
+    "project_value"}, ...], "estimate": "schedule" | "development"}
+    """
+    scenarios = request.data.get('scenarios')
+    if not isinstance(scenarios, list) or not all(isinstance(scenario, dict) for scenario in scenarios):
+        return Response({
+            'error': 'scenarios must be a list of objects'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(scenarios) > MAX_FEE_SCENARIOS:
+        return Response({
+            'error': f'At most {MAX_FEE_SCENARIOS} scenarios per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    estimate = request.data.get('estimate', 'schedule')
+    if estimate not in ('schedule', 'development'):
+        return Response({
+            'error': f'Unknown estimate: {estimate}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    engine = get_fee_engine()
+    quotes = engine.quote_many(scenarios, development=estimate == 'development')
+    
+    return Response({
+        'schedule_version': engine.version,
+        'results': [
+            quote.to_dict() if quote else {'error': 'Unknown permit type or invalid input values'}
+            for quote in quotes
+        ],
+        'total_fee': float(sum(quote.total_fee for quote in quotes if quote)),
+    })
+
+
 @api_view(['GET'])
 def search_properties(request):
     """
@@ -203,7 +256,7 @@ def search_properties(request):
         
         return Response({
             'query': query,
-            'results': PropertySerializer(properties, many=True).data,
+            'results': serialize_properties(properties),
             'count': properties.count()
         })
         
@@ -213,8 +266,76 @@ def search_properties(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+def list_applications(request):
+    """
+    Permit applications, newest first, with cursor pagination.
+    Filters: status, created_after, created_before. Pass count=1 for an
+    approximate total.
+    """
+    try:
+        applications = filter_applications(PermitApplication.objects.all(), request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Paginate on the keys only, then serialize the page through the fast path
+    # (same JSON as PermitApplicationSerializer) in the same order
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(applications.only('id', 'created_at'), request)
+    page_applications = PermitApplication.objects.filter(id__in=[application.id for application in page])
+    return paginator.get_paginated_response(
+        serialize_applications(page_applications.order_by('-created_at', '-id'))
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_applications(request):
+    """
+    Staff only: stream permit applications as CSV or NDJSON
+    (file_format=csv|ndjson), oldest first. Same filters as
+    list_applications; memory use is flat however large the date range.
+    """
+    return _streaming_export('applications', request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_compliance_checks(request):
+    """
+    Staff only: stream compliance check results with their application
+    reference as CSV or NDJSON. Filters apply to the application (status,
+    created dates).
+    """
+    return _streaming_export('compliance_checks', request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    """
+    Staff only: per-route latency percentiles, stage timings, call counts
+    and token usage of this worker process over the rolling window
+    """
+    return Response(histogram.snapshot())
+
+
 # Helper functions
 
+def _streaming_export(dataset, request):
+    """Build the StreamingHttpResponse for an export dataset"""
+    export_format = request.GET.get('file_format', 'csv')
+    try:
+        chunks = stream_export(dataset, export_format, request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+    return response
+
+
 def _generate_recommendations(compliance_results, permit_type):
     """Generate recommendations based on compliance results"""
     recommendations = []
@@ -324,55 +445,3 @@ def _get_required_documents(permit_type):
     }
     
     return documents.get(permit_type.code, ['Contact planning department'])
-
-
-def _calculate_additional_fees(permit_type, project_details):
-    """Calculate additional fees based on project details"""
-    additional_fees = 0.0
-    
-    # Square footage based fees for some permit types
-    if permit_type.code in ['ADD', 'SFR', 'COM']:
-        square_footage = float(project_details.get('square_footage', 0))
-        if square_footage > 0:
-            # $0.10 per square foot for additions and new construction
-            additional_fees += square_footage * 0.10
-    
-    # Project value based fees
-    project_value = float(project_details.get('project_value', 0))
-    if project_value > 10000:
-        # 0.5% of project value over $10,000
-        additional_fees += (project_value - 10000) * 0.005
-    
-    return round(additional_fees, 2)
-
-
-def _get_fee_breakdown(permit_type, project_details):
-    """Get detailed fee breakdown"""
-    breakdown = []
-    
-    breakdown.append({
-        'item': f'{permit_type.name} Base Fee',
-        'amount': float(permit_type.base_fee)
-    })
-    
-    # Add square footage fees if applicable
-    if permit_type.code in ['ADD', 'SFR', 'COM']:
-        square_footage = float(project_details.get('square_footage', 0))
-        if square_footage > 0:
-            sqft_fee = square_footage * 0.10
-            breakdown.append({
-                'item': f'Square Footage Fee ({square_footage} sq ft @ $0.10/sq ft)',
-                'amount': sqft_fee
-            })
-    
-    # Add project value fees if applicable
-    project_value = float(project_details.get('project_value', 0))
-    if project_value > 10000:
-        value_fee = (project_value - 10000) * 0.005
-        breakdown.append({
-            'item': f'Project Value Fee (0.5% of value over $10,000)',
-            'amount': value_fee
-        })
-    
-    return breakdown
-
@@ -3,7 +3,8 @@ Enhanced API Views for CiviAI with Claude Integration
 Advanced AI capabilities for municipal planning
 """
 
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from django.http import JsonResponse
@@ -12,12 +13,85 @@ from django.views.decorators.http import require_http_methods
 import json
 import asyncio
 from .models import Property, PermitType, PermitApplication, ZoningRule
-from .ai_assistant import PlanningKnowledgeBase, ComplianceEngine
-from .claude_service import claude_service
+from .services import get_service
+from . import answer_cache
+from .routing import is_complex_question
+from .streaming import EventStreamRenderer, event_stream_response, stream_events, wants_event_stream
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _cached_answer(question, context):
+    """
+    Near-duplicates of questions Claude already answered are served from
+    stored answers without a round-trip
+    """
+    try:
+        cached = answer_cache.lookup(question, context)
+    except Exception as e:
+        logger.error(f"Answer cache lookup failed: {str(e)}")
+        return None
+    if cached:
+        return {
+            'answer': cached.answer,
+            'source': 'Answer cache',
+            'model': cached.source,
+            'similarity': round(cached.similarity, 3),
+            'matched_question': cached.question,
+            'complexity': 'high'
+        }
+    return None
+
+def _store_answer(question, context, answer, model):
+    try:
+        answer_cache.store(question, context, answer, model)
+    except Exception as e:
+        logger.error(f"Could not store answer in answer cache: {str(e)}")
+
+def _local_answer(question):
+    """Fallback to local AI when Claude fails"""
+    return {
+        'answer': get_service('compliance_engine').answer_planning_question(question),
+        'source': 'Local AI (Claude fallback)',
+        'complexity': 'high',
+        'note': 'Advanced AI temporarily unavailable, using local knowledge base'
+    }
+
+def _answer_question(question, context):
+    if not is_complex_question(question):
+        # Use local AI for simple questions (faster)
+        return {
+            'answer': get_service('compliance_engine').answer_planning_question(question),
+            'source': 'Local AI',
+            'complexity': 'standard'
+        }
+    
+    cached = _cached_answer(question, context)
+    if cached:
+        return cached
+    
+    # Use Claude for complex questions
+    try:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        result = loop.run_until_complete(
+            get_service('claude').ask_complex_question(question, context)
+        )
+        loop.close()
+        
+        if result['success']:
+            _store_answer(question, context, result['answer'], result['model'])
+            return {
+                'answer': result['answer'],
+                'source': 'Claude AI',
+                'model': result['model'],
+                'context_used': result.get('context_used', False),
+                'complexity': 'high'
+            }
+    except Exception as e:
+        logger.error(f"Claude API error: {str(e)}")
+    return _local_answer(question)
+
 @api_view(['POST'])
 def ask_planning_question_enhanced(request):
     """
@@ -31,66 +105,53 @@ def ask_planning_question_enhanced(request):
         if not question:
             return Response({'error': 'Question is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Determine if this is a complex question that needs Claude
-        complex_keywords = [
-            'variance', 'conditional use', 'environmental impact', 'statewide goals',
-            'comprehensive plan', 'legal interpretation', 'precedent', 'appeal',
-            'hearing', 'testimony', 'findings', 'conditions of approval'
-        ]
+        return Response(_answer_question(question, context))
+            
+    except Exception as e:
+        logger.error(f"Error in ask_planning_question_enhanced: {str(e)}")
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def ask_planning_question_stream(request):
+    """
+    ask_planning_question_enhanced with Claude's answer streamed as
+    server-sent events to clients sending Accept: text/event-stream
+    (streaming.py): 'meta', 'delta' events with the text as it arrives,
+    then 'done' with the answer. Answers from the local AI or the answer
+    cache are a single 'done' event; other clients get the JSON response.
+    """
+    try:
+        data = request.data
+        question = data.get('question', '')
+        context = data.get('context', {})
         
-        is_complex = any(keyword in question.lower() for keyword in complex_keywords)
+        if not question:
+            return Response({'error': 'Question is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if is_complex:
-            # Use Claude for complex questions
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(
-                    claude_service.ask_complex_question(question, context)
-                )
-                loop.close()
-                
-                if result['success']:
-                    return Response({
-                        'answer': result['answer'],
-                        'source': 'Claude AI',
-                        'model': result['model'],
-                        'context_used': result.get('context_used', False),
-                        'complexity': 'high'
-                    })
-                else:
-                    # Fallback to local AI if Claude fails
-                    assistant = PlanningAssistant()
-                    answer = assistant.get_answer(question)
-                    return Response({
-                        'answer': answer,
-                        'source': 'Local AI (Claude fallback)',
-                        'complexity': 'high',
-                        'note': 'Advanced AI temporarily unavailable, using local knowledge base'
-                    })
-            except Exception as e:
-                logger.error(f"Claude API error: {str(e)}")
-                # Fallback to local AI
-                assistant = PlanningAssistant()
-                answer = assistant.get_answer(question)
-                return Response({
-                    'answer': answer,
-                    'source': 'Local AI (Claude fallback)',
-                    'complexity': 'high',
-                    'note': 'Advanced AI temporarily unavailable, using local knowledge base'
-                })
-        else:
-            # Use local AI for simple questions (faster)
-            assistant = PlanningAssistant()
-            answer = assistant.get_answer(question)
-            return Response({
-                'answer': answer,
-                'source': 'Local AI',
-                'complexity': 'standard'
-            })
+        claude = get_service('claude')
+        if not (wants_event_stream(request) and claude.available and is_complex_question(question)):
+            return Response(_answer_question(question, context))
+        
+        cached = _cached_answer(question, context)
+        if cached:
+            return Response(cached)
+        
+        tier = claude.tier_for('question', question)
+        
+        def done(answer):
+            _store_answer(question, context, answer, tier.model)
+            return {'answer': answer, 'source': 'Claude AI', 'model': tier.model, 'complexity': 'high'}
+        
+        return event_stream_response(stream_events(
+            claude.stream_complex_question(question, context, tier),
+            meta={'source': 'Claude AI', 'model': tier.model, 'tier': tier.name, 'complexity': 'high'},
+            done=done,
+            fallback=lambda: _local_answer(question),
+        ))
             
     except Exception as e:
-        logger.error(f"Error in ask_planning_question_enhanced: {str(e)}")
+        logger.error(f"Error in ask_planning_question_stream: {str(e)}")
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
@@ -110,7 +171,7 @@ def analyze_document(request):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         result = loop.run_until_complete(
-            claude_service.analyze_document(document_text, analysis_type)
+            get_service('claude').analyze_document(document_text, analysis_type)
         )
         loop.close()
         
@@ -131,6 +192,28 @@ def analyze_document(request):
         logger.error(f"Error in analyze_document: {str(e)}")
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def _staff_report_response(application_id):
+    # Use Claude to generate staff report
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    result = loop.run_until_complete(
+        get_service('claude').generate_staff_report(application_id)
+    )
+    loop.close()
+    
+    if result['success']:
+        return Response({
+            'staff_report': result['staff_report'],
+            'application_id': result['application_id'],
+            'model': result['model'],
+            'success': True
+        })
+    else:
+        return Response({
+            'error': result['error'],
+            'success': False
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
 def generate_staff_report(request):
     """
@@ -143,29 +226,46 @@ def generate_staff_report(request):
         if not application_id:
             return Response({'error': 'Application ID is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Use Claude to generate staff report
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(
-            claude_service.generate_staff_report(application_id)
-        )
-        loop.close()
+        return _staff_report_response(application_id)
+            
+    except Exception as e:
+        logger.error(f"Error in generate_staff_report: {str(e)}")
+        return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def generate_staff_report_stream(request):
+    """
+    generate_staff_report streamed as server-sent events to clients sending
+    Accept: text/event-stream: 'meta', 'delta' events with the report as
+    Claude writes it, then 'done' with the report, or 'error' if Claude
+    fails part way. Other clients get the JSON response.
+    """
+    try:
+        data = request.data
+        application_id = data.get('application_id')
         
-        if result['success']:
-            return Response({
-                'staff_report': result['staff_report'],
-                'application_id': result['application_id'],
-                'model': result['model'],
+        if not application_id:
+            return Response({'error': 'Application ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        claude = get_service('claude')
+        if not (wants_event_stream(request) and claude.available):
+            return _staff_report_response(application_id)
+        
+        tier = claude.tier_for('staff_report')
+        return event_stream_response(stream_events(
+            claude.stream_staff_report(application_id, tier),
+            meta={'source': 'Claude AI', 'model': tier.model, 'tier': tier.name, 'application_id': application_id},
+            done=lambda report: {
+                'staff_report': report,
+                'application_id': application_id,
+                'model': tier.model,
                 'success': True
-            })
-        else:
-            return Response({
-                'error': result['error'],
-                'success': False
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            },
+        ))
             
     except Exception as e:
-        logger.error(f"Error in generate_staff_report: {str(e)}")
+        logger.error(f"Error in generate_staff_report_stream: {str(e)}")
         return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
@@ -185,7 +285,7 @@ def check_statewide_goals(request):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         result = loop.run_until_complete(
-            claude_service.check_statewide_goals_compliance(project_description, property_context)
+            get_service('claude').check_statewide_goals_compliance(project_description, property_context)
         )
         loop.close()
         
@@ -214,8 +314,6 @@ def advanced_compliance_check(request):
     Perform advanced compliance checking with multiple levels
     """
     try:
-        from .advanced_compliance import advanced_compliance_engine
-        
         data = request.data
         property_id = data.get('property_id')
         permit_type_id = data.get('permit_type_id')
@@ -232,7 +330,7 @@ def advanced_compliance_check(request):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             result = loop.run_until_complete(
-                advanced_compliance_engine.comprehensive_compliance_check(
+                get_service('advanced_compliance').comprehensive_compliance_check(
                     property_id, permit_type_id, project_details, compliance_level
                 )
             )
@@ -269,8 +367,6 @@ def analyze_planning_document(request):
     Analyze uploaded planning documents with Claude and MCP integration
     """
     try:
-        from .document_analyzer import document_analyzer
-        
         if 'document' not in request.FILES:
             return Response({
                 'error': 'Document file is required'
@@ -285,7 +381,7 @@ def analyze_planning_document(request):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             result = loop.run_until_complete(
-                document_analyzer.analyze_planning_document(
+                get_service('document_analyzer').analyze_planning_document(
                     document_file, analysis_type, property_context
                 )
             )
@@ -313,8 +409,6 @@ def analyze_site_plan(request):
     Specialized analysis for site plans and architectural drawings
     """
     try:
-        from .document_analyzer import document_analyzer
-        
         if 'plan_file' not in request.FILES:
             return Response({
                 'error': 'Plan file is required'
@@ -328,7 +422,7 @@ def analyze_site_plan(request):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             result = loop.run_until_complete(
-                document_analyzer.analyze_site_plan(plan_file, property_context)
+                get_service('document_analyzer').analyze_site_plan(plan_file, property_context)
             )
             loop.close()
             
@@ -354,9 +448,7 @@ def mcp_health_check(request):
     Check MCP server health and connectivity
     """
     try:
-        from .mcp_integration import mcp_service
-        
-        health_result = mcp_service.check_server_health()
+        health_result = get_service('mcp').check_server_health()
         
         return Response({
             'success': True,
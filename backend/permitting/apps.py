@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PermittingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'permitting'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals
+        from .instrumentation import connection_opened
+        connection_created.connect(connection_opened)
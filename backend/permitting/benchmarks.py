@@ -0,0 +1,216 @@
+"""
+Benchmark Suite for CiviAI
+Times the key request paths end to end on a synthetic city (synthetic.py),
+with Claude and the MCP server replaced by stubs (stubs.py) of configurable
+latency
+"""
+
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory
+
+from . import api_views, api_views_enhanced, views
+from .instrumentation import collect
+from .synthetic import GeneratedCity, document_text, project_description, project_details, STREETS
+
+REPORT_VERSION = 1
+
+
+class Benchmark(NamedTuple):
+    name: str
+    description: str
+    view: Callable
+    build_request: Callable[[random.Random], object]
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class BenchmarkSuite:
+    """
+    The benchmarks over one generated city. Views are called directly with
+    RequestFactory requests, so the timings cover the view, serialization
+    and rendering but not the middleware.
+    """
+
+    def __init__(self, city: GeneratedCity, seed: int = 42, document_words: int = 1500):
+        self.city = city
+        self.seed = seed
+        self.document_words = document_words
+        self.factory = RequestFactory()
+
+    def _post(self, path, data):
+        return self.factory.post(path, json.dumps(data), content_type='application/json')
+
+    def _compliance(self, level):
+        def build(rng):
+            return self._post('/api/compliance/advanced/', {
+                'property_id': rng.choice(self.city.property_ids),
+                'permit_type_id': rng.choice(self.city.permit_type_ids),
+                'project_details': project_details(rng),
+                'compliance_level': level,
+            })
+        return build
+
+    def benchmarks(self) -> List[Benchmark]:
+        city = self.city
+        return [
+            Benchmark(
+                'property_search', 'Parcel search by street name or house number',
+                api_views.search_properties,
+                lambda rng: self.factory.get('/api/properties/search/', {
+                    'q': rng.choice([rng.choice(STREETS).split()[0], f'{rng.randint(1, 9999)} ']).strip(),
+                }),
+            ),
+            Benchmark(
+                'application_list', 'First page of the application list',
+                api_views.list_applications,
+                lambda rng: self.factory.get('/api/applications/'),
+            ),
+            Benchmark(
+                'fee_calculation', 'Fee quote for one project',
+                api_views.calculate_fees,
+                lambda rng: self._post('/api/fees/calculate/', {
+                    'permit_type_id': rng.choice(city.permit_type_ids),
+                    'project_details': project_details(rng),
+                }),
+            ),
+            Benchmark(
+                'fee_batch', 'Fee quotes for 1000 scenarios in one request',
+                api_views.calculate_fees_batch,
+                lambda rng: self._post('/api/fees/batch/', {
+                    'scenarios': [{
+                        'permit_type_id': rng.choice(city.permit_type_ids),
+                        'square_footage': rng.randint(80, 4000),
+                        'project_value': rng.randint(2000, 900000),
+                    } for _ in range(1000)],
+                    'estimate': 'development',
+                }),
+            ),
+            Benchmark(
+                'compliance_basic', 'Zoning compliance check',
+                api_views_enhanced.advanced_compliance_check, self._compliance('BASIC'),
+            ),
+            Benchmark(
+                'compliance_standard', 'Zoning and local code compliance check',
+                api_views_enhanced.advanced_compliance_check, self._compliance('STANDARD'),
+            ),
+            Benchmark(
+                'compliance_comprehensive', 'Zoning, local code and statewide goal (MCP) compliance check',
+                api_views_enhanced.advanced_compliance_check, self._compliance('COMPREHENSIVE'),
+            ),
+            Benchmark(
+                'compliance_expert', 'Comprehensive compliance check plus the Claude expert review',
+                api_views_enhanced.advanced_compliance_check, self._compliance('EXPERT'),
+            ),
+            Benchmark(
+                'dashboard_stats', 'City manager dashboard statistics',
+                views.dashboard_stats_api,
+                lambda rng: self.factory.get('/api/dashboard/stats/'),
+            ),
+            Benchmark(
+                'document_analysis', f'Analysis of an uploaded ~{self.document_words} word document',
+                api_views_enhanced.analyze_planning_document,
+                lambda rng: self.factory.post('/api/documents/analyze/', {
+                    'document': SimpleUploadedFile(
+                        'application.txt', document_text(rng, self.document_words).encode(), 'text/plain',
+                    ),
+                    'analysis_type': 'comprehensive',
+                    'property_context': json.dumps({'zoning': 'R1', 'project': project_description(rng)}),
+                }),
+            ),
+        ]
+
+    def run(self, names: Optional[Iterable[str]] = None, iterations: int = 20, warmup: int = 2,
+            progress: Optional[Callable[[str, dict], None]] = None) -> Dict[str, dict]:
+        benchmarks = self.benchmarks()
+        if names:
+            names = set(names)
+            unknown = names - {benchmark.name for benchmark in benchmarks}
+            if unknown:
+                raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+            benchmarks = [benchmark for benchmark in benchmarks if benchmark.name in names]
+
+        results = {}
+        for benchmark in benchmarks:
+            results[benchmark.name] = self._run_one(benchmark, iterations, warmup)
+            if progress:
+                progress(benchmark.name, results[benchmark.name])
+        return results
+
+    def _run_one(self, benchmark: Benchmark, iterations: int, warmup: int) -> dict:
+        # The same inputs on every run with the same seed
+        rng = random.Random(f'{self.seed}:{benchmark.name}')
+        timings, samples, errors = [], [], 0
+
+        for iteration in range(warmup + iterations):
+            request = benchmark.build_request(rng)
+            with collect() as metrics:
+                started = time.perf_counter()
+                response = benchmark.view(request)
+                if hasattr(response, 'render'):
+                    response.render()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            if iteration < warmup:
+                continue
+            timings.append(elapsed_ms)
+            samples.append(metrics.stages)
+            if response.status_code >= 400:
+                errors += 1
+
+        # Iterations that skipped a stage count as zero for it
+        stages = {}
+        for stage in sorted({stage for sample in samples for stage in sample}):
+            totals = [sample.get(stage, (0.0, 0)) for sample in samples]
+            stages[stage] = {
+                'median_ms': round(statistics.median(elapsed_ms for elapsed_ms, _ in totals), 2),
+                'median_calls': statistics.median(calls for _, calls in totals),
+            }
+
+        return {
+            'description': benchmark.description,
+            'iterations': iterations,
+            'errors': errors,
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(_percentile(timings, 0.95), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'min_ms': round(min(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'stages': stages,
+        }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> dict:
+    """What a report was measured on, so reports can be compared"""
+    return {
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': f'{connection.vendor} {connection.Database.sqlite_version}'
+                    if connection.vendor == 'sqlite' else connection.vendor,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
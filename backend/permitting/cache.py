@@ -0,0 +1,417 @@
+"""
+Shared Cache Layer for CiviAI
+SQLite-backed shared cache, two-tier (in-process L1 + shared L2) cache and
+namespace versioning for atomic invalidation of related cache entries
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import CACHE_REQUESTS
+
+# Cache namespaces invalidated as a whole when their source data changes
+ZONING_RULES = 'zoning_rules'
+GOALS = 'goals'
+PERMIT_TYPES = 'permit_types'
+ANSWERED_QUESTIONS = 'answered_questions'
+# Bumped to make every process rebuild its services (services.py)
+SERVICES = 'services'
+NAMESPACES = (ZONING_RULES, GOALS, PERMIT_TYPES, ANSWERED_QUESTIONS, SERVICES)
+
+_MISSING = object()
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache shared by every worker process on a host, stored in one SQLite
+    file (LOCATION). Honors MAX_ENTRIES and CULL_FREQUENCY like Django's
+    database cache, without needing the createcachetable step.
+    """
+
+    table = 'cache_entries'
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        self._local = threading.local()
+
+    def _connection(self):
+        """
+        Per-thread connection, reopened after a fork
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} '
+            f'(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+        )
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_expires ON {self.table} (expires)')
+
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _is_live(self, expires):
+        return expires is None or expires > time.time()
+
+    def _write(self, mode, key, value, timeout, version):
+        key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        connection = self._connection()
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if mode == 'add':
+                row = connection.execute(f'SELECT expires FROM {self.table} WHERE key = ?', (key,)).fetchone()
+                if row is not None and self._is_live(row[0]):
+                    connection.execute('COMMIT')
+                    return False
+            elif mode == 'touch':
+                updated = connection.execute(
+                    f'UPDATE {self.table} SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                    (expires, key, time.time())
+                ).rowcount
+                connection.execute('COMMIT')
+                return bool(updated)
+
+            self._cull(connection)
+            connection.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)',
+                (key, payload, expires)
+            )
+            connection.execute('COMMIT')
+            return True
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _cull(self, connection):
+        """
+        Make room for one more entry: drop expired entries first, then the
+        soonest-expiring 1/CULL_FREQUENCY of the rest
+        """
+        count = connection.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        if count < self._max_entries:
+            return
+
+        connection.execute(f'DELETE FROM {self.table} WHERE expires <= ?', (time.time(),))
+        count = connection.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        if count < self._max_entries:
+            return
+
+        if self._cull_frequency == 0:
+            connection.execute(f'DELETE FROM {self.table}')
+            return
+
+        connection.execute(
+            f'DELETE FROM {self.table} WHERE key IN '
+            f'(SELECT key FROM {self.table} ORDER BY expires IS NULL, expires LIMIT ?)',
+            (max(count // self._cull_frequency, 1),)
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write('add', key, value, timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write('set', key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write('touch', key, None, timeout, version)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            f'SELECT value, expires FROM {self.table} WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or not self._is_live(row[1]):
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+
+        placeholders = ', '.join('?' * len(key_map))
+        rows = self._connection().execute(
+            f'SELECT key, value, expires FROM {self.table} WHERE key IN ({placeholders})',
+            list(key_map)
+        ).fetchall()
+        return {
+            key_map[key]: pickle.loads(value)
+            for key, value, expires in rows
+            if self._is_live(expires)
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._cull(connection)
+            connection.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)', rows
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return []
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Atomic across processes: read and write happen in one write transaction
+        """
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                f'SELECT value, expires FROM {self.table} WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or not self._is_live(row[1]):
+                raise ValueError("Key '%s' not found" % key)
+
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                f'UPDATE {self.table} SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+            connection.execute('COMMIT')
+            return value
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._connection().execute(f'DELETE FROM {self.table} WHERE key = ?', (key,)).rowcount)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(f'SELECT expires FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        return row is not None and self._is_live(row[0])
+
+    def clear(self):
+        self._connection().execute(f'DELETE FROM {self.table}')
+
+    def close(self, **kwargs):
+        # Connections are kept open across requests on purpose
+        pass
+
+
+class TieredCache(BaseCache):
+    """
+    In-process L1 cache in front of a shared L2 cache. Reads are served
+    from L1 when possible; L1 entries live at most L1_TIMEOUT seconds, which
+    bounds how stale a worker can be after another worker writes to L2.
+
+    OPTIONS: L1 and L2 are cache aliases, L1_TIMEOUT is in seconds.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l1_alias = options.get('L1', 'local')
+        self._l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+
+    @property
+    def local(self):
+        return caches[self._l1_alias]
+
+    @property
+    def shared(self):
+        return caches[self._l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            CACHE_REQUESTS.labels('tiered', 'l1_hit').inc()
+            return value
+
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            CACHE_REQUESTS.labels('tiered', 'miss').inc()
+            return default
+
+        CACHE_REQUESTS.labels('tiered', 'l2_hit').inc()
+        self.local.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self.local.get_many(keys, version=version)
+        CACHE_REQUESTS.labels('tiered', 'l1_hit').inc(len(found))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_shared = self.shared.get_many(missing, version=version)
+            CACHE_REQUESTS.labels('tiered', 'l2_hit').inc(len(from_shared))
+            CACHE_REQUESTS.labels('tiered', 'miss').inc(len(missing) - len(from_shared))
+            if from_shared:
+                self.local.set_many(from_shared, self.l1_timeout, version=version)
+            found.update(from_shared)
+        return found
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.local.set(key, value, self._l1_timeout(timeout), version=version)
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self._l1_timeout(timeout), version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        failed = self.shared.set_many(data, timeout, version=version)
+        self.local.set_many(data, self._l1_timeout(timeout), version=version)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.local.delete(key, version=version)
+        return value
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.local.has_key(key, version=version) or self.shared.has_key(key, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+def _version_cache(cache_alias):
+    """
+    Namespace versions always live in the shared tier so a bump is seen by
+    every worker immediately
+    """
+    cache = caches[cache_alias]
+    return getattr(cache, 'shared', cache)
+
+
+def _version_key(namespace):
+    return f'ns-version:{namespace}'
+
+
+def _initial_version():
+    return time.time_ns() // 1000
+
+
+def namespace_version(namespace, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Current version of a cache namespace
+    """
+    version_cache = _version_cache(cache_alias)
+    version = version_cache.get(_version_key(namespace))
+    if version is None:
+        # Seeded from the clock so a version key lost to culling or a clear
+        # never comes back at a value older entries were written under
+        version_cache.add(_version_key(namespace), _initial_version(), None)
+        version = version_cache.get(_version_key(namespace))
+    return version
+
+
+def namespaced_key(namespace, key, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Cache key scoped to the current version of a namespace
+    """
+    return f'{namespace}:v{namespace_version(namespace, cache_alias)}:{key}'
+
+
+def get_namespaced(namespace, key, default=None, cache_alias=DEFAULT_CACHE_ALIAS):
+    return caches[cache_alias].get(namespaced_key(namespace, key, cache_alias), default)
+
+
+def set_namespaced(namespace, key, value, timeout=DEFAULT_TIMEOUT, cache_alias=DEFAULT_CACHE_ALIAS):
+    caches[cache_alias].set(namespaced_key(namespace, key, cache_alias), value, timeout)
+
+
+def get_or_set_namespaced(namespace, key, default, timeout=DEFAULT_TIMEOUT, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Get a namespaced value, computing and storing it with default() on a miss
+    """
+    cache_key = namespaced_key(namespace, key, cache_alias)
+    value = caches[cache_alias].get(cache_key, _MISSING)
+    if value is _MISSING:
+        value = default()
+        caches[cache_alias].set(cache_key, value, timeout)
+    return value
+
+
+def invalidate_namespaces(*namespaces, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Invalidate every entry of the given namespaces at once by bumping their
+    versions; stale entries are never read again and age out via culling
+    """
+    version_cache = _version_cache(cache_alias)
+    for namespace in namespaces:
+        try:
+            version_cache.incr(_version_key(namespace))
+        except ValueError:
+            version_cache.add(_version_key(namespace), _initial_version(), None)
+
+
+def zoning_rules_for_district(zoning_district):
+    """
+    Active zoning rules for a district, cached until zoning rules change
+    """
+    from .models import ZoningRule
+
+    return get_or_set_namespaced(
+        ZONING_RULES,
+        zoning_district,
+        lambda: list(ZoningRule.objects.filter(zoning_district=zoning_district, is_active=True)),
+        getattr(settings, 'ZONING_RULES_CACHE_SECONDS', 3600)
+    )
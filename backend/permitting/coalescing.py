@@ -0,0 +1,213 @@
+"""
+Request Coalescing for CiviAI
+Identical Claude and MCP calls made at the same time, e.g. by several staff
+opening the same application, share one round-trip: within a worker through
+a map of in-flight futures, across workers through the InFlightCall lock
+table. The result is then kept briefly for callers arriving just after.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from .metrics import COALESCED_CALLS
+from .models import InFlightCall
+
+logger = logging.getLogger(__name__)
+
+# Results are reused this long after their call finishes
+DEFAULT_RESULT_SECONDS = 30
+# A lock older than this is taken over: its worker died or hung. Longer than
+# the slowest Claude call.
+DEFAULT_LOCK_SECONDS = 120
+# Workers waiting on another worker's call poll for its result, backing off
+# from the first to the second interval
+POLL_SECONDS = (0.05, 0.5)
+
+_MISSING = object()
+
+
+def _owner() -> str:
+    # Evaluated per call: gunicorn forks workers after this module is imported
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+class Coalescer:
+    """
+    Single-flight for the calls of one service:
+
+        key = coalescer.key('/mcp/check-compliance', payload)
+        result = coalescer.call(key, lambda: post(payload))
+        response = await coalescer.acall(key, lambda: send(prompt))
+
+    The first caller of a key makes the call. Callers in the same worker
+    that arrive while it runs get its result, or its exception; callers in
+    other workers find its lock and wait for the result to appear in the
+    cache, making the call themselves if it never does (the call failed, or
+    the cache is per-process as in development). Results for which
+    ``cacheable`` holds are cached for ``result_seconds``, so callers get
+    shared objects: treat results as read-only.
+    """
+
+    def __init__(self, service: str, result_seconds: Optional[int] = None, lock_seconds: Optional[int] = None):
+        self.service = service
+        self.result_seconds = result_seconds if result_seconds is not None else \
+            getattr(settings, 'COALESCE_RESULT_SECONDS', DEFAULT_RESULT_SECONDS)
+        self.lock_seconds = lock_seconds if lock_seconds is not None else \
+            getattr(settings, 'COALESCE_LOCK_SECONDS', DEFAULT_LOCK_SECONDS)
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def key(self, *parts) -> str:
+        """Key of a call: a hash of the service and the call's arguments"""
+        encoded = json.dumps([self.service, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def call(self, key: str, fn: Callable[[], Any], cacheable: Optional[Callable[[Any], bool]] = None):
+        result = self._cached(key)
+        if result is not _MISSING:
+            return result
+
+        future, leader = self._join(key)
+        if not leader:
+            COALESCED_CALLS.labels(self.service, 'in_process').inc()
+            return future.result()
+
+        try:
+            locked = self._acquire(key)
+            try:
+                result = self._wait_for_other_worker(key) if not locked else _MISSING
+                if result is _MISSING:
+                    result = self._store(key, fn(), cacheable)
+            finally:
+                if locked:
+                    self._release(key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._leave(key)
+
+    async def acall(self, key: str, fn: Callable[[], Any], cacheable: Optional[Callable[[Any], bool]] = None):
+        """call() for a coroutine function; waits without blocking the event loop"""
+        result = await asyncio.to_thread(self._cached, key)
+        if result is not _MISSING:
+            return result
+
+        future, leader = self._join(key)
+        if not leader:
+            COALESCED_CALLS.labels(self.service, 'in_process').inc()
+            # The leader may be on another thread's event loop. Shielded: a
+            # cancelled waiter would otherwise cancel the shared future.
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            locked = await asyncio.to_thread(self._acquire, key)
+            try:
+                result = await asyncio.to_thread(self._wait_for_other_worker, key) if not locked else _MISSING
+                if result is _MISSING:
+                    result = await fn()
+                    await asyncio.to_thread(self._store, key, result, cacheable)
+            finally:
+                if locked:
+                    await asyncio.to_thread(self._release, key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._leave(key)
+
+    def _cache_key(self, key: str) -> str:
+        return f'coalesce:{self.service}:{key}'
+
+    def _cached(self, key: str):
+        result = cache.get(self._cache_key(key), _MISSING)
+        if result is not _MISSING:
+            COALESCED_CALLS.labels(self.service, 'cached').inc()
+        return result
+
+    def _store(self, key: str, result, cacheable):
+        if self.result_seconds and (cacheable is None or cacheable(result)):
+            cache.set(self._cache_key(key), result, self.result_seconds)
+        return result
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """The future of the call in flight for ``key``, and whether this caller is to make it"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def _leave(self, key: str):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _acquire(self, key: str) -> bool:
+        """
+        Take the cross-worker lock of ``key``; False when another worker
+        holds it. Calls go ahead uncoordinated if the lock table fails.
+        """
+        now = timezone.now()
+        try:
+            # Expired locks, of this key or left behind by dead workers
+            InFlightCall.objects.filter(expires_at__lte=now).delete()
+            with transaction.atomic():
+                InFlightCall.objects.create(
+                    key=key, owner=_owner(), expires_at=now + timedelta(seconds=self.lock_seconds),
+                )
+            return True
+        except IntegrityError:
+            return False
+        except DatabaseError as e:
+            logger.error(f"Could not take the {self.service} call lock: {str(e)}")
+            return True
+
+    def _release(self, key: str):
+        try:
+            InFlightCall.objects.filter(key=key, owner=_owner()).delete()
+        except DatabaseError as e:
+            logger.error(f"Could not release the {self.service} call lock: {str(e)}")
+
+    def _wait_for_other_worker(self, key: str):
+        """The result of another worker's call of ``key``, or _MISSING once its lock is gone without one"""
+        delay, max_delay = POLL_SECONDS
+        deadline = time.monotonic() + self.lock_seconds
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+            result = cache.get(self._cache_key(key), _MISSING)
+            if result is not _MISSING:
+                COALESCED_CALLS.labels(self.service, 'other_worker').inc()
+                return result
+            try:
+                locked = InFlightCall.objects.filter(key=key, expires_at__gt=timezone.now()).exists()
+            except DatabaseError:
+                locked = False
+            if not locked:
+                # Stored just before the lock was released, or not at all
+                result = cache.get(self._cache_key(key), _MISSING)
+                if result is not _MISSING:
+                    COALESCED_CALLS.labels(self.service, 'other_worker').inc()
+                return result
+        return _MISSING
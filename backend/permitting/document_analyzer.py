@@ -8,9 +8,8 @@ import asyncio
 import logging
 from typing import Dict, List, Optional, Any, Union
 from django.core.files.uploadedfile import UploadedFile
-from .claude_service import claude_service
-from .mcp_integration import mcp_service
-import PyPDF2
+from .instrumentation import span
+from .services import get_service
 import io
 import json
 
@@ -22,6 +21,8 @@ class DocumentAnalyzer:
     """
     
     def __init__(self):
+        self.claude_service = get_service('claude')
+        self.mcp_service = get_service('mcp')
         self.supported_formats = ['.pdf', '.txt', '.doc', '.docx']
         self.max_file_size = 10 * 1024 * 1024  # 10MB
     
@@ -54,7 +55,7 @@ class DocumentAnalyzer:
             
             if analysis_type in ['comprehensive', 'general']:
                 # General document analysis with Claude
-                claude_analysis = await claude_service.analyze_document(document_text, 'general')
+                claude_analysis = await self.claude_service.analyze_document(document_text, 'general')
                 analysis_results['general_analysis'] = claude_analysis
             
             if analysis_type in ['comprehensive', 'compliance']:
@@ -69,12 +70,12 @@ class DocumentAnalyzer:
             
             if analysis_type in ['comprehensive', 'environmental']:
                 # Environmental analysis
-                environmental_analysis = await claude_service.analyze_document(document_text, 'environmental')
+                environmental_analysis = await self.claude_service.analyze_document(document_text, 'environmental')
                 analysis_results['environmental_analysis'] = environmental_analysis
             
             if analysis_type in ['comprehensive', 'zoning']:
                 # Zoning analysis
-                zoning_analysis = await claude_service.analyze_document(document_text, 'zoning')
+                zoning_analysis = await self.claude_service.analyze_document(document_text, 'zoning')
                 analysis_results['zoning_analysis'] = zoning_analysis
             
             # Generate summary and recommendations
@@ -131,7 +132,7 @@ class DocumentAnalyzer:
             8. Recommendations for Approval
             """
             
-            claude_analysis = await claude_service.ask_complex_question(site_plan_prompt)
+            claude_analysis = await self.claude_service.ask_complex_question(site_plan_prompt)
             
             # Check against local zoning requirements
             local_compliance = await self._analyze_local_compliance(plan_text, property_context)
@@ -190,7 +191,7 @@ class DocumentAnalyzer:
             10. Suggested Motion for Planning Commission
             """
             
-            staff_report = await claude_service.ask_complex_question(staff_report_prompt)
+            staff_report = await self.claude_service.ask_complex_question(staff_report_prompt)
             
             return {
                 'success': True,
@@ -238,11 +239,13 @@ class DocumentAnalyzer:
         Extract text from PDF file
         """
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file.read()))
-            text = ""
-            
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            import PyPDF2  # only needed for PDF uploads
+            with span('pdf'):
+                pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file.read()))
+                text = ""
+                
+                for page in pdf_reader.pages:
+                    text += page.extract_text() + "\n"
             
             return text
         except Exception as e:
@@ -288,7 +291,7 @@ class DocumentAnalyzer:
             Provide specific findings and recommendations.
             """
             
-            result = await claude_service.ask_complex_question(local_prompt)
+            result = await self.claude_service.ask_complex_question(local_prompt)
             return {
                 'success': True,
                 'analysis': result.get('answer', '') if result['success'] else 'Analysis unavailable',
@@ -311,7 +314,7 @@ class DocumentAnalyzer:
                 property_context = {}
             
             # Use MCP service for statewide compliance
-            mcp_result = mcp_service.check_statewide_compliance(document_text, property_context)
+            mcp_result = await asyncio.to_thread(self.mcp_service.check_statewide_compliance, document_text, property_context)
             
             if mcp_result['success']:
                 return {
@@ -330,7 +333,7 @@ class DocumentAnalyzer:
                 Check compliance with applicable Oregon Statewide Planning Goals and provide detailed findings.
                 """
                 
-                claude_result = await claude_service.ask_complex_question(statewide_prompt)
+                claude_result = await self.claude_service.ask_complex_question(statewide_prompt)
                 return {
                     'success': True,
                     'analysis': claude_result.get('answer', '') if claude_result['success'] else 'Analysis unavailable',
@@ -362,7 +365,7 @@ class DocumentAnalyzer:
             4. Overall Assessment
             """
             
-            summary_result = await claude_service.ask_complex_question(summary_prompt)
+            summary_result = await self.claude_service.ask_complex_question(summary_prompt)
             
             return {
                 'success': True,
@@ -430,6 +433,9 @@ class DocumentAnalyzer:
         
         return recommendations
 
-# Global instance
-document_analyzer = DocumentAnalyzer()
-
+# Global instance, built on first use by the service registry (services.py)
+def __getattr__(name):
+    if name == 'document_analyzer':
+        from .services import get_service
+        return get_service('document_analyzer')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,178 @@
+"""
+Streaming Exporters for CiviAI
+Constant-memory CSV / NDJSON dumps of permit applications and compliance
+results for audits and DLCD reporting
+"""
+
+import csv
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import PermitApplication, ComplianceCheck
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+
+# (column header, ORM lookup) per dataset. Rows are fetched as tuples with
+# values_list() so no model instances or serializers are built.
+DATASETS = {
+    'applications': {
+        'model': PermitApplication,
+        'filter_prefix': '',
+        'order_by': ('created_at', 'id'),
+        'columns': (
+            ('application_id', 'application_id'),
+            ('status', 'status'),
+            ('property_address', 'property__address'),
+            ('tax_lot_number', 'property__tax_lot_number'),
+            ('zoning', 'property__zoning'),
+            ('permit_type', 'permit_type__code'),
+            ('applicant_name', 'applicant_name'),
+            ('applicant_email', 'applicant_email'),
+            ('project_description', 'project_description'),
+            ('project_value', 'project_value'),
+            ('square_footage', 'square_footage'),
+            ('calculated_fee', 'calculated_fee'),
+            ('fee_paid', 'fee_paid'),
+            ('compliance_check_passed', 'compliance_check_passed'),
+            ('compliance_issues', 'compliance_issues'),
+            ('submitted_at', 'submitted_at'),
+            ('review_completed_at', 'review_completed_at'),
+            ('created_at', 'created_at'),
+        ),
+    },
+    'compliance_checks': {
+        'model': ComplianceCheck,
+        'filter_prefix': 'application__',
+        'order_by': ('application__created_at', 'application_id', 'id'),
+        'columns': (
+            ('application_id', 'application__application_id'),
+            ('application_status', 'application__status'),
+            ('property_address', 'application__property__address'),
+            ('zoning_district', 'rule_checked__zoning_district'),
+            ('rule_type', 'rule_checked__rule_type'),
+            ('rule_description', 'rule_checked__rule_description'),
+            ('result', 'result'),
+            ('details', 'details'),
+            ('suggested_action', 'suggested_action'),
+            ('checked_at', 'checked_at'),
+        ),
+    },
+}
+
+
+def _parse_date_param(value, name):
+    """Parse an ISO date or datetime filter value into an aware datetime"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is None:
+            raise ValueError(f"{name} must be an ISO date or datetime")
+        parsed = datetime.combine(parsed_date, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_applications(queryset, params, prefix=''):
+    """
+    Apply the status / created date range filters shared by the applications
+    API and exports. ``prefix`` reaches the application through a relation
+    (e.g. 'application__' for compliance checks). Raises ValueError.
+    """
+    status_filter = params.get('status')
+    if status_filter:
+        if status_filter not in dict(PermitApplication.STATUS_CHOICES):
+            raise ValueError(f"Unknown status: {status_filter}")
+        queryset = queryset.filter(**{f'{prefix}status': status_filter})
+
+    if params.get('created_after'):
+        created_after = _parse_date_param(params['created_after'], 'created_after')
+        queryset = queryset.filter(**{f'{prefix}created_at__gte': created_after})
+    if params.get('created_before'):
+        created_before = _parse_date_param(params['created_before'], 'created_before')
+        queryset = queryset.filter(**{f'{prefix}created_at__lt': created_before})
+
+    return queryset
+
+
+def _encode(value):
+    """Plain JSON-compatible value for one exported cell"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (date, Decimal, UUID)):
+        return str(value)
+    return value  # JSONField contents are already lists/dicts
+
+
+def _csv_cell(value):
+    value = _encode(value)
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(dataset, params=None, chunk_size=CHUNK_SIZE):
+    """
+    (headers, row tuple iterator) for a dataset. Rows are streamed from the
+    database with .iterator(chunk_size), so memory stays flat.
+    """
+    spec = DATASETS[dataset]
+    queryset = filter_applications(spec['model'].objects.all(), params or {}, spec['filter_prefix'])
+    headers = [header for header, _ in spec['columns']]
+    lookups = [lookup for _, lookup in spec['columns']]
+
+    rows = queryset.order_by(*spec['order_by']).values_list(*lookups).iterator(chunk_size=chunk_size)
+    return headers, rows
+
+
+def stream_export(dataset, export_format, params=None, chunk_size=CHUNK_SIZE):
+    """
+    Generator of text chunks (about chunk_size rows each) in CSV or NDJSON.
+    Filters are validated before the first chunk is produced.
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    headers, rows = export_rows(dataset, params, chunk_size)
+    return _csv_chunks(headers, rows, chunk_size) if export_format == 'csv' else _ndjson_chunks(headers, rows, chunk_size)
+
+
+def _csv_chunks(headers, rows, chunk_size):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow([_csv_cell(value) for value in row]))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _ndjson_chunks(headers, rows, chunk_size):
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(dict(zip(headers, map(_encode, row))), ensure_ascii=False) + '\n')
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,197 @@
+"""
+Fast Read-Only Serializers for CiviAI
+values()-based serialization producing the same JSON as the DRF
+serializers in serializers.py, without per-object field introspection
+"""
+
+import decimal
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from .models import Property, PermitType, PermitApplication, ApplicationDocument, ComplianceCheck
+from .serializers import (
+    PropertySerializer, PermitTypeSerializer, ApplicationDocumentSerializer,
+    ComplianceCheckSerializer, PermitApplicationSerializer
+)
+
+
+def _decimal_converter(model_field):
+    """Matches DRF DecimalField(coerce_to_string=True) output"""
+    quantum = decimal.Decimal('.1') ** model_field.decimal_places
+    context = decimal.Context(prec=model_field.max_digits)
+
+    def convert(value):
+        if value is None:
+            return None
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(value.quantize(quantum, context=context))
+    return convert
+
+
+def _format_datetime(value, tz):
+    """Matches DRF DateTimeField ISO 8601 output in the current time zone"""
+    if value is None:
+        return None
+    if tz is not None and timezone.is_aware(value):
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _output_timezone():
+    """Resolved once per serialize call rather than per value"""
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def _uuid_converter(model_field):
+    return lambda value: None if value is None else str(value)
+
+
+def _converter_for(model_field):
+    if isinstance(model_field, models.DecimalField):
+        return _decimal_converter(model_field)
+    if isinstance(model_field, models.DateTimeField):
+        return _format_datetime
+    if isinstance(model_field, models.UUIDField):
+        return _uuid_converter(model_field)
+    return None
+
+
+def _display_converter(model_field):
+    choices = dict(model_field.flatchoices)
+    return lambda value: choices.get(value, value)
+
+
+class _Projection:
+    """
+    Precomputed (output key, values() lookup, converter) triples for one
+    serializer, built once from its Meta.fields and the model fields.
+    ``extra`` maps output keys that are not plain model fields to
+    (lookup, converter).
+    """
+
+    def __init__(self, model, fields, extra=None, prefix=''):
+        extra = extra or {}
+        self.columns = []
+        self.datetime_columns = []
+        for name in fields:
+            if name in extra:
+                lookup, converter = extra[name]
+            else:
+                lookup, converter = name, _converter_for(model._meta.get_field(name))
+            if converter is _format_datetime:
+                self.datetime_columns.append((name, prefix + lookup))
+                converter = None
+            self.columns.append((name, prefix + lookup, converter))
+        self.lookups = list(dict.fromkeys(lookup for _, lookup, _ in self.columns))
+
+    def build(self, row, tz):
+        data = {
+            name: converter(row[lookup]) if converter else row[lookup]
+            for name, lookup, converter in self.columns
+        }
+        for name, lookup in self.datetime_columns:
+            data[name] = _format_datetime(row[lookup], tz)
+        return data
+
+
+def _property_projection(prefix=''):
+    return _Projection(Property, PropertySerializer.Meta.fields, {
+        'zoning_display': ('zoning', _display_converter(Property._meta.get_field('zoning'))),
+    }, prefix)
+
+
+def _permit_type_projection(prefix=''):
+    return _Projection(PermitType, PermitTypeSerializer.Meta.fields, prefix=prefix)
+
+
+PROPERTY = _property_projection()
+
+DOCUMENT = _Projection(ApplicationDocument, ApplicationDocumentSerializer.Meta.fields, {
+    'document_type_display': ('document_type', _display_converter(ApplicationDocument._meta.get_field('document_type'))),
+    'file_size_mb': ('file_size', lambda size: round(size / (1024 * 1024), 2)),
+})
+
+COMPLIANCE_CHECK = _Projection(ComplianceCheck, ComplianceCheckSerializer.Meta.fields, {
+    'rule_type': ('rule_checked__rule_type', None),
+    'rule_description': ('rule_checked__rule_description', None),
+    'result_display': ('result', _display_converter(ComplianceCheck._meta.get_field('result'))),
+})
+
+_NESTED_APPLICATION_FIELDS = ('property', 'permit_type', 'documents', 'compliance_checks')
+
+APPLICATION = _Projection(
+    PermitApplication,
+    [name for name in PermitApplicationSerializer.Meta.fields if name not in _NESTED_APPLICATION_FIELDS],
+    {
+        'application_id_short': ('application_id', lambda value: str(value)[:8]),
+        'status_display': ('status', _display_converter(PermitApplication._meta.get_field('status'))),
+    }
+)
+APPLICATION_PROPERTY = _property_projection('property__')
+APPLICATION_PERMIT_TYPE = _permit_type_projection('permit_type__')
+
+
+def serialize_properties(queryset):
+    """Same output as PropertySerializer(queryset, many=True).data"""
+    tz = _output_timezone()
+    return [PROPERTY.build(row, tz) for row in queryset.values(*PROPERTY.lookups)]
+
+
+def serialize_compliance_checks(queryset):
+    """Same output as ComplianceCheckSerializer(queryset, many=True).data"""
+    tz = _output_timezone()
+    return [COMPLIANCE_CHECK.build(row, tz) for row in queryset.values(*COMPLIANCE_CHECK.lookups)]
+
+
+def serialize_applications(queryset):
+    """
+    Same output as PermitApplicationSerializer(queryset, many=True).data in
+    four queries: applications joined to property and permit type, then
+    documents and compliance checks for the whole page
+    """
+    lookups = ['id'] + APPLICATION.lookups + APPLICATION_PROPERTY.lookups + APPLICATION_PERMIT_TYPE.lookups
+    rows = list(queryset.values(*dict.fromkeys(lookups)))
+    if not rows:
+        return []
+
+    application_ids = [row['id'] for row in rows]
+    tz = _output_timezone()
+
+    documents = defaultdict(list)
+    document_rows = (
+        ApplicationDocument.objects.filter(application_id__in=application_ids)
+        .order_by('id').values('application_id', *DOCUMENT.lookups)
+    )
+    for row in document_rows:
+        documents[row['application_id']].append(DOCUMENT.build(row, tz))
+
+    checks = defaultdict(list)
+    check_rows = (
+        ComplianceCheck.objects.filter(application_id__in=application_ids)
+        .order_by('id').values('application_id', *COMPLIANCE_CHECK.lookups)
+    )
+    for row in check_rows:
+        checks[row['application_id']].append(COMPLIANCE_CHECK.build(row, tz))
+
+    results = []
+    for row in rows:
+        data = APPLICATION.build(row, tz)
+        nested = {
+            'property': APPLICATION_PROPERTY.build(row, tz),
+            'permit_type': APPLICATION_PERMIT_TYPE.build(row, tz),
+            'documents': documents[row['id']],
+            'compliance_checks': checks[row['id']],
+        }
+        # Keep the serializer's key order
+        results.append({
+            name: nested[name] if name in nested else data[name]
+            for name in PermitApplicationSerializer.Meta.fields
+        })
+    return results
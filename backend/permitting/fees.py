@@ -0,0 +1,232 @@
+"""
+Fee Engine for CiviAI
+All active PermitType fee schedules compiled into one in-memory table,
+with exact Decimal arithmetic, a schedule version and batch quoting
+"""
+
+import hashlib
+import threading
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .cache import PERMIT_TYPES, namespace_version
+from .models import PermitType
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0')
+
+# Development fees used by the planning assistant fee estimate
+# (api/calculate-fees): new construction is charged per square foot and
+# large projects pay a share of their value
+CONSTRUCTION_PERMIT_CODES = ('ADD', 'SFR', 'COM')
+CONSTRUCTION_SQUARE_FOOT_RATE = Decimal('0.10')
+PROJECT_VALUE_THRESHOLD = Decimal('10000')
+PROJECT_VALUE_RATE = Decimal('0.005')
+
+
+def to_decimal(value) -> Decimal:
+    """
+    Decimal from user or database input; blanks and None count as zero.
+    Raises ValueError for anything that is not a number.
+    """
+    if value is None or value == '':
+        return ZERO
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        result = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not result.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return result
+
+
+def money(amount: Decimal) -> Decimal:
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class FeeSchedule(NamedTuple):
+    """Compiled fee schedule of one permit type"""
+    permit_type_id: int
+    code: str
+    name: str
+    base_fee: Decimal
+    per_square_foot_fee: Decimal
+    per_unit_fee: Decimal
+
+    @classmethod
+    def from_permit_type(cls, permit_type):
+        return cls(
+            permit_type.id,
+            permit_type.code,
+            permit_type.name,
+            to_decimal(permit_type.base_fee),
+            to_decimal(permit_type.per_square_foot_fee),
+            to_decimal(permit_type.per_unit_fee),
+        )
+
+
+class FeeQuote(NamedTuple):
+    """Fee for one application or scenario; amounts are rounded to cents"""
+    permit_type_id: int
+    permit_type: str
+    base_fee: Decimal
+    additional_fees: Decimal
+    total_fee: Decimal
+    breakdown: Tuple[Tuple[str, Decimal], ...]
+    schedule_version: str
+
+    def to_dict(self):
+        return {
+            'permit_type_id': self.permit_type_id,
+            'permit_type': self.permit_type,
+            'base_fee': float(self.base_fee),
+            'additional_fees': float(self.additional_fees),
+            'total_fee': float(self.total_fee),
+            'fee_breakdown': [{'item': item, 'amount': float(amount)} for item, amount in self.breakdown],
+            'schedule_version': self.schedule_version,
+        }
+
+
+class FeeEngine:
+    """
+    Immutable table of fee schedules keyed by permit type id. Use
+    get_fee_engine() for the process-wide instance, which is rebuilt when
+    permit types change.
+    """
+
+    def __init__(self, schedules: Iterable[FeeSchedule]):
+        self.schedules: Dict[int, FeeSchedule] = {schedule.permit_type_id: schedule for schedule in schedules}
+        fingerprint = '\n'.join(
+            '|'.join(str(part) for part in self.schedules[permit_type_id])
+            for permit_type_id in sorted(self.schedules)
+        )
+        self.version = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def load(cls):
+        """Compile all active permit types in one query"""
+        permit_types = PermitType.objects.filter(is_active=True).only(
+            'id', 'code', 'name', 'base_fee', 'per_square_foot_fee', 'per_unit_fee'
+        )
+        return cls(FeeSchedule.from_permit_type(permit_type) for permit_type in permit_types)
+
+    def schedule(self, permit_type) -> FeeSchedule:
+        """
+        Schedule for a permit type id, or for a PermitType instance (which
+        also covers inactive types that are not compiled). Raises
+        PermitType.DoesNotExist for an unknown or inactive id.
+        """
+        if isinstance(permit_type, PermitType):
+            return self.schedules.get(permit_type.id) or FeeSchedule.from_permit_type(permit_type)
+        try:
+            return self.schedules[int(permit_type)]
+        except (KeyError, TypeError, ValueError):
+            raise PermitType.DoesNotExist(f"No active permit type {permit_type!r}")
+
+    def quote(self, permit_type, square_footage=None, project_value=None) -> FeeQuote:
+        """
+        Permit schedule fee: base fee, plus the per square foot fee, plus the
+        per unit fee once when a project value is given
+        """
+        schedule = self.schedule(permit_type)
+        square_footage = to_decimal(square_footage)
+        project_value = to_decimal(project_value)
+
+        breakdown = [(f'{schedule.name} Base Fee', money(schedule.base_fee))]
+        additional = ZERO
+        if square_footage and schedule.per_square_foot_fee:
+            amount = square_footage * schedule.per_square_foot_fee
+            additional += amount
+            breakdown.append((f'Square Footage Fee ({square_footage} sq ft @ ${schedule.per_square_foot_fee}/sq ft)', money(amount)))
+        if project_value and schedule.per_unit_fee:
+            additional += schedule.per_unit_fee
+            breakdown.append(('Per Unit Fee', money(schedule.per_unit_fee)))
+
+        return self._quote(schedule, additional, breakdown)
+
+    def quote_application(self, application) -> FeeQuote:
+        """
+        Schedule fee for a PermitApplication; only loads the permit type row
+        when it is not in the compiled table (i.e. it has been deactivated)
+        """
+        if application.permit_type_id in self.schedules:
+            permit_type = application.permit_type_id
+        else:
+            permit_type = application.permit_type
+        return self.quote(permit_type, application.square_footage, application.project_value)
+
+    def quote_development(self, permit_type, square_footage=None, project_value=None) -> FeeQuote:
+        """
+        Development fee estimate: base fee, plus $0.10/sq ft for new
+        construction permits, plus 0.5% of project value over $10,000
+        """
+        schedule = self.schedule(permit_type)
+        square_footage = to_decimal(square_footage)
+        project_value = to_decimal(project_value)
+
+        breakdown = [(f'{schedule.name} Base Fee', money(schedule.base_fee))]
+        additional = ZERO
+        if schedule.code in CONSTRUCTION_PERMIT_CODES and square_footage > 0:
+            amount = square_footage * CONSTRUCTION_SQUARE_FOOT_RATE
+            additional += amount
+            breakdown.append((f'Square Footage Fee ({square_footage} sq ft @ $0.10/sq ft)', money(amount)))
+        if project_value > PROJECT_VALUE_THRESHOLD:
+            amount = (project_value - PROJECT_VALUE_THRESHOLD) * PROJECT_VALUE_RATE
+            additional += amount
+            breakdown.append(('Project Value Fee (0.5% of value over $10,000)', money(amount)))
+
+        return self._quote(schedule, additional, breakdown)
+
+    def _quote(self, schedule, additional, breakdown):
+        base_fee = money(schedule.base_fee)
+        additional_fees = money(additional)
+        return FeeQuote(
+            schedule.permit_type_id,
+            schedule.name,
+            base_fee,
+            additional_fees,
+            base_fee + additional_fees,
+            tuple(breakdown),
+            self.version,
+        )
+
+    def quote_many(self, scenarios: Iterable[dict], development: bool = False) -> List[Optional[FeeQuote]]:
+        """
+        Quote many applications or what-if scenarios in one call. Each
+        scenario is a dict with permit_type_id, square_footage and
+        project_value; entries that cannot be quoted come back as None.
+        """
+        quote = self.quote_development if development else self.quote
+        quotes = []
+        for scenario in scenarios:
+            try:
+                quotes.append(quote(
+                    scenario.get('permit_type_id'),
+                    scenario.get('square_footage'),
+                    scenario.get('project_value'),
+                ))
+            except (PermitType.DoesNotExist, ValueError):
+                quotes.append(None)
+        return quotes
+
+
+_engine = None
+_engine_namespace_version = None
+_engine_lock = threading.Lock()
+
+
+def get_fee_engine() -> FeeEngine:
+    """
+    Process-wide fee engine, recompiled after any PermitType change (the
+    permit_types cache namespace is bumped by a model signal)
+    """
+    global _engine, _engine_namespace_version
+    current = namespace_version(PERMIT_TYPES)
+    if _engine is None or _engine_namespace_version != current:
+        with _engine_lock:
+            if _engine is None or _engine_namespace_version != current:
+                _engine = FeeEngine.load()
+                _engine_namespace_version = current
+    return _engine
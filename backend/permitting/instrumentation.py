@@ -0,0 +1,346 @@
+"""
+Request Instrumentation for CiviAI
+Per-stage timers (DB, MCP, Claude, PDF parsing), Server-Timing headers,
+structured request logs, a rolling in-process latency histogram and the
+Prometheus metrics in metrics.py
+"""
+
+import contextvars
+import json
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics as prometheus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 300
+WINDOW_SLOTS = 10
+
+# Histogram bucket upper bounds in milliseconds: 0.1 ms to ~2 minutes in
+# steps of 25%, so a percentile read from the buckets is within ~12%
+BUCKET_BOUNDS_MS = tuple(0.1 * 1.25 ** i for i in range(64))
+
+# Requests that did not resolve to a view share one histogram, so 404 scans
+# cannot create an entry per path
+UNRESOLVED_ROUTE = '<unresolved>'
+
+
+class RequestMetrics:
+    """
+    Stage timings, call counts and token usage of one request. Shared by
+    every thread and task the request starts (asyncio.to_thread and event
+    loop tasks copy the context that holds it), hence the lock.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, list] = {}  # name -> [milliseconds, calls]
+        self.tokens = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, elapsed_ms: float, calls: int = 1):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0])
+            totals[0] += elapsed_ms
+            totals[1] += calls
+
+    def add_tokens(self, **counts: int):
+        with self._lock:
+            self.tokens.update({name: count for name, count in counts.items() if count})
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+_current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar('request_metrics', default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being served, or None outside a request"""
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """
+    Record the stages of a block into a fresh RequestMetrics, as the
+    middleware does for each request
+    """
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a block as one call of a stage of the current request:
+
+        with span('mcp'):
+            response = session.get(...)
+
+    Stages are inclusive, so a 'statewide' span around an MCP and a Claude
+    call overlaps both. Outside a request only the Prometheus metrics are
+    updated.
+    """
+    metrics = _current.get()
+    active = prometheus.ACTIVE_JOBS.labels(stage)
+    active.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        active.dec()
+        prometheus.STAGE_DURATION.labels(stage).observe(elapsed)
+        if metrics is not None:
+            metrics.add(stage, elapsed * 1000)
+
+
+def record_tokens(usage, call: str = 'other'):
+    """
+    Count the token usage of an Anthropic response (its ``usage``) under
+    ``call``, and for the current request
+    """
+    if usage is None:
+        return
+    # input_tokens excludes the prompt prefix read from or written to the
+    # prompt cache; cache hit ratio = cache_read / all three input kinds
+    counts = {
+        kind: getattr(usage, kind, 0) or 0
+        for kind in ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')
+    }
+    for kind, count in counts.items():
+        prometheus.CLAUDE_TOKENS.labels(call, kind).inc(count)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_tokens(**counts)
+
+
+def _count_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        prometheus.DB_QUERY_DURATION.observe(elapsed)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add('db', elapsed * 1000)
+
+
+def install_query_counter(connection):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def connection_opened(connection, **kwargs):
+    """
+    connection_created receiver: count queries on every connection, including
+    those opened by worker threads (asyncio.to_thread) during a request
+    """
+    prometheus.DB_CONNECTIONS_OPENED.inc()
+    install_query_counter(connection)
+
+
+class Distribution:
+    """Latency histogram over BUCKET_BOUNDS_MS"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def merge(self, other: 'Distribution'):
+        for index, count in enumerate(other.buckets):
+            if count:
+                self.buckets[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction: float) -> float:
+        """Estimated by linear interpolation inside the bucket holding the rank"""
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(fraction * self.count), 1)
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if seen + count >= rank:
+                lower = BUCKET_BOUNDS_MS[index - 1] if index else 0.0
+                upper = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 2) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50), 2),
+            'p95_ms': round(self.percentile(0.95), 2),
+            'p99_ms': round(self.percentile(0.99), 2),
+            'max_ms': round(self.max, 2),
+        }
+
+
+class RouteStats:
+    __slots__ = ('latency', 'stages', 'counters')
+
+    def __init__(self):
+        self.latency = Distribution()
+        self.stages: Dict[str, Distribution] = {}
+        self.counters = Counter()
+
+    def merge(self, other: 'RouteStats'):
+        self.latency.merge(other.latency)
+        for stage, distribution in other.stages.items():
+            self.stages.setdefault(stage, Distribution()).merge(distribution)
+        self.counters.update(other.counters)
+
+
+class RollingHistogram:
+    """
+    Per-route request latency over the last ``window`` seconds, kept in
+    WINDOW_SLOTS time slots so old observations age out a slot at a time
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW_SECONDS, slots: int = WINDOW_SLOTS):
+        self.window = window
+        self.slot_seconds = window / slots
+        self._slots: Dict[int, Dict[str, RouteStats]] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, now: float) -> Dict[str, RouteStats]:
+        current = int(now // self.slot_seconds)
+        slot = self._slots.get(current)
+        if slot is None:
+            oldest = current - int(self.window / self.slot_seconds) + 1
+            for stale in [number for number in self._slots if number < oldest]:
+                del self._slots[stale]
+            slot = self._slots[current] = {}
+        return slot
+
+    def observe(self, route: str, metrics: RequestMetrics, total_ms: float, status_code: int):
+        with self._lock:
+            stats = self._slot(time.time()).setdefault(route, RouteStats())
+            stats.latency.observe(total_ms)
+            stats.counters['requests'] += 1
+            if status_code >= 500:
+                stats.counters['errors'] += 1
+            for stage, (elapsed_ms, calls) in metrics.stages.items():
+                stats.stages.setdefault(stage, Distribution()).observe(elapsed_ms)
+                stats.counters[f'{stage}_calls'] += calls
+            stats.counters.update(metrics.tokens)
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        oldest = int(now // self.slot_seconds) - int(self.window / self.slot_seconds) + 1
+        merged: Dict[str, RouteStats] = {}
+        with self._lock:
+            for number, slot in self._slots.items():
+                if number < oldest:
+                    continue
+                for route, stats in slot.items():
+                    merged.setdefault(route, RouteStats()).merge(stats)
+
+        routes = {}
+        for route, stats in sorted(merged.items()):
+            routes[route] = {
+                'latency': stats.latency.summary(),
+                'stages': {stage: distribution.summary() for stage, distribution in sorted(stats.stages.items())},
+                **dict(sorted(stats.counters.items())),
+            }
+        return {'window_seconds': self.window, 'routes': routes}
+
+    def reset(self):
+        with self._lock:
+            self._slots.clear()
+
+
+histogram = RollingHistogram(getattr(settings, 'INSTRUMENTATION_WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS))
+
+
+def server_timing(metrics: RequestMetrics, total_ms: float) -> str:
+    entries = []
+    for stage, (elapsed_ms, calls) in sorted(metrics.stages.items()):
+        if stage == 'db':
+            unit = 'query' if calls == 1 else 'queries'
+        else:
+            unit = 'call' if calls == 1 else 'calls'
+        entries.append(f'{stage};dur={elapsed_ms:.1f};desc="{calls} {unit}"')
+    if metrics.tokens:
+        entries.append(f'tokens;desc="{sum(metrics.tokens.values())} tokens"')
+    entries.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(entries)
+
+
+class InstrumentationMiddleware:
+    """
+    Times every request and its stages. Place it first in MIDDLEWARE so the
+    total covers the other middleware too. For streaming responses the total
+    is the time until the response object is returned, not until the last
+    chunk is sent.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_HEADER', True)
+
+    def __call__(self, request):
+        # Threads that existed before the first request are not covered by
+        # the connection_created receiver
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+
+        prometheus.HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            with collect() as metrics:
+                response = self.get_response(request)
+        finally:
+            prometheus.HTTP_REQUESTS_IN_PROGRESS.dec()
+
+        total_ms = metrics.elapsed_ms()
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else UNRESOLVED_ROUTE
+
+        histogram.observe(route, metrics, total_ms, response.status_code)
+        prometheus.HTTP_REQUEST_DURATION.labels(request.method, route).observe(total_ms / 1000)
+        prometheus.HTTP_REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(metrics, total_ms)
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'stages': {stage: {'ms': round(elapsed_ms, 1), 'calls': calls}
+                       for stage, (elapsed_ms, calls) in metrics.stages.items()},
+            'tokens': dict(metrics.tokens),
+        }
+        logger.info(json.dumps(record), extra={'request_metrics': record})
+        return response
@@ -0,0 +1,212 @@
+"""
+Knowledge Index for CiviAI
+Tokenized inverted index with BM25 scoring over planning answers and
+municipal code snippets
+"""
+
+import heapq
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, NamedTuple
+
+from django.conf import settings
+
+DEFAULT_KNOWLEDGE_FILE = Path(__file__).resolve().parent / 'data' / 'planning_knowledge.json'
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Entry keys ("deck_permit") name what an answer is about, so their terms
+# count more than terms in the answer body
+KEY_WEIGHT = 2
+
+QUERY_CACHE_SIZE = 1024
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+(?:[-\'][a-z0-9]+)*')
+
+STOPWORDS = frozenset('''
+a about an and are as at be by can could do does for from have how i if in
+is it its me my of on or our should so than that the their then there these
+this to was what when where which who will with would you your
+'''.split())
+
+
+def _stem(token: str) -> str:
+    """Light plural folding: fees -> fee, properties -> property"""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms with stopwords removed. Hyphens and apostrophes are
+    dropped inside a word so "R-1", "r1" and "property's" match their
+    plain spellings.
+    """
+    tokens = []
+    for match in _TOKEN_RE.findall(text.lower()):
+        token = match.replace('-', '').replace("'", '')
+        if token and token not in STOPWORDS:
+            tokens.append(_stem(token))
+    return tokens
+
+
+class KnowledgeEntry(NamedTuple):
+    category: str
+    key: str
+    answer: str
+
+
+class SearchHit(NamedTuple):
+    entry: KnowledgeEntry
+    score: float
+
+
+class KnowledgeIndex:
+    """
+    Immutable inverted index. BM25 weights are computed per posting when the
+    index is built, so a query only sums precomputed weights for its terms.
+    """
+
+    def __init__(self, entries: Iterable[KnowledgeEntry]):
+        self.entries: List[KnowledgeEntry] = []
+        term_frequencies = []
+
+        for entry in entries:
+            terms = Counter(tokenize(entry.answer))
+            for term in tokenize(entry.key.replace('_', ' ')):
+                terms[term] += KEY_WEIGHT
+            self.entries.append(entry)
+            term_frequencies.append(terms)
+
+        document_count = len(self.entries)
+        lengths = [sum(terms.values()) for terms in term_frequencies]
+        average_length = (sum(lengths) / document_count) if document_count else 0.0
+
+        document_frequency = Counter()
+        for terms in term_frequencies:
+            document_frequency.update(terms.keys())
+
+        postings = defaultdict(list)
+        for doc_id, terms in enumerate(term_frequencies):
+            length_norm = K1 * (1 - B + B * lengths[doc_id] / average_length)
+            for term, frequency in terms.items():
+                df = document_frequency[term]
+                idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+                postings[term].append((doc_id, idf * frequency * (K1 + 1) / (frequency + length_norm)))
+
+        # Postings are impact-ordered (highest weight first) so a query can
+        # stop admitting new documents once they cannot reach the top k
+        self.postings = {}
+        self.ranks = {}
+        for term, docs in postings.items():
+            docs.sort(key=lambda posting: (-posting[1], posting[0]))
+            self.postings[term] = tuple(docs)
+            self.ranks[term] = {doc_id: (rank, weight) for rank, (doc_id, weight) in enumerate(docs)}
+
+        # Residents ask the same handful of questions over and over
+        self._cached_top_k = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._top_k)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query: str, k: int = 5) -> List[SearchHit]:
+        """
+        Top-k entries for a query, best first; empty when no term matches.
+        
+        Exact BM25 top-k with max-score pruning: terms are processed from
+        the highest possible contribution down, and a document is only
+        added as a candidate while its weight plus the most the remaining
+        terms could add still reaches the current k-th best score.
+        """
+        terms = frozenset(term for term in tokenize(query) if term in self.postings)
+        if not terms or k < 1:
+            return []
+        return list(self._cached_top_k(terms, k))
+
+    def _top_k(self, terms: frozenset, k: int):
+        if len(terms) == 1:
+            (term,) = terms
+            return tuple(SearchHit(self.entries[doc_id], weight) for doc_id, weight in self.postings[term][:k])
+
+        terms = list(terms)
+
+        terms.sort(key=lambda term: self.postings[term][0][1], reverse=True)
+        upper_bounds = [self.postings[term][0][1] for term in terms]
+
+        scores = {}
+        for position, term in enumerate(terms):
+            remaining = sum(upper_bounds[position + 1:])
+            threshold = heapq.nlargest(k, scores.values())[-1] if len(scores) >= k else 0.0
+
+            postings = self.postings[term]
+            cutoff = len(postings)
+            admitted = 0
+            for rank, (doc_id, weight) in enumerate(postings):
+                if doc_id in scores:
+                    scores[doc_id] += weight
+                elif weight + remaining >= threshold:
+                    scores[doc_id] = weight
+                    admitted += 1
+                    if admitted == k:
+                        # k new candidates already score at least this much
+                        threshold = max(threshold, weight)
+                else:
+                    cutoff = rank
+                    break
+
+            if cutoff < len(postings):
+                # Remaining postings can only raise existing candidates
+                ranks = self.ranks[term]
+                if len(postings) - cutoff <= len(scores):
+                    for doc_id, weight in postings[cutoff:]:
+                        if doc_id in scores:
+                            scores[doc_id] += weight
+                else:
+                    for doc_id in scores:
+                        found = ranks.get(doc_id)
+                        if found is not None and found[0] >= cutoff:
+                            scores[doc_id] += found[1]
+
+            if remaining and len(scores) > k:
+                threshold = heapq.nlargest(k, scores.values())[-1]
+                scores = {doc_id: score for doc_id, score in scores.items() if score + remaining >= threshold}
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return tuple(SearchHit(self.entries[doc_id], score) for doc_id, score in best)
+
+
+def load_knowledge_file(path) -> KnowledgeIndex:
+    """
+    Build an index from a JSON file shaped like data/planning_knowledge.json:
+    {"categories": {name: {key: answer}}}
+    """
+    with open(path, encoding='utf-8') as handle:
+        data = json.load(handle)
+
+    return KnowledgeIndex(
+        KnowledgeEntry(category, key, answer)
+        for category, answers in data['categories'].items()
+        for key, answer in answers.items()
+    )
+
+
+def load_configured_index() -> KnowledgeIndex:
+    """Index of settings.PLANNING_KNOWLEDGE_FILE (defaults to the bundled file)"""
+    return load_knowledge_file(getattr(settings, 'PLANNING_KNOWLEDGE_FILE', None) or DEFAULT_KNOWLEDGE_FILE)
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """
+    Process-wide index, built once by the service registry
+    """
+    from .services import get_service
+    return get_service('knowledge_index')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from permitting import answer_cache
+
+
+class Command(BaseCommand):
+    help = 'Show hit-rate metrics of the planning answer cache (stored Claude answers reused for near-duplicate questions)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = answer_cache.stats()
+        self.stdout.write(
+            f"lookups={stats['lookups']} hits={stats['hits']} misses={stats['misses']} "
+            f"hit_rate={stats['hit_rate']:.1%} stored={stats['stores']} indexed_answers={stats['indexed_answers']}"
+        )
+        if options['reset']:
+            answer_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,176 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from permitting.models import Property, PermitType, PermitApplication
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic permit applications and compare query plans and timings '
+        'for the dashboard/list workloads without and with the PermitApplication indexes. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000, help='Synthetic applications to seed')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median is reported)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.repeat = options['repeat']
+
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'], options['batch_size'])
+                indexes = PermitApplication._meta.indexes
+
+                self.execute_ddl(index.remove_sql for index in indexes)
+                before = self.run_workloads('Without indexes')
+
+                self.execute_ddl(index.create_sql for index in indexes)
+                after = self.run_workloads('With indexes')
+
+                self.report(before, after)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Rolled back synthetic data')
+
+    def seed(self, rows, batch_size):
+        """Create synthetic applications spread over the last two years"""
+        self.stdout.write(f'Seeding {rows} synthetic applications...')
+        started = time.perf_counter()
+
+        properties = [
+            Property.objects.create(
+                address=f'{number} Benchmark Way',
+                tax_lot_number=f'BENCH-{number}',
+                zoning=random.choice(Property.ZONING_CHOICES)[0]
+            )
+            for number in range(50)
+        ]
+        permit_types = [
+            PermitType.objects.create(
+                name=f'Benchmark Permit {number}',
+                code=f'BENCH{number}',
+                description='Synthetic permit type',
+                base_fee=Decimal('100.00')
+            )
+            for number in range(5)
+        ]
+
+        statuses = [code for code, _ in PermitApplication.STATUS_CHOICES]
+        # Most applications are closed; active ones are a small slice
+        weights = [5, 4, 2, 4, 55, 10, 10, 10]
+        now = timezone.now()
+
+        # Insert through one prepared statement: bulk_create is far slower at this size
+        fields = [field for field in PermitApplication._meta.concrete_fields if not field.primary_key]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(PermitApplication._meta.db_table),
+            ', '.join(connection.ops.quote_name(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields))
+        )
+
+        with connection.cursor() as cursor:
+            for offset in range(0, rows, batch_size):
+                batch = []
+                for _ in range(min(batch_size, rows - offset)):
+                    status = random.choices(statuses, weights)[0]
+                    created_at = now - timedelta(minutes=random.randint(0, 2 * 365 * 24 * 60))
+                    reviewed = status in ('APPROVED', 'APPROVED_WITH_CONDITIONS', 'DENIED')
+                    application = PermitApplication(
+                        property=random.choice(properties),
+                        permit_type=random.choice(permit_types),
+                        applicant_name='Benchmark Applicant',
+                        applicant_email='benchmark@example.com',
+                        applicant_phone='555-0100',
+                        project_description='Synthetic application',
+                        status=status,
+                        calculated_fee=Decimal(random.randint(100, 5000)),
+                        fee_paid=random.random() < 0.6,
+                        compliance_check_passed=random.random() < 0.5,
+                        created_at=created_at,
+                        updated_at=created_at,
+                        review_completed_at=created_at + timedelta(days=random.randint(1, 30)) if reviewed else None,
+                    )
+                    batch.append([
+                        field.get_db_prep_save(getattr(application, field.attname), connection)
+                        for field in fields
+                    ])
+                cursor.executemany(sql, batch)
+
+        self.stdout.write(f'  seeded in {time.perf_counter() - started:.1f}s')
+
+    def execute_ddl(self, statements):
+        """
+        Run index DDL directly: the schema editor context refuses to open
+        inside a transaction on SQLite, and the seed data must stay rollbackable
+        """
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(str(statement(PermitApplication, schema_editor)))
+            cursor.execute('ANALYZE')
+
+    def workloads(self):
+        """The filters used by the dashboard and staff list views"""
+        thirty_days_ago = timezone.now() - timedelta(days=30)
+        # Aggregates run unordered, as the dashboard's count()/aggregate() do
+        applications = PermitApplication.objects.order_by()
+
+        return [
+            ('active applications count',
+             applications.filter(status__in=PermitApplication.ACTIVE_STATUSES),
+             lambda qs: qs.count()),
+            ('approved in last 30 days',
+             applications.filter(status='APPROVED', review_completed_at__gte=thirty_days_ago),
+             lambda qs: qs.count()),
+            ('fees collected in last 30 days',
+             applications.filter(fee_paid=True, created_at__gte=thirty_days_ago),
+             lambda qs: qs.aggregate(total=Sum('calculated_fee'))),
+            ('needs review count',
+             applications.filter(compliance_check_passed=False, status__in=PermitApplication.ACTIVE_STATUSES),
+             lambda qs: qs.count()),
+            ('staff list filtered by status, first page',
+             applications.filter(status='UNDER_REVIEW').order_by('-created_at'),
+             lambda qs: list(qs.values_list('id', flat=True)[:25])),
+            ('review queue, oldest first',
+             applications.filter(status__in=PermitApplication.ACTIVE_STATUSES).order_by('created_at'),
+             lambda qs: list(qs.values_list('id', flat=True)[:25])),
+        ]
+
+    def run_workloads(self, label):
+        self.stdout.write(f'\n== {label} ==')
+        results = {}
+        for name, queryset, run in self.workloads():
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                run(queryset)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            results[name] = timings[len(timings) // 2] * 1000
+
+            self.stdout.write(f'{name}: {results[name]:.2f} ms')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+        return results
+
+    def report(self, before, after):
+        self.stdout.write('\n== Summary (median ms) ==')
+        for name in before:
+            speedup = before[name] / max(after[name], 0.001)
+            self.stdout.write(f'{name:<45} {before[name]:>10.2f} {after[name]:>10.2f} {speedup:>8.1f}x')
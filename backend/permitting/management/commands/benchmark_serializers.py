@@ -0,0 +1,136 @@
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from permitting.fast_serializers import serialize_applications, serialize_compliance_checks, serialize_properties
+from permitting.models import Property, PermitType, PermitApplication, ApplicationDocument, ZoningRule, ComplianceCheck
+from permitting.serializers import PermitApplicationSerializer, PropertySerializer, ComplianceCheckSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF serializers with the values()-based fast serializers on synthetic '
+        'payloads, checking the JSON is identical. Runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per payload')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per path (median is reported)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.repeat = options['repeat']
+
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                cases = [
+                    ('properties',
+                     lambda: PropertySerializer(Property.objects.filter(tax_lot_number__startswith='BENCH-'), many=True).data,
+                     lambda: serialize_properties(Property.objects.filter(tax_lot_number__startswith='BENCH-'))),
+                    ('compliance checks',
+                     lambda: ComplianceCheckSerializer(ComplianceCheck.objects.select_related('rule_checked').order_by('id'), many=True).data,
+                     lambda: serialize_compliance_checks(ComplianceCheck.objects.order_by('id'))),
+                    ('applications (nested)',
+                     lambda: PermitApplicationSerializer(
+                         PermitApplication.objects.with_related().order_by('-created_at', '-id'), many=True).data,
+                     lambda: serialize_applications(PermitApplication.objects.order_by('-created_at', '-id'))),
+                ]
+                for name, drf_path, fast_path in cases:
+                    self.compare(name, drf_path, fast_path)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Rolled back synthetic data')
+
+    def seed(self, rows):
+        """rows properties and applications, each application with one document and two checks"""
+        self.stdout.write(f'Seeding {rows} synthetic properties and applications...')
+        zoning_codes = [code for code, _ in Property.ZONING_CHOICES]
+
+        properties = Property.objects.bulk_create([
+            Property(
+                address=f'{number} Benchmark Way',
+                tax_lot_number=f'BENCH-{number}',
+                latitude=Decimal('42.6') + Decimal(random.randint(0, 99999)) / 10 ** 7,
+                longitude=Decimal('-122.8') - Decimal(random.randint(0, 99999)) / 10 ** 7,
+                acres=Decimal(random.randint(1, 50000)) / 10 ** 4,
+                zoning=random.choice(zoning_codes),
+                floodplain_overlay=random.random() < 0.1,
+            )
+            for number in range(rows)
+        ], batch_size=1000)
+        permit_type = PermitType.objects.create(
+            name='Benchmark Permit', code='BENCH', description='Synthetic permit type',
+            base_fee=Decimal('150.00'), per_square_foot_fee=Decimal('0.2500')
+        )
+        rules = [
+            ZoningRule.objects.create(
+                zoning_district='R1', rule_type=f'benchmark_{number}',
+                rule_description=f'Benchmark rule {number}', rule_parameters={'max_feet': 35}
+            )
+            for number in range(2)
+        ]
+
+        applications = PermitApplication.objects.bulk_create([
+            PermitApplication(
+                property=properties[number],
+                permit_type=permit_type,
+                applicant_name=f'Applicant {number}',
+                applicant_email='benchmark@example.com',
+                applicant_phone='555-0100',
+                project_description='Synthetic application',
+                project_value=Decimal(random.randint(1000, 500000)),
+                square_footage=Decimal(random.randint(100, 5000)) / 10,
+                calculated_fee=Decimal(random.randint(10000, 500000)) / 100,
+                status=random.choice(PermitApplication.STATUS_CHOICES)[0],
+                compliance_issues=['Setback below minimum'] if number % 3 == 0 else [],
+            )
+            for number in range(rows)
+        ], batch_size=1000)
+        if not all(application.pk for application in applications):
+            # bulk_create only returns primary keys on SQLite 3.35+ / PostgreSQL
+            raise CommandError('This database does not return primary keys from bulk_create')
+
+        ApplicationDocument.objects.bulk_create([
+            ApplicationDocument(
+                application=application, document_type='SITE_PLAN',
+                file=f'application_documents/site_plan_{application.pk}.pdf',
+                filename=f'site_plan_{application.pk}.pdf', file_size=random.randint(10000, 5000000)
+            )
+            for application in applications
+        ], batch_size=1000)
+        ComplianceCheck.objects.bulk_create([
+            ComplianceCheck(application=application, rule_checked=rule, result=random.choice(['PASS', 'FAIL']), details='Synthetic check')
+            for application in applications
+            for rule in rules
+        ], batch_size=1000)
+
+    def timed(self, path):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            data = path()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return data, timings[len(timings) // 2] * 1000
+
+    def compare(self, name, drf_path, fast_path):
+        drf_data, drf_ms = self.timed(drf_path)
+        fast_data, fast_ms = self.timed(fast_path)
+
+        identical = json.dumps(drf_data) == json.dumps(fast_data)
+        self.stdout.write(
+            f'{name:<24} rows={len(fast_data):<7} DRF {drf_ms:>9.1f} ms   fast {fast_ms:>8.1f} ms   '
+            f'{drf_ms / max(fast_ms, 0.001):>5.1f}x   identical JSON: {identical}'
+        )
+        if not identical:
+            raise CommandError(f'Fast serializer output differs from DRF for {name}')
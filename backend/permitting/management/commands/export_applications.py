@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from permitting.exporters import CHUNK_SIZE, DATASETS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Stream permit applications or compliance check results to CSV/NDJSON (e.g. for DLCD reporting)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=sorted(DATASETS), default='applications')
+        parser.add_argument('--format', dest='export_format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+        parser.add_argument('--status', help='Only applications with this status')
+        parser.add_argument('--created-after', help='ISO date or datetime (inclusive)')
+        parser.add_argument('--created-before', help='ISO date or datetime (exclusive)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = {
+            'status': options['status'],
+            'created_after': options['created_after'],
+            'created_before': options['created_before'],
+        }
+        try:
+            chunks = stream_export(options['dataset'], options['export_format'], params, options['chunk_size'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']}"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from permitting.synthetic import SCALES, delete_city, generate_city
+
+
+def add_scale_arguments(parser):
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Preset city size')
+    for field in SCALES['small']._fields:
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, help=f'Override the preset number of {field.replace("_", " ")}')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--prefix', default='SYN', help='Tax lot and permit type code prefix of the synthetic data')
+
+
+def scale_from_options(options):
+    scale = SCALES[options['scale']]
+    return scale._replace(**{field: options[field] for field in scale._fields if options.get(field) is not None})
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic city (parcels, permit types, zoning rules, applications and documents) '
+        'for load testing and benchmarks, or delete one with --delete'
+    )
+
+    def add_arguments(self, parser):
+        add_scale_arguments(parser)
+        parser.add_argument('--delete', action='store_true', help='Delete the city with this prefix instead')
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            deleted = delete_city(options['prefix'])
+            self.stdout.write(', '.join(f'{count} {name}' for name, count in deleted.items()) + ' deleted')
+            return
+
+        scale = scale_from_options(options)
+        self.stdout.write(f"Generating a {options['scale']} city: {scale._asdict()}")
+        city = generate_city(scale, seed=options['seed'], prefix=options['prefix'])
+        counts = ', '.join(f'{count} {name}' for name, count in city.counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Generated {counts} in {city.seconds:.1f}s'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from permitting.cache import NAMESPACES, invalidate_namespaces
+
+
+class Command(BaseCommand):
+    help = 'Invalidate cached data by namespace (e.g. after reloading statewide goals on the MCP server)'
+
+    def add_arguments(self, parser):
+        # Checked in handle(): argparse before Python 3.12 rejects an empty
+        # list against choices, i.e. running with no namespace at all
+        parser.add_argument('namespaces', nargs='*',
+                            help=f"Namespaces to invalidate: {', '.join(NAMESPACES)} (default: all)")
+
+    def handle(self, *args, **options):
+        unknown = [namespace for namespace in options['namespaces'] if namespace not in NAMESPACES]
+        if unknown:
+            raise CommandError(f"Unknown cache namespace: {', '.join(unknown)} (choose from {', '.join(NAMESPACES)})")
+        namespaces = options['namespaces'] or NAMESPACES
+        invalidate_namespaces(*namespaces)
+        self.stdout.write(self.style.SUCCESS(f"Invalidated cache namespaces: {', '.join(namespaces)}"))
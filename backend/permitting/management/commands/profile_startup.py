@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Imported by a worker before it serves its first request
+DEFAULT_MODULES = ('civiai_project.urls', 'permitting.urls', 'permitting.api_views_enhanced')
+
+# Should only be imported when a request actually needs them
+HEAVY_DEPENDENCIES = ('anthropic', 'PyPDF2', 'requests')
+PROJECT_PACKAGES = ('permitting', 'civiai_project')
+
+
+class Command(BaseCommand):
+    help = (
+        'Report import time per module for django.setup() plus the given modules, measured in a fresh '
+        'interpreter with python -X importtime, and optionally the cold start time of a manage.py command'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help=f"Modules to import (default: {', '.join(DEFAULT_MODULES)})")
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list, slowest first')
+        parser.add_argument('--prefix', default='', help='Only list modules starting with this prefix (e.g. permitting)')
+        parser.add_argument('--command', help='Also time cold runs of this manage.py command (e.g. "check")')
+        parser.add_argument('--runs', type=int, default=3, help='Cold runs per timing (median is reported)')
+        parser.add_argument('--fail-on-heavy', action='store_true',
+                            help=f"Exit with an error if project code imports any of {', '.join(HEAVY_DEPENDENCIES)} at startup")
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or DEFAULT_MODULES
+        code = 'import django; django.setup(); import ' + ', '.join(modules)
+
+        imports, wall_ms = self.profile_imports(code, options['runs'])
+        self.stdout.write(f"django.setup() + {', '.join(modules)}: {wall_ms:.0f} ms wall (median of {options['runs']})")
+
+        listed = sorted(
+            (row for row in imports.values() if row[2].startswith(options['prefix'])),
+            key=lambda row: row[1], reverse=True,
+        )[:options['top']]
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for self_us, cumulative_us, name, _ in listed:
+            self.stdout.write(f'{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}')
+
+        # Third-party packages may import these themselves (DRF imports
+        # requests when it is installed); only our own imports are flagged
+        heavy = []
+        for name in HEAVY_DEPENDENCIES:
+            if name not in imports:
+                self.stdout.write(f'{name} not imported at startup')
+                continue
+            importer = imports[name][3] or '(top level)'
+            message = f'{name} imported at startup by {importer} ({imports[name][1] / 1000:.1f} ms)'
+            if importer.split('.')[0] in PROJECT_PACKAGES:
+                heavy.append(name)
+                self.stdout.write(self.style.WARNING(message))
+            else:
+                self.stdout.write(message)
+
+        if options['command']:
+            command = [sys.executable, str(settings.BASE_DIR / 'manage.py')] + options['command'].split()
+            timings = sorted(self.run_timed(command) for _ in range(options['runs']))
+            self.stdout.write(f"manage.py {options['command']}: {timings[len(timings) // 2]:.0f} ms cold (median of {options['runs']})")
+
+        if heavy and options['fail_on_heavy']:
+            raise CommandError(f"Heavy dependencies imported at startup by project code: {', '.join(heavy)}")
+
+    def environment(self):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        return env
+
+    def run_timed(self, command):
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=settings.BASE_DIR, env=self.environment(), capture_output=True, text=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise CommandError(f"{' '.join(command)} failed:\n{result.stderr[-2000:]}")
+        self.last_stderr = result.stderr
+        return elapsed
+
+    def profile_imports(self, code, runs):
+        """
+        ({module: (self us, cumulative us, module, importer)}, median wall ms).
+        Per-module times come from the last run; the first run also warms
+        the bytecode cache.
+        """
+        command = [sys.executable, '-X', 'importtime', '-c', code]
+        timings = sorted(self.run_timed(command) for _ in range(max(runs, 1)))
+
+        imports = {}
+        pending = {}  # depth -> names waiting for their importer
+        for line in self.last_stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            self_us, cumulative_us, raw_name = line[len('import time:'):].split('|')
+            name = raw_name.strip()
+            depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+            # -X importtime lists a module after everything it imported
+            for child in pending.pop(depth + 1, []):
+                imports[child] = imports[child][:3] + (name,)
+            pending.setdefault(depth, []).append(name)
+            imports[name] = (int(self_us), int(cumulative_us), name, None)
+        return imports, timings[len(timings) // 2]
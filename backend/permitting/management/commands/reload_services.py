@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from permitting.services import registry
+
+
+class Command(BaseCommand):
+    help = (
+        'Make every running worker rebuild its AI services (knowledge index, compliance engine, '
+        'Claude and MCP clients) on next use, e.g. after editing PLANNING_KNOWLEDGE_FILE'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warm-up', action='store_true',
+                            help='Also build the services in this process and report how long each takes')
+
+    def handle(self, *args, **options):
+        registry.request_reload()
+        self.stdout.write(self.style.SUCCESS('Reload requested; workers rebuild services within a second'))
+        if options['warm_up']:
+            for name, ms in registry.warm_up().items():
+                self.stdout.write(f'{name:<20} {ms:8.1f} ms')
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from permitting.benchmarks import REPORT_VERSION, BenchmarkSuite, environment
+from permitting.claude_service import ClaudeService
+from permitting.mcp_integration import MCPService
+from permitting.services import registry
+from permitting.stubs import StubAnthropicClient, StubMCPSession
+from permitting.synthetic import delete_city, generate_city
+
+from .generate_city import add_scale_arguments, scale_from_options
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic city, time the key request paths on it with stub Claude and MCP '
+        'backends, and write a JSON report. The city is deleted afterwards unless --keep-data is given.'
+    )
+
+    def add_arguments(self, parser):
+        add_scale_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per benchmark')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed runs per benchmark before the timed ones')
+        parser.add_argument('--only', nargs='+', metavar='BENCHMARK', help='Run only these benchmarks')
+        parser.add_argument('--claude-latency-ms', type=float, default=0, help='Latency of each stub Claude call')
+        parser.add_argument('--mcp-latency-ms', type=float, default=0, help='Latency of each stub MCP call')
+        parser.add_argument('--document-words', type=int, default=1500, help='Size of the analyzed documents')
+        parser.add_argument('--output', help='Write the JSON report to this file (default: standard output)')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the generated city')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        scale = scale_from_options(options)
+        self.stderr.write(f"Generating a {options['scale']} city: {scale._asdict()}")
+        started_at = datetime.now(timezone.utc)
+        # Committed rather than rolled back: the compliance and document
+        # paths query from worker threads, which use their own connections
+        city = generate_city(scale, seed=options['seed'], prefix=options['prefix'])
+        self.stderr.write(f'Generated in {city.seconds:.1f}s')
+
+        claude_latency = options['claude_latency_ms'] / 1000
+        mcp_latency = options['mcp_latency_ms'] / 1000
+        suite = BenchmarkSuite(city, seed=options['seed'], document_words=options['document_words'])
+        try:
+            with registry.override(
+                claude=lambda: ClaudeService(client=StubAnthropicClient(claude_latency)),
+                mcp=lambda: MCPService(session=StubMCPSession(mcp_latency)),
+            ):
+                results = suite.run(
+                    options['only'], iterations=options['iterations'], warmup=options['warmup'],
+                    progress=self.report_progress,
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if not options['keep_data']:
+                delete_city(options['prefix'])
+                self.stderr.write('Deleted the synthetic city')
+
+        report = {
+            'report_version': REPORT_VERSION,
+            'started_at': started_at.isoformat(),
+            'environment': environment(),
+            'config': {
+                'scale': options['scale'],
+                'city': scale._asdict(),
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'claude_latency_ms': options['claude_latency_ms'],
+                'mcp_latency_ms': options['mcp_latency_ms'],
+                'document_words': options['document_words'],
+            },
+            'dataset': {'counts': city.counts, 'generation_seconds': round(city.seconds, 2)},
+            'results': results,
+        }
+        body = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(body + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(body)
+
+    def report_progress(self, name, result):
+        errors = f", {result['errors']} errors" if result['errors'] else ''
+        self.stderr.write(f"{name:<26} median {result['median_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms{errors}")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from permitting.stubs import Faults, claude_stub_server
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve a stub of the Anthropic messages API with injected latency, jitter and errors, for load '
+        'testing without the real API. Point CiviAI at it with ANTHROPIC_BASE_URL=http://HOST:PORT '
+        '(ANTHROPIC_API_KEY must be set, to any value).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--latency-ms', type=float, default=800,
+                            help='Mean latency of a response, or of the first event of a streamed one')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Latency varies uniformly by up to this much')
+        parser.add_argument('--token-interval-ms', type=float, default=20,
+                            help='Time between the text deltas of a streamed response; the latency comes first')
+        parser.add_argument('--error-rate', type=float, default=0,
+                            help='Fraction of requests answered with a 529 overloaded or 500 error')
+        parser.add_argument('--seed', type=int, help='Seed for repeatable jitter and errors')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError('--error-rate must be between 0 and 1')
+
+        faults = Faults(
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        server = claude_stub_server(options['host'], options['port'], faults, options['token_interval_ms'] / 1000)
+        self.stdout.write(
+            f"Claude stub on http://{options['host']}:{options['port']} "
+            f"({options['latency_ms']:.0f} +/- {options['jitter_ms']:.0f} ms, {options['error_rate']:.0%} errors)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
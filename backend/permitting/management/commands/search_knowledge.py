@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from permitting.knowledge_index import get_knowledge_index, load_knowledge_file
+
+
+class Command(BaseCommand):
+    help = 'Rank planning knowledge base entries for a question (BM25), with index build and query timings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('question')
+        parser.add_argument('--top', type=int, default=5, help='Number of entries to show')
+        parser.add_argument('--file', help='Knowledge file to index instead of PLANNING_KNOWLEDGE_FILE')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = load_knowledge_file(options['file']) if options['file'] else get_knowledge_index()
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        hits = index.search(options['question'], options['top'])
+        query_us = (time.perf_counter() - started) * 1e6
+
+        self.stdout.write(f'{len(index)} entries indexed in {build_ms:.1f} ms; query took {query_us:.0f} us')
+        if not hits:
+            self.stdout.write('No matching entries')
+        for hit in hits:
+            self.stdout.write(f'{hit.score:7.3f}  {hit.entry.category}/{hit.entry.key}: {hit.entry.answer}')
@@ -3,30 +3,69 @@ MCP Integration Service for CiviAI
 Connects to Oregon Statewide Planning Goals MCP Server
 """
 
-import requests
 import json
 import logging
-from typing import Dict, List, Optional, Any
+import threading
+from typing import Dict, List, Optional, Any, Set
 from django.conf import settings
+from .cache import GOALS, get_namespaced, set_namespaced
+from .coalescing import Coalescer
+from .instrumentation import span
+from .metrics import EXTERNAL_ERRORS
 
 logger = logging.getLogger(__name__)
 
+APPLICABILITY_MATRIX_CACHE_KEY = 'mcp:applicability_matrix'  # in the goals cache namespace
+
 class MCPService:
     """
     Service to interact with Oregon Statewide Planning Goals MCP Server
     """
     
-    def __init__(self):
+    def __init__(self, session=None):
         # MCP Server URL - can be configured in settings
         self.mcp_base_url = getattr(settings, 'MCP_SERVER_URL', 'https://5000-i949ezw629r8b2x60289e-d8f6014d.manusvm.computer')
-        self.timeout = 30
+        self.timeout = getattr(settings, 'MCP_TIMEOUT', 30)
+        self.matrix_cache_timeout = getattr(settings, 'MCP_MATRIX_CACHE_SECONDS', 3600)
+        self._local = threading.local()
+        # Shared by every thread instead of the per-thread sessions when given
+        self._session = session
+        self.coalescer = Coalescer('mcp')
+    
+    @property
+    def http(self):
+        """
+        Per-thread requests session, which keeps connections to the MCP server
+        alive between calls. requests is only imported on first use.
+        """
+        if self._session is not None:
+            return self._session
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            self._local.session = session
+        return session
+    
+    def _request(self, method: str, path: str, **kwargs):
+        """Call the MCP server, timed as an 'mcp' stage of the current request"""
+        kwargs.setdefault('timeout', self.timeout)
+        with span('mcp'):
+            try:
+                response = self.http.request(method, f"{self.mcp_base_url}{path}", **kwargs)
+            except Exception:
+                EXTERNAL_ERRORS.labels('mcp').inc()
+                raise
+        if response.status_code >= 500:
+            EXTERNAL_ERRORS.labels('mcp').inc()
+        return response
     
     def check_server_health(self) -> Dict[str, Any]:
         """
         Check if MCP server is healthy and responsive
         """
         try:
-            response = requests.get(f"{self.mcp_base_url}/mcp/health", timeout=self.timeout)
+            response = self._request('get', '/mcp/health')
             if response.status_code == 200:
                 return {
                     'success': True,
@@ -52,7 +91,7 @@ class MCPService:
         Get all Oregon Statewide Planning Goals
         """
         try:
-            response = requests.get(f"{self.mcp_base_url}/mcp/goals", timeout=self.timeout)
+            response = self._request('get', '/mcp/goals')
             if response.status_code == 200:
                 return response.json()
             else:
@@ -72,7 +111,7 @@ class MCPService:
         Get specific statewide goal by number
         """
         try:
-            response = requests.get(f"{self.mcp_base_url}/mcp/goals/{goal_number}", timeout=self.timeout)
+            response = self._request('get', f"/mcp/goals/{goal_number}")
             if response.status_code == 200:
                 return response.json()
             else:
@@ -87,51 +126,70 @@ class MCPService:
                 'error': str(e)
             }
     
-    def check_statewide_compliance(self, project_description: str, property_context: Dict) -> Dict[str, Any]:
+    def _post(self, path: str, payload: Dict, action: str) -> Dict[str, Any]:
         """
-        Check project compliance against Oregon Statewide Planning Goals
+        POST to the MCP server. Identical posts made at the same time share
+        one request, and a successful result is reused for a few seconds
+        after (coalescing.py).
         """
-        try:
-            payload = {
-                'project_description': project_description,
-                'property_context': property_context
-            }
-            
-            response = requests.post(
-                f"{self.mcp_base_url}/mcp/check-compliance",
-                json=payload,
-                timeout=self.timeout
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
+        def post():
+            try:
+                response = self._request('post', path, json=payload)
+                
+                if response.status_code == 200:
+                    return response.json()
+                else:
+                    return {
+                        'success': False,
+                        'error': f"HTTP {response.status_code}: {response.text}"
+                    }
+            except Exception as e:
+                logger.error(f"Error {action}: {str(e)}")
                 return {
                     'success': False,
-                    'error': f"HTTP {response.status_code}: {response.text}"
+                    'error': str(e)
                 }
-        except Exception as e:
-            logger.error(f"Error checking statewide compliance: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
+        
+        return self.coalescer.call(
+            self.coalescer.key(path, payload), post,
+            cacheable=lambda result: bool(result.get('success')),
+        )
+    
+    def check_statewide_compliance(self, project_description: str, property_context: Dict) -> Dict[str, Any]:
+        """
+        Check project compliance against Oregon Statewide Planning Goals
+        """
+        payload = {
+            'project_description': project_description,
+            'property_context': property_context
+        }
+        return self._post('/mcp/check-compliance', payload, 'checking statewide compliance')
     
     def get_applicable_goals(self, project_description: str, property_context: Dict) -> Dict[str, Any]:
         """
         Get applicable statewide goals for a project
         """
+        payload = {
+            'project_description': project_description,
+            'property_context': property_context
+        }
+        return self._post('/mcp/applicable-goals', payload, 'getting applicable goals')
+    
+    def get_compliance_history(self, project_id: str, limit: int = 50,
+                               cursor: Optional[str] = None,
+                               status: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of compliance check history for a project.
+        Pass the returned ``next_cursor`` as ``cursor`` to fetch the next page.
+        """
         try:
-            payload = {
-                'project_description': project_description,
-                'property_context': property_context
-            }
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            if status:
+                params['status'] = status
             
-            response = requests.post(
-                f"{self.mcp_base_url}/mcp/applicable-goals",
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._request('get', f"/mcp/compliance-history/{project_id}", params=params)
             
             if response.status_code == 200:
                 return response.json()
@@ -141,36 +199,76 @@ class MCPService:
                     'error': f"HTTP {response.status_code}: {response.text}"
                 }
         except Exception as e:
-            logger.error(f"Error getting applicable goals: {str(e)}")
+            logger.error(f"Error getting compliance history: {str(e)}")
             return {
                 'success': False,
                 'error': str(e)
             }
-    
-    def get_compliance_history(self, project_id: str) -> Dict[str, Any]:
+
+    def get_applicability_matrix(self, fetch: bool = True) -> Optional[Dict[str, Any]]:
         """
-        Get compliance check history for a project
+        Get the goal applicability matrix, cached locally so the structural
+        part of goal applicability needs no network hop. With fetch=False
+        only a cached matrix is returned.
         """
+        matrix = get_namespaced(GOALS, APPLICABILITY_MATRIX_CACHE_KEY)
+        if matrix is not None or not fetch:
+            return matrix
+        
         try:
-            response = requests.get(
-                f"{self.mcp_base_url}/mcp/compliance-history/{project_id}",
-                timeout=self.timeout
-            )
+            response = self._request('get', '/mcp/applicability-matrix')
+            if response.status_code != 200:
+                logger.warning(f"Applicability matrix unavailable: HTTP {response.status_code}")
+                return None
             
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {
-                    'success': False,
-                    'error': f"HTTP {response.status_code}: {response.text}"
-                }
-        except Exception as e:
-            logger.error(f"Error getting compliance history: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
+            data = response.json()['matrix']
+            matrix = {
+                'version': response.json().get('version'),
+                'rows': {
+                    (row['zoning'], row['in_floodplain'], row['riparian_overlay'], row['in_ugb']): row
+                    for row in data['rows']
+                },
+                'keyword_rules': {int(number): keywords for number, keywords in data['keyword_rules'].items()}
             }
+            set_namespaced(GOALS, APPLICABILITY_MATRIX_CACHE_KEY, matrix, self.matrix_cache_timeout)
+            return matrix
+        except Exception as e:
+            logger.error(f"Error getting applicability matrix: {str(e)}")
+            return None
+    
+    def resolve_applicable_goal_numbers(self, project_description: str, property_context: Dict,
+                                        fetch: bool = True) -> Optional[Set[int]]:
+        """
+        Resolve applicable goal numbers locally from the cached matrix,
+        fetching it first unless fetch=False. Returns None when the matrix
+        is unavailable or does not cover the property's zoning code; callers
+        then use get_applicable_goals().
+        """
+        matrix = self.get_applicability_matrix(fetch)
+        if not matrix:
+            return None
+        
+        key = (
+            (property_context.get('zoning') or '').upper(),
+            bool(property_context.get('in_floodplain', False)),
+            bool(property_context.get('riparian_overlay', False)),
+            bool(property_context.get('in_ugb', True)),
+        )
+        row = matrix['rows'].get(key)
+        if row is None:
+            return None
+        
+        description_lower = project_description.lower()
+        applicable = set(row['always'])
+        for goal_number in row['keyword_dependent']:
+            if any(keyword in description_lower for keyword in matrix['keyword_rules'].get(goal_number, [])):
+                applicable.add(goal_number)
+        
+        return applicable
 
-# Global instance
-mcp_service = MCPService()
-
+# Global instance, built on first use by the service registry (services.py)
+def __getattr__(name):
+    if name == 'mcp_service':
+        from .services import get_service
+        return get_service('mcp')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
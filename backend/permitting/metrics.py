@@ -0,0 +1,80 @@
+"""
+Prometheus Metrics for CiviAI
+Request, stage, cache and database metrics in the Prometheus text format,
+aggregated across gunicorn workers by prometheus_client's multiprocess mode
+"""
+
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Seconds; the upper buckets are for Claude calls and full compliance checks
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'civiai_http_request_duration_seconds', 'Request latency by route',
+    ['method', 'route'], buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    'civiai_http_requests', 'Requests by route and status code',
+    ['method', 'route', 'status'],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'civiai_http_requests_in_progress', 'Requests being served', multiprocess_mode='livesum',
+)
+STAGE_DURATION = Histogram(
+    'civiai_stage_duration_seconds',
+    'Duration of request stages; the claude and mcp stages are external API latency',
+    ['stage'], buckets=LATENCY_BUCKETS,
+)
+ACTIVE_JOBS = Gauge(
+    'civiai_active_jobs', 'Stages in progress (Claude and MCP calls, PDF parsing, compliance levels)',
+    ['stage'], multiprocess_mode='livesum',
+)
+EXTERNAL_ERRORS = Counter(
+    'civiai_external_errors', 'Failed calls to Claude or the MCP server', ['service'],
+)
+CLAUDE_TOKENS = Counter('civiai_claude_tokens', 'Claude tokens used by call (question, document, ...)', ['call', 'kind'])
+CLAUDE_PROMPTS_TRIMMED = Counter(
+    'civiai_claude_prompts_trimmed', 'Claude prompts cut to their token budget', ['call'],
+)
+CLAUDE_CALL_DURATION = Histogram(
+    'civiai_claude_call_duration_seconds', 'Claude call latency by call and model tier (fast, deep)',
+    ['call', 'tier'], buckets=LATENCY_BUCKETS,
+)
+CLAUDE_COST = Counter(
+    'civiai_claude_cost_usd', 'Estimated Claude spend in USD at list prices, by call and model tier', ['call', 'tier'],
+)
+CLAUDE_TIME_TO_FIRST_TOKEN = Histogram(
+    'civiai_claude_time_to_first_token_seconds', 'Time until a streamed Claude answer starts, by call',
+    ['call'], buckets=LATENCY_BUCKETS,
+)
+COALESCED_CALLS = Counter(
+    'civiai_coalesced_calls',
+    'Claude and MCP calls not made because an identical call was in flight or had just finished '
+    '(shared in-process, waited for another worker, or served from the brief result cache)',
+    ['service', 'how'],
+)
+CACHE_REQUESTS = Counter(
+    'civiai_cache_requests', 'Cache lookups by cache and result (hit ratio = hits / all)', ['cache', 'result'],
+)
+DB_QUERY_DURATION = Histogram('civiai_db_query_duration_seconds', 'Database query latency', buckets=QUERY_BUCKETS)
+DB_CONNECTIONS_OPENED = Counter(
+    'civiai_db_connections_opened', 'Database connections opened (Django does not pool; CONN_MAX_AGE reuses them)',
+)
+
+
+def render():
+    """
+    (body, content type) of the metrics exposition. With
+    PROMETHEUS_MULTIPROC_DIR set, the values of every worker are merged
+    from their files in that directory.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
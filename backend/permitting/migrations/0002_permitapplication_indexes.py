@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permitting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='permitapplication',
+            index=models.Index(fields=['status', 'created_at'], name='permit_app_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='permitapplication',
+            index=models.Index(fields=['status', 'review_completed_at'], name='permit_app_status_reviewed'),
+        ),
+        migrations.AddIndex(
+            model_name='permitapplication',
+            index=models.Index(fields=['fee_paid', 'created_at'], name='permit_app_fee_created'),
+        ),
+        migrations.AddIndex(
+            model_name='permitapplication',
+            index=models.Index(condition=models.Q(('status__in', ['SUBMITTED', 'UNDER_REVIEW'])), fields=['created_at'], name='permit_app_active_created'),
+        ),
+        migrations.AddIndex(
+            model_name='permitapplication',
+            index=models.Index(condition=models.Q(('status__in', ['SUBMITTED', 'UNDER_REVIEW'])), fields=['compliance_check_passed', 'created_at'], name='permit_app_active_compliance'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permitting', '0002_permitapplication_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='permitapplication',
+            index=models.Index(fields=['created_at', 'id'], name='permit_app_created_id'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permitting', '0003_permitapplication_created_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnsweredQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField()),
+                ('context_key', models.CharField(blank=True, db_index=True, help_text='Hash of the property/permit context the question was asked with', max_length=64)),
+                ('answer', models.TextField()),
+                ('source', models.CharField(help_text='Model that produced the answer', max_length=100)),
+                ('is_active', models.BooleanField(default=True, help_text='Only active answers are reused')),
+                ('hit_count', models.PositiveIntegerField(default=0, help_text='Times this answer was reused')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
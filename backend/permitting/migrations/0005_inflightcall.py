@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permitting', '0004_answeredquestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InFlightCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Hash of the call and its arguments', max_length=64, unique=True)),
+                ('owner', models.CharField(help_text='host:pid of the worker making the call', max_length=100)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='After this the lock is taken over, e.g. when its worker died')),
+            ],
+        ),
+    ]
@@ -81,6 +81,38 @@ class PermitType(models.Model):
         return f"{self.name} ({self.code})"
 
 
+class PermitApplicationQuerySet(models.QuerySet):
+    """
+    Loading profiles for permit applications, so pages that render many
+    applications run a fixed number of queries regardless of page size
+    """
+    
+    # Columns rendered by the staff list (and __str__)
+    LISTING_FIELDS = (
+        'application_id', 'applicant_name', 'applicant_email', 'status',
+        'calculated_fee', 'fee_paid', 'compliance_check_passed', 'compliance_issues',
+        'submitted_at', 'created_at',
+        'property__address', 'property__zoning',
+        'permit_type__name', 'permit_type__code',
+    )
+    
+    def with_related(self):
+        """
+        Everything the detail page and the full serializer touch: property,
+        permit type, reviewer, documents and compliance checks with their rules
+        """
+        return self.select_related('property', 'permit_type', 'reviewed_by').prefetch_related(
+            'documents',
+            models.Prefetch('compliance_checks', queryset=ComplianceCheck.objects.select_related('rule_checked')),
+        )
+    
+    def for_listing(self):
+        """
+        Only the columns list pages render, joined to property and permit type
+        """
+        return self.select_related('property', 'permit_type').only(*self.LISTING_FIELDS)
+
+
 class PermitApplication(models.Model):
     """
     Represents a permit application submitted through CiviAI
@@ -116,6 +148,9 @@ class PermitApplication(models.Model):
     ]
     status = models.CharField(max_length=25, choices=STATUS_CHOICES, default='DRAFT')
     
+    # Statuses still waiting on staff; the dashboard and review queues filter on these
+    ACTIVE_STATUSES = ['SUBMITTED', 'UNDER_REVIEW']
+    
     # Fees
     calculated_fee = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     fee_paid = models.BooleanField(default=False)
@@ -134,24 +169,40 @@ class PermitApplication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PermitApplicationQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination order for unfiltered lists and exports
+            models.Index(fields=['created_at', 'id'], name='permit_app_created_id'),
+            # Status-filtered lists, newest first
+            models.Index(fields=['status', 'created_at'], name='permit_app_status_created'),
+            # Approved in the last N days (dashboard)
+            models.Index(fields=['status', 'review_completed_at'], name='permit_app_status_reviewed'),
+            # Fees collected in the last N days (dashboard)
+            models.Index(fields=['fee_paid', 'created_at'], name='permit_app_fee_created'),
+            # Review queues only ever look at active applications (ACTIVE_STATUSES)
+            models.Index(
+                fields=['created_at'],
+                name='permit_app_active_created',
+                condition=models.Q(status__in=['SUBMITTED', 'UNDER_REVIEW']),
+            ),
+            models.Index(
+                fields=['compliance_check_passed', 'created_at'],
+                name='permit_app_active_compliance',
+                condition=models.Q(status__in=['SUBMITTED', 'UNDER_REVIEW']),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.permit_type.name} - {self.property.address} ({self.get_status_display()})"
     
     def calculate_fee(self):
         """Calculate the total fee for this application"""
-        base_fee = self.permit_type.base_fee
-        
-        additional_fees = 0
-        if self.square_footage and self.permit_type.per_square_foot_fee:
-            additional_fees += float(self.square_footage) * float(self.permit_type.per_square_foot_fee)
-        
-        if self.project_value and self.permit_type.per_unit_fee:
-            additional_fees += float(self.permit_type.per_unit_fee)
-        
-        total_fee = float(base_fee) + additional_fees
+        from .fees import get_fee_engine
+
+        total_fee = get_fee_engine().quote_application(self).total_fee
         self.calculated_fee = total_fee
         return total_fee
 
@@ -237,3 +288,41 @@ class ComplianceCheck(models.Model):
     def __str__(self):
         return f"{self.application} - {self.rule_checked.rule_type}: {self.get_result_display()}"
 
+
+class AnsweredQuestion(models.Model):
+    """
+    Planning questions answered by Claude, reused for near-duplicate
+    questions by the local answer cache (answer_cache.py)
+    """
+    question = models.TextField()
+    context_key = models.CharField(max_length=64, blank=True, db_index=True, help_text="Hash of the property/permit context the question was asked with")
+    answer = models.TextField()
+    source = models.CharField(max_length=100, help_text="Model that produced the answer")
+    
+    # Staff can retire an answer that is wrong or out of date
+    is_active = models.BooleanField(default=True, help_text="Only active answers are reused")
+    
+    hit_count = models.PositiveIntegerField(default=0, help_text="Times this answer was reused")
+    last_hit_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return self.question[:80]
+
+
+class InFlightCall(models.Model):
+    """
+    Lock table for request coalescing (coalescing.py): a row per Claude or
+    MCP call being made by some worker, so other workers making the same
+    call wait for its result instead of repeating it
+    """
+    key = models.CharField(max_length=64, unique=True, help_text="Hash of the call and its arguments")
+    owner = models.CharField(max_length=100, help_text="host:pid of the worker making the call")
+    started_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True, help_text="After this the lock is taken over, e.g. when its worker died")
+    
+    def __str__(self):
+        return f"{self.key[:12]} ({self.owner})"
@@ -0,0 +1,204 @@
+"""
+Keyset Pagination for CiviAI
+Cursor pagination on (created_at, id) whose cost does not grow with depth
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Counts stop here; anything above is reported as "at least"
+APPROXIMATE_COUNT_CAP = 10000
+
+
+def encode_cursor(created_at, pk, direction='next'):
+    """
+    Opaque cursor for the row at (created_at, pk)
+    """
+    payload = json.dumps({'c': created_at.isoformat(), 'i': pk, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns (created_at, pk, direction); raises ValueError for a malformed cursor
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        direction = payload.get('d', 'next')
+        if direction not in ('next', 'previous'):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload['c']), int(payload['i']), direction
+    except (TypeError, KeyError, ValueError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset, newest first
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None, count_is_exact=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_exact = count_is_exact
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_page(queryset, cursor=None, page_size=25):
+    """
+    Fetch one page of queryset ordered by (-created_at, -id). Every page is
+    an index range scan from the cursor position, so page 1000 costs the
+    same as page 1. Raises ValueError for a malformed cursor.
+    """
+    direction = 'next'
+    if cursor:
+        created_at, pk, direction = decode_cursor(cursor)
+        if direction == 'next':
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    if direction == 'next':
+        rows = list(queryset.order_by('-created_at', '-id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+    else:
+        rows = list(queryset.order_by('created_at', 'id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+
+    if not rows:
+        if not cursor:
+            return KeysetPage([], None, None)
+        # Past the end, e.g. the rows after the cursor were deleted: link
+        # back to the page ending at the cursor row. Ids are integers, so
+        # moving the id by one makes the cursor row itself included.
+        if direction == 'next':
+            return KeysetPage([], None, encode_cursor(created_at, pk - 1, 'previous'))
+        return KeysetPage([], encode_cursor(created_at, pk + 1, 'next'), None)
+
+    first, last = rows[0], rows[-1]
+    has_next = has_more if direction == 'next' else True
+    has_previous = bool(cursor) if direction == 'next' else has_more
+
+    return KeysetPage(
+        rows,
+        encode_cursor(last.created_at, last.pk, 'next') if has_next else None,
+        encode_cursor(first.created_at, first.pk, 'previous') if has_previous else None,
+    )
+
+
+def approximate_count(queryset, cap=APPROXIMATE_COUNT_CAP):
+    """
+    Cheap row count: the planner's table estimate for an unfiltered
+    queryset, otherwise an exact count that stops at ``cap``.
+    Returns (count, is_exact).
+    """
+    if not queryset.query.where:
+        estimate = _table_row_estimate(queryset.model._meta.db_table)
+        if estimate is not None and estimate > cap:
+            return estimate, False
+
+    count = queryset.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+def _table_row_estimate(table):
+    """
+    Row estimate from planner statistics (PostgreSQL reltuples, or
+    sqlite_stat1 after ANALYZE); None when no statistics are available
+    """
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+                row = cursor.fetchone()
+                return row[0] if row and row[0] > 0 else None
+            if connection.vendor == 'sqlite':
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx IS NULL', [table])
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                    row = cursor.fetchone()
+                return int(row[0].split()[0]) if row else None
+        except Exception:
+            # No statistics table yet (e.g. SQLite before the first ANALYZE)
+            return None
+    return None
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination on (created_at, id). Query parameters: ``cursor``,
+    ``page_size`` and ``count=1`` for an approximate total.
+    """
+
+    page_size = 25
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            page_size = min(int(request.query_params.get(self.page_size_query_param, self.page_size)), self.max_page_size)
+            if page_size < 1:
+                raise ValueError(page_size)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Must be a positive integer'})
+
+        try:
+            self.page = keyset_page(queryset, request.query_params.get(self.cursor_query_param), page_size)
+        except ValueError as e:
+            raise ValidationError({self.cursor_query_param: str(e)})
+
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.page.count, self.page.count_is_exact = approximate_count(queryset)
+
+        return self.page.object_list
+
+    def _page_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self._page_link(self.page.next_cursor),
+            'previous': self._page_link(self.page.previous_cursor),
+            'results': data,
+        }
+        if self.page.count is not None:
+            response['count'] = self.page.count
+            response['count_is_exact'] = self.page.count_is_exact
+        return Response(response)
+
@@ -0,0 +1,261 @@
+"""
+Prompt Assembly for Claude
+Local token estimates, whitespace and boilerplate cleanup, trimming of
+prompt sections to a per-call token budget, and prompt cache breakpoints
+"""
+
+import math
+import re
+from collections import Counter
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+# Marks the end of a prompt prefix for Anthropic's prompt cache; the prefix
+# is reused for five minutes after its last use
+CACHE_CONTROL = {'type': 'ephemeral'}
+
+# Claude averages about 3.5 characters per token on English prose; dividing
+# by a little less errs towards overestimating
+CHARS_PER_TOKEN = 3.2
+
+# Paragraphs longer than this are trimmed sentence by sentence
+MAX_UNIT_TOKENS = 250
+
+# Lines shorter than this (list items, "Yes", page numbers) are never
+# treated as repeated boilerplate
+MIN_BOILERPLATE_CHARS = 20
+
+# A line is boilerplate when it occurs this often: a header or footer on
+# every page, not two zones of a table that happen to share a standard
+BOILERPLATE_REPEATS = 3
+
+# Terms that make a passage worth keeping when a document is trimmed
+PLANNING_TERMS = (
+    'setback', 'height', 'coverage', 'zoning', 'zone', 'variance', 'conditional use', 'floodplain',
+    'riparian', 'wetland', 'easement', 'parking', 'access', 'septic', 'sewer', 'water', 'drainage',
+    'permit', 'fee', 'hearing', 'notice', 'condition', 'approval', 'deny', 'appeal', 'goal', 'ordinance',
+    'code', 'section', 'requirement', 'shall', 'must', 'square feet', 'acre', 'lot', 'story', 'stories',
+)
+
+_BLANK_LINES = re.compile(r'\n{3,}')
+_SPACES = re.compile(r'[ \t\xa0]+')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_END = re.compile(r'(?<=[.!?;])\s+')
+_PAGE_NUMBER = re.compile(r'\bpage\s+\d+(\s+of\s+\d+)?\b')
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of ``text``, estimated from its length without a tokenizer"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def clean(text: str) -> str:
+    """
+    Strip indentation and trailing spaces, collapse runs of spaces and of
+    blank lines. The prompts are indented triple-quoted strings, and text
+    extracted from PDFs is padded; neither helps the model.
+    """
+    lines = (_SPACES.sub(' ', line).strip() for line in text.split('\n'))
+    return _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def _line_key(line: str) -> str:
+    return _SPACES.sub(' ', _PAGE_NUMBER.sub('page #', line.lower())).strip()
+
+
+def deduplicate(text: str) -> str:
+    """
+    Keep only the first of lines occurring BOILERPLATE_REPEATS times or
+    more, ignoring case and page numbers: page headers and footers, and
+    disclaimers repeated on every page. Lines differing in any other
+    number ("Maximum height: 35 feet", "... 45 feet") are all kept.
+    """
+    lines = text.split('\n')
+    keys = [_line_key(line) for line in lines]
+    counts = Counter(key for key in keys if len(key) >= MIN_BOILERPLATE_CHARS)
+    seen = set()
+    kept = []
+    for line, key in zip(lines, keys):
+        if counts[key] >= BOILERPLATE_REPEATS:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return '\n'.join(kept)
+
+
+def _units(text: str) -> List[str]:
+    """Paragraphs, with long ones split into lines (lists) or else sentences"""
+    units = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= MAX_UNIT_TOKENS:
+            units.append(paragraph)
+        elif '\n' in paragraph:
+            for line in paragraph.split('\n'):
+                units.extend(_units(line))
+        else:
+            units.extend(sentence for sentence in _SENTENCE_END.split(paragraph) if sentence)
+    return units
+
+
+def _cut(text: str, budget: int) -> str:
+    """The start of ``text`` within ``budget`` tokens, ending at a word boundary"""
+    if budget <= 0:
+        return ''
+    limit = budget * CHARS_PER_TOKEN
+    return text[:int(limit)].rsplit(' ', 1)[0]
+
+
+def _relevance(unit: str, terms) -> float:
+    lower = unit.lower()
+    return sum(lower.count(term) for term in terms) / max(estimate_tokens(unit), 1)
+
+
+def trim(text: str, budget: int, terms=PLANNING_TERMS) -> str:
+    """
+    Cut ``text`` to about ``budget`` tokens by extraction: the opening is
+    kept, then the passages densest in ``terms``, in their original order,
+    with a marker where passages were left out. The result never exceeds
+    ``budget``; it is empty when the budget cannot hold a marker.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    units = _units(text)
+    marker_tokens = estimate_tokens('[... 00000 tokens omitted ...]')
+    if not units or budget <= marker_tokens:
+        return ''
+
+    selected = {0}
+    used = estimate_tokens(units[0]) + marker_tokens
+    if used > budget:
+        opening = _cut(units[0], budget - marker_tokens)
+        return f'{opening} [...]' if opening else ''
+
+    ranked = sorted(range(1, len(units)), key=lambda index: _relevance(units[index], terms), reverse=True)
+    for index in ranked:
+        cost = estimate_tokens(units[index]) + marker_tokens
+        if used + cost <= budget:
+            selected.add(index)
+            used += cost
+
+    parts = []
+    omitted = 0
+    for index, unit in enumerate(units):
+        if index in selected:
+            if omitted:
+                parts.append(f'[... {omitted} tokens omitted ...]')
+                omitted = 0
+            parts.append(unit)
+        else:
+            omitted += estimate_tokens(unit)
+    if omitted:
+        parts.append(f'[... {omitted} tokens omitted ...]')
+    return '\n\n'.join(parts)
+
+
+def text_block(text: str, cache: bool = False) -> dict:
+    """A text content block of the messages API, optionally ending a cached prefix"""
+    block = {'type': 'text', 'text': text}
+    if cache:
+        block['cache_control'] = CACHE_CONTROL
+    return block
+
+
+class Prompt(NamedTuple):
+    text: str
+    estimated_tokens: int
+    trimmed: bool
+    # (text, ends a cached prefix) per content block
+    blocks: Tuple[Tuple[str, bool], ...] = ()
+
+    def content(self) -> Union[str, List[dict]]:
+        """Message content: the plain text, or text blocks when part of it is cacheable"""
+        if not any(cached for _, cached in self.blocks):
+            return self.text
+        return [text_block(text, cached) for text, cached in self.blocks]
+
+
+class _Section(NamedTuple):
+    text: str
+    title: Optional[str]
+    trimmable: bool
+    max_tokens: Optional[int]
+    cache: bool
+
+
+class PromptBuilder:
+    """
+    Assembles a user prompt within a token budget:
+
+        prompt = (PromptBuilder(budget=6000)
+                  .add(instructions)
+                  .add(document_text, title='Document Content', trim=True)
+                  .build())
+
+    Sections are cleaned and kept in the order added. Fixed sections are
+    kept whole, even past the budget; trimmable ones (documents, context)
+    share what is left of it, small ones whole and large ones equally, and
+    are deduplicated before they are trimmed, or dropped when nothing is
+    left. A section added with ``cache=True`` ends a
+    cacheable prefix, so add the parts shared between calls (a document
+    analyzed several ways) before the parts that vary.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._sections: List[_Section] = []
+
+    def add(self, text: str, title: Optional[str] = None, trim: bool = False,
+            max_tokens: Optional[int] = None, cache: bool = False) -> 'PromptBuilder':
+        text = clean(text or '')
+        if text:
+            self._sections.append(_Section(text, title, trim, max_tokens, cache))
+        return self
+
+    def _allocate(self, sizes: List[int], caps: List[int], available: int) -> List[int]:
+        """Shares of ``available`` tokens: whole for sections within an equal share, equal shares for the rest"""
+        wanted = [min(size, cap) for size, cap in zip(sizes, caps)]
+        shares = [0] * len(wanted)
+        pending = sorted(range(len(wanted)), key=lambda index: wanted[index])
+        while pending:
+            share = max(available, 0) // len(pending)
+            index = pending.pop(0)
+            shares[index] = min(wanted[index], share)
+            available -= shares[index]
+        return shares
+
+    def build(self) -> Prompt:
+        trimmable = [index for index, section in enumerate(self._sections) if section.trimmable]
+        fixed_tokens = sum(self._render_tokens(section.title, section.text)
+                           for section in self._sections if not section.trimmable)
+        headings = sum(self._render_tokens(self._sections[index].title, '') for index in trimmable)
+
+        sizes = [estimate_tokens(self._sections[index].text) for index in trimmable]
+        caps = [self._sections[index].max_tokens or size for index, size in zip(trimmable, sizes)]
+        shares = self._allocate(sizes, caps, self.budget - fixed_tokens - headings)
+
+        texts = [section.text for section in self._sections]
+        trimmed = False
+        for index, size, share in zip(trimmable, sizes, shares):
+            if share < size:
+                # Over its share: boilerplate goes first, then trimming
+                texts[index] = trim(deduplicate(texts[index]), share)
+                trimmed = True
+
+        blocks, current = [], []
+        for section, text in zip(self._sections, texts):
+            if text:
+                current.append(f'{section.title}:\n{text}' if section.title else text)
+            if section.cache and current:
+                blocks.append(('\n\n'.join(current), True))
+                current = []
+        if current:
+            blocks.append(('\n\n'.join(current), False))
+        prompt = '\n\n'.join(text for text, _ in blocks)
+        return Prompt(prompt, estimate_tokens(prompt), trimmed, tuple(blocks))
+
+    @staticmethod
+    def _render_tokens(title: Optional[str], text: str) -> int:
+        return estimate_tokens(f'{title}:\n\n\n' if title else '\n\n') + estimate_tokens(text)
@@ -0,0 +1,96 @@
+"""
+Model Routing for Claude
+Sends each Claude call to a fast, cheap model or a deep one, by the call
+(endpoint), the size of its input and the planning terms in it, with output
+token caps and list prices per tier
+"""
+
+from typing import Dict, NamedTuple
+
+from django.conf import settings
+
+from .prompting import estimate_tokens
+
+FAST = 'fast'
+DEEP = 'deep'
+
+# Planning terms that make a question complex. Questions with none are
+# answered by the local AI; Claude answers those with one on the fast tier
+# and those with several on the deep tier.
+COMPLEX_KEYWORDS = [
+    'variance', 'conditional use', 'environmental impact', 'statewide goals',
+    'comprehensive plan', 'legal interpretation', 'precedent', 'appeal',
+    'hearing', 'testimony', 'findings', 'conditions of approval'
+]
+DEEP_KEYWORD_COUNT = 2
+
+# Calls always routed to the deep tier: long, structured professional output
+DEEP_CALLS = ('staff_report', 'statewide_goals')
+
+# Inputs larger than this (question or document) go to the deep tier.
+# Documents are routed by size alone, so one document analyzed several ways
+# stays on one model and keeps reusing its prompt cache entry.
+FAST_INPUT_TOKENS = {
+    'question': 1500,
+    'document': 4000,
+}
+
+
+class Tier(NamedTuple):
+    name: str
+    model: str
+    # Output token cap per call
+    max_tokens: Dict[str, int]
+    # List prices in USD per million tokens; cache writes cost 1.25 times
+    # the input price and cache reads 0.1 times
+    input_price: float
+    output_price: float
+
+    def cost(self, usage) -> float:
+        """Estimated USD cost of a response's ``usage``"""
+        count = lambda kind: getattr(usage, kind, 0) or 0
+        input_cost = (count('input_tokens') + 1.25 * count('cache_creation_input_tokens')
+                      + 0.1 * count('cache_read_input_tokens')) * self.input_price
+        return (input_cost + count('output_tokens') * self.output_price) / 1_000_000
+
+
+DEFAULT_TIERS = {
+    FAST: Tier(FAST, 'claude-3-5-haiku-20241022', {
+        'question': 1000,
+        'document': 2000,
+        'staff_report': 2000,
+        'statewide_goals': 2000,
+    }, input_price=0.80, output_price=4.00),
+    DEEP: Tier(DEEP, 'claude-3-5-sonnet-20241022', {
+        'question': 2000,
+        'document': 3000,
+        'staff_report': 4000,
+        'statewide_goals': 3500,
+    }, input_price=3.00, output_price=15.00),
+}
+
+
+def model_tiers() -> Dict[str, Tier]:
+    """The tiers, with models overridden by the CLAUDE_MODELS setting ({'fast': ..., 'deep': ...})"""
+    models = getattr(settings, 'CLAUDE_MODELS', {})
+    return {name: tier._replace(model=models.get(name) or tier.model) for name, tier in DEFAULT_TIERS.items()}
+
+
+def complexity_terms(text: str) -> int:
+    lower = text.lower()
+    return sum(keyword in lower for keyword in COMPLEX_KEYWORDS)
+
+
+def is_complex_question(question: str) -> bool:
+    return complexity_terms(question) > 0
+
+
+def route(call: str, text: str = '') -> str:
+    """The tier for a ``call`` on ``text``, its variable input (question or document)"""
+    if call in DEEP_CALLS:
+        return DEEP
+    if estimate_tokens(text) > FAST_INPUT_TOKENS.get(call, 0):
+        return DEEP
+    if call == 'question' and complexity_terms(text) >= DEEP_KEYWORD_COUNT:
+        return DEEP
+    return FAST
@@ -0,0 +1,143 @@
+"""
+Service Registry for CiviAI
+Builds the heavy AI / integration objects once per process, on first use,
+with warm-up at worker boot and a reload hook
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Union
+
+from django.utils.module_loading import import_string
+
+from .cache import SERVICES, invalidate_namespaces, namespace_version
+
+logger = logging.getLogger(__name__)
+
+# How often (seconds) a process checks whether a reload was requested
+RELOAD_CHECK_INTERVAL = 1.0
+
+_MISSING = object()
+
+
+class ServiceRegistry:
+    """
+    Named, lazily built singletons. Factories may be given as dotted paths
+    so registering a service does not import its module.
+    """
+
+    def __init__(self, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self._factories: Dict[str, Union[str, Callable]] = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+        self._generation = None
+        self._checked_at = 0.0
+        self.check_interval = check_interval
+
+    def register(self, name: str, factory: Union[str, Callable]):
+        self._factories[name] = factory
+
+    def names(self):
+        return list(self._factories)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str):
+        """The process-wide instance of a service, built on first use"""
+        self._check_reload()
+        instance = self._instances.get(name, _MISSING)
+        if instance is _MISSING:
+            with self._lock:
+                instance = self._instances.get(name, _MISSING)
+                if instance is _MISSING:
+                    try:
+                        factory = self._factories[name]
+                    except KeyError:
+                        raise LookupError(f"Unknown service: {name}")
+                    if isinstance(factory, str):
+                        factory = import_string(factory)
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Build services ahead of the first request (e.g. at worker boot).
+        Returns build time in milliseconds per service; a service that fails
+        to build is logged and left to be retried on first use.
+        """
+        timings = {}
+        for name in names or self.names():
+            started = time.perf_counter()
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Service warm-up failed for {name}: {str(e)}")
+                continue
+            timings[name] = (time.perf_counter() - started) * 1000
+        logger.info('Services warmed up: ' + ', '.join(f'{name} {ms:.1f} ms' for name, ms in timings.items()))
+        return timings
+
+    def reload(self, *names: str):
+        """
+        Drop instances in this process (all when no names are given); they
+        are rebuilt on next use. Requests already holding one keep it.
+        """
+        with self._lock:
+            for name in names or list(self._instances):
+                self._instances.pop(name, None)
+
+    @contextmanager
+    def override(self, **factories: Union[str, Callable]):
+        """
+        Build services from other factories inside the block (e.g. stubs in
+        benchmarks). Every instance is dropped on entry and exit, so services
+        built from an overridden one pick up the replacement.
+        """
+        with self._lock:
+            saved = dict(self._factories)
+            self._factories.update(factories)
+            self.reload()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._factories = saved
+                self.reload()
+
+    def request_reload(self):
+        """Ask every process to drop its instances (e.g. after a settings or data change)"""
+        invalidate_namespaces(SERVICES)
+
+    def _check_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            generation = namespace_version(SERVICES)
+        except Exception:
+            # The cache being unavailable must not take the services down with it
+            return
+        if self._generation is None:
+            self._generation = generation
+        elif generation != self._generation:
+            self._generation = generation
+            self.reload()
+
+
+registry = ServiceRegistry()
+
+registry.register('knowledge_index', 'permitting.knowledge_index.load_configured_index')
+registry.register('compliance_engine', 'permitting.ai_assistant.ComplianceEngine')
+registry.register('claude', 'permitting.claude_service.ClaudeService')
+registry.register('mcp', 'permitting.mcp_integration.MCPService')
+registry.register('advanced_compliance', 'permitting.advanced_compliance.AdvancedComplianceEngine')
+registry.register('document_analyzer', 'permitting.document_analyzer.DocumentAnalyzer')
+
+
+def get_service(name: str):
+    return registry.get(name)
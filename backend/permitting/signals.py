@@ -0,0 +1,28 @@
+"""
+Cache Invalidation Signals for CiviAI
+Bump cache namespace versions when the data behind them changes
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import ANSWERED_QUESTIONS, PERMIT_TYPES, ZONING_RULES, invalidate_namespaces
+from .models import AnsweredQuestion, PermitType, ZoningRule
+
+
+@receiver([post_save, post_delete], sender=ZoningRule)
+def invalidate_zoning_rules(sender, **kwargs):
+    invalidate_namespaces(ZONING_RULES)
+
+
+@receiver([post_save, post_delete], sender=PermitType)
+def invalidate_permit_types(sender, **kwargs):
+    invalidate_namespaces(PERMIT_TYPES)
+
+
+@receiver([post_save, post_delete], sender=AnsweredQuestion)
+def invalidate_answered_questions(sender, created=False, **kwargs):
+    # New answers are added to the answer indexes incrementally
+    # (answer_cache.store); only edits and deletes need a rebuild
+    if not created:
+        invalidate_namespaces(ANSWERED_QUESTIONS)
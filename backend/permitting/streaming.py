@@ -0,0 +1,76 @@
+"""
+Server-Sent Events for CiviAI
+Relays Claude's answers as they are generated, so the first words reach the
+browser within a second or two instead of after the whole answer
+"""
+
+import json
+import logging
+from typing import Callable, Iterable, Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data) -> bytes:
+    """One event with JSON data; JSON never contains a raw newline, so one data line"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    text/event-stream, for views that stream (event_stream_response).
+    Responses such a view returns whole (validation errors, answers not from
+    Claude) become a single 'done' event, or an 'error' event for error
+    statuses, so a streaming client handles one format.
+    """
+
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        failed = response is not None and response.status_code >= 400
+        return sse_event('error' if failed else 'done', data)
+
+
+def wants_event_stream(request) -> bool:
+    """Whether content negotiation picked EventStreamRenderer for a DRF request"""
+    return getattr(request, 'accepted_renderer', None) is not None and \
+        request.accepted_renderer.format == EventStreamRenderer.format
+
+
+def stream_events(chunks: Iterable[str], meta: dict, done: Callable[[str], dict],
+                  fallback: Optional[Callable[[], dict]] = None) -> Iterator[bytes]:
+    """
+    The events of one streamed answer: 'meta', a 'delta' per piece of text,
+    then 'done' with done(full text). If the stream fails part way, an
+    'error' event follows the text so far, then 'done' with fallback() when
+    there is one; its answer replaces the streamed text.
+    """
+    yield sse_event('meta', meta)
+    parts = []
+    try:
+        for text in chunks:
+            parts.append(text)
+            yield sse_event('delta', {'text': text})
+        body = done(''.join(parts))
+    except Exception as e:
+        logger.error(f"Streaming {meta.get('source', 'response')} failed: {str(e)}")
+        yield sse_event('error', {'error': str(e), 'success': False})
+        if fallback is not None:
+            yield sse_event('done', fallback())
+        return
+    yield sse_event('done', body)
+
+
+def event_stream_response(events: Iterator[bytes]) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx (and proxies honouring it) from buffering the whole stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
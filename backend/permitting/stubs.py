@@ -0,0 +1,371 @@
+"""
+Stub Claude and MCP Backends for CiviAI
+In-process stand-ins for the benchmarks, and a local HTTP server speaking
+the Anthropic messages API, streamed or not, with injected latency, jitter
+and errors for load testing (manage.py run_claude_stub)
+"""
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+STUB_ANSWER = (
+    "Based on the project details, the proposal appears consistent with the applicable zoning "
+    "standards. Confirm setbacks on the submitted site plan, verify lot coverage against the "
+    "district maximum, and note any floodplain or riparian overlay conditions before approval."
+)
+
+# Project keywords that make the stub MCP server flag a goal for review
+REVIEW_KEYWORDS = {
+    5: ('riparian', 'river', 'wetland', 'tree'),
+    6: ('septic', 'storm', 'drainage'),
+    7: ('floodplain', 'flood'),
+    10: ('housing', 'dwelling', 'adu'),
+    12: ('driveway', 'parking', 'road'),
+}
+
+# Fast-tier models (Haiku) answer in this fraction of the stub latency,
+# about their speed relative to the deep tier
+FAST_MODEL_LATENCY = 0.4
+
+# Words per text delta of a streamed stub answer
+STREAM_CHUNK_WORDS = 3
+
+# Errors the stub server injects, as the Anthropic API reports them
+INJECTED_ERRORS = (
+    (529, 'overloaded_error', 'Overloaded'),
+    (500, 'api_error', 'Internal server error'),
+)
+
+
+class PromptCache:
+    """
+    Anthropic's prompt cache as the stubs see it: a prefix ending at a block
+    with cache_control is read from the cache when the same prefix was sent
+    within the last five minutes, and written otherwise
+    """
+
+    TTL = 300
+
+    def __init__(self):
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def split(self, system, messages):
+        """Characters of the prompt (read from cache, written to cache, uncached)"""
+        blocks = [{'type': 'text', 'text': system}] if isinstance(system, str) else list(system or [])
+        for message in messages:
+            content = message['content']
+            blocks += [{'type': 'text', 'text': content}] if isinstance(content, str) else content
+        sizes = [len(block.get('text', '')) if block.get('type') == 'text' else len(json.dumps(block))
+                 for block in blocks]
+
+        breakpoints = [index for index, block in enumerate(blocks) if block.get('cache_control')]
+        now = time.monotonic()
+        read = written = 0
+        with self._lock:
+            for index in breakpoints:
+                key = hashlib.sha256(json.dumps(blocks[:index + 1], sort_keys=True).encode()).hexdigest()
+                prefix = sum(sizes[:index + 1])
+                if self._expires.get(key, 0) > now:
+                    read = prefix
+                self._expires[key] = now + self.TTL
+            if breakpoints:
+                written = sum(sizes[:breakpoints[-1] + 1]) - read
+        return read, written, sum(sizes) - read - written
+
+
+def latency_scale(model: str) -> float:
+    return FAST_MODEL_LATENCY if 'haiku' in model else 1.0
+
+
+def stub_message(model: str, max_tokens: int, messages: list, system='',
+                 prompt_cache: Optional[PromptCache] = None) -> dict:
+    """
+    A messages API response with the canned answer and a token usage
+    estimated from the prompt size, split by cache use when ``prompt_cache``
+    is given
+    """
+    if prompt_cache is not None:
+        read, written, uncached = prompt_cache.split(system, messages)
+    else:
+        read, written, uncached = 0, 0, sum(
+            len(part if isinstance(part, str) else json.dumps(part))
+            for part in [system] + [message['content'] for message in messages]
+        )
+    return {
+        'id': f'msg_stub_{uuid.uuid4().hex[:24]}',
+        'type': 'message',
+        'role': 'assistant',
+        'model': model,
+        'content': [{'type': 'text', 'text': STUB_ANSWER}],
+        'stop_reason': 'end_turn',
+        'stop_sequence': None,
+        'usage': {
+            'input_tokens': uncached // 4,
+            'cache_read_input_tokens': read // 4,
+            'cache_creation_input_tokens': written // 4,
+            'output_tokens': min(max_tokens, len(STUB_ANSWER) // 4),
+        },
+    }
+
+
+def stub_stream_events(message: dict):
+    """
+    The (event, data) pairs of the messages API streaming ``message``: the
+    input usage up front, the text in deltas of STREAM_CHUNK_WORDS words,
+    then the stop reason and output usage
+    """
+    start = {**message, 'content': [], 'stop_reason': None,
+             'usage': {**message['usage'], 'output_tokens': 1}}
+    yield 'message_start', {'type': 'message_start', 'message': start}
+    yield 'content_block_start', {'type': 'content_block_start', 'index': 0,
+                                  'content_block': {'type': 'text', 'text': ''}}
+    words = message['content'][0]['text'].split(' ')
+    for index in range(0, len(words), STREAM_CHUNK_WORDS):
+        text = ' '.join(words[index:index + STREAM_CHUNK_WORDS])
+        yield 'content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                      'delta': {'type': 'text_delta', 'text': text if index == 0 else ' ' + text}}
+    yield 'content_block_stop', {'type': 'content_block_stop', 'index': 0}
+    yield 'message_delta', {'type': 'message_delta',
+                            'delta': {'stop_reason': message['stop_reason'], 'stop_sequence': None},
+                            'usage': {'output_tokens': message['usage']['output_tokens']}}
+    yield 'message_stop', {'type': 'message_stop'}
+
+
+class Faults:
+    """
+    Latency of ``latency`` +/- ``jitter`` seconds and a failure rate, drawn
+    from one seeded generator so a run can be repeated
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self, scale: float = 1.0):
+        with self._lock:
+            delay = max(self.latency + self._rng.uniform(-self.jitter, self.jitter), 0) * scale
+        if delay:
+            time.sleep(delay)
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def choice(self, options):
+        with self._lock:
+            return self._rng.choice(options)
+
+
+class StubAnthropicClient:
+    """
+    Stands in for anthropic.Anthropic: messages.create() waits ``latency``
+    seconds (less for fast-tier models) and returns the canned answer;
+    messages.stream() waits as long before its first text, then streams
+    the answer without delay
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages = self
+        self.prompt_cache = PromptCache()
+
+    def create(self, model, max_tokens, messages, system='', **kwargs):
+        if self.latency:
+            time.sleep(self.latency * latency_scale(model))
+        return self._message(stub_message(model, max_tokens, messages, system, self.prompt_cache))
+
+    def stream(self, model, max_tokens, messages, system='', **kwargs):
+        return StubMessageStream(self, stub_message(model, max_tokens, messages, system, self.prompt_cache))
+
+    @staticmethod
+    def _message(message: dict):
+        return SimpleNamespace(
+            model=message['model'],
+            stop_reason=message['stop_reason'],
+            content=[SimpleNamespace(**block) for block in message['content']],
+            usage=SimpleNamespace(**message['usage']),
+        )
+
+
+class StubMessageStream:
+    """The context manager messages.stream() returns: text_stream, then get_final_message()"""
+
+    def __init__(self, client: StubAnthropicClient, message: dict):
+        self._client = client
+        self._message = message
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @property
+    def text_stream(self):
+        if self._client.latency:
+            time.sleep(self._client.latency * latency_scale(self._message['model']))
+        for event, data in stub_stream_events(self._message):
+            if event == 'content_block_delta':
+                yield data['delta']['text']
+
+    def get_final_message(self):
+        return self._client._message(self._message)
+
+
+class StubResponse:
+    def __init__(self, status_code: int, payload: dict):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+
+class StubMCPSession:
+    """
+    Stands in for the requests session of MCPService. Answers the compliance
+    and goal endpoints with responses shaped like the MCP server's; other
+    paths, including the applicability matrix, get a 404 so callers take
+    their fallback.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def request(self, method, url, json=None, params=None, timeout=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlsplit(url).path
+        if path == '/mcp/health':
+            return StubResponse(200, {'success': True, 'status': 'healthy'})
+        if path == '/mcp/check-compliance':
+            return StubResponse(200, self._check_compliance(json or {}))
+        if path == '/mcp/applicable-goals':
+            goals = self._goals(json or {})
+            return StubResponse(200, {
+                'success': True,
+                'applicable_goals': [{'goal_number': number} for number in goals],
+                'count': len(goals),
+            })
+        return StubResponse(404, {'success': False, 'error': 'Not found'})
+
+    def _goals(self, payload):
+        description = payload.get('project_description', '').lower()
+        return [1, 2] + [number for number, keywords in REVIEW_KEYWORDS.items()
+                         if any(keyword in description for keyword in keywords)]
+
+    def _check_compliance(self, payload):
+        goals = self._goals(payload)
+        results = [{
+            'goal': {'goal_number': number, 'title': f'Goal {number}'},
+            'compliance': {'status': 'NEEDS_REVIEW' if number in REVIEW_KEYWORDS else 'COMPLIANT'},
+        } for number in goals]
+        compliant = sum(result['compliance']['status'] == 'COMPLIANT' for result in results)
+        return {
+            'success': True,
+            'compliance_results': results,
+            'summary': {
+                'total_goals_checked': len(results),
+                'compliant_goals': compliant,
+                'non_compliant_goals': len(results) - compliant,
+                'compliance_rate': round(compliant / len(results) * 100, 1),
+                'overall_status': 'COMPLIANT' if compliant == len(results) else 'NEEDS_REVIEW',
+            },
+        }
+
+
+class AnthropicStubHandler(BaseHTTPRequestHandler):
+    """
+    POST /v1/messages of the Anthropic API, with prompt cache usage
+    reported as the API does and fast-tier models answering sooner. Any API
+    key is accepted. With "stream": true the injected latency comes before
+    the first event, and the deltas follow ``token_interval`` seconds apart.
+    HTTP/1.1 with a Content-Length on every response, or chunked transfer
+    encoding for streams, so the SDK keeps its connections alive as it does
+    against the real API.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'CiviAIClaudeStub/1.0'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if urlsplit(self.path).path != '/v1/messages':
+            return self._error(404, 'not_found_error', f'Unknown path {self.path}')
+        try:
+            payload = json.loads(body)
+            message = stub_message(
+                payload['model'], payload['max_tokens'], payload['messages'], payload.get('system', ''),
+                self.server.prompt_cache,
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            return self._error(400, 'invalid_request_error', f'Invalid request: {e}')
+
+        faults = self.server.faults
+        faults.wait(latency_scale(payload['model']))
+        if faults.should_fail():
+            return self._error(*faults.choice(INJECTED_ERRORS))
+        if payload.get('stream'):
+            return self._stream(message)
+        self._send(200, message)
+
+    def _stream(self, message):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('request-id', f'req_stub_{uuid.uuid4().hex[:24]}')
+        self.end_headers()
+        for event, data in stub_stream_events(message):
+            if event == 'content_block_delta' and self.server.token_interval:
+                time.sleep(self.server.token_interval)
+            self._write_chunk(f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode())
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _error(self, status_code, error_type, message):
+        self._send(status_code, {'type': 'error', 'error': {'type': error_type, 'message': message}})
+
+    def _send(self, status_code, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('request-id', f'req_stub_{uuid.uuid4().hex[:24]}')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def claude_stub_server(host: str = '127.0.0.1', port: int = 8081, faults: Optional[Faults] = None,
+                       token_interval: float = 0.0) -> ThreadingHTTPServer:
+    """A server for AnthropicStubHandler, one thread per connection; call serve_forever() on it"""
+    server = ThreadingHTTPServer((host, port), AnthropicStubHandler)
+    server.daemon_threads = True
+    server.faults = faults or Faults()
+    server.token_interval = token_interval
+    server.prompt_cache = PromptCache()
+    return server
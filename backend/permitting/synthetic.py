@@ -0,0 +1,343 @@
+"""
+Synthetic Municipality Generator for CiviAI
+Builds a reproducible city (parcels, permit types, zoning rules,
+applications, documents) at a configurable scale for benchmarks and load tests
+"""
+
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, NamedTuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import PERMIT_TYPES, ZONING_RULES, invalidate_namespaces
+from .models import ApplicationDocument, ComplianceCheck, PermitApplication, PermitType, Property, ZoningRule
+
+
+class CityScale(NamedTuple):
+    parcels: int
+    permit_types: int
+    rules_per_district: int
+    applications: int
+    documents: int
+
+
+SCALES = {
+    'small': CityScale(parcels=1000, permit_types=12, rules_per_district=5, applications=5000, documents=1000),
+    'medium': CityScale(parcels=10000, permit_types=25, rules_per_district=8, applications=50000, documents=10000),
+    'large': CityScale(parcels=100000, permit_types=50, rules_per_district=12, applications=500000, documents=50000),
+}
+
+# The permit types of load_sample_data; fees and the compliance checks
+# branch on these codes, so every synthetic city has them
+STANDARD_PERMIT_TYPES = [
+    ('SFR', 'Single Family Residence', Decimal('500.00'), Decimal('0.25'), True, True, 30, False),
+    ('ADD', 'Residential Addition', Decimal('200.00'), Decimal('0.15'), False, False, 14, True),
+    ('DECK', 'Deck/Patio', Decimal('75.00'), Decimal('0.05'), False, False, 7, True),
+    ('FENCE', 'Fence', Decimal('50.00'), Decimal('0'), False, False, 3, True),
+    ('ADU', 'Accessory Dwelling Unit', Decimal('300.00'), Decimal('0.20'), True, False, 21, False),
+    ('COM', 'Commercial Building', Decimal('1000.00'), Decimal('0.50'), True, True, 45, False),
+]
+
+# (rule_type, description, parameters) for every district
+STANDARD_RULES = [
+    ('setback', 'Minimum setback requirements', {'front': 20, 'rear': 10, 'side': 5}),
+    ('height_limit', 'Maximum building height', {'max_feet': 35, 'max_stories': 2}),
+    ('lot_coverage', 'Maximum lot coverage', {'max_percentage': 40}),
+]
+
+STREETS = [
+    'Main Street', 'River Road', 'Commercial Avenue', 'Oak Street', 'Pine Avenue', 'Cedar Lane',
+    'Rogue River Drive', 'Highway 62', 'Maple Court', 'Madrone Way', 'Lakeview Terrace', 'Elk Trail',
+    'Crater Lake Avenue', 'Meadow Lane', 'Fir Street', 'Birch Loop', 'Stagecoach Road', 'Butte Falls Road',
+]
+
+# Zoning mix of a small Oregon city; residential dominates
+ZONING_WEIGHTS = {'R1': 45, 'R2': 20, 'R3': 8, 'CG': 10, 'I': 4, 'A': 10, 'PF': 3}
+
+# Most applications are closed; active ones are a small slice
+STATUS_WEIGHTS = {
+    'DRAFT': 5, 'SUBMITTED': 4, 'INCOMPLETE': 2, 'UNDER_REVIEW': 4,
+    'APPROVED': 55, 'APPROVED_WITH_CONDITIONS': 10, 'DENIED': 10, 'WITHDRAWN': 10,
+}
+REVIEWED_STATUSES = ('APPROVED', 'APPROVED_WITH_CONDITIONS', 'DENIED')
+
+# Phrases project descriptions are built from; they include the keywords the
+# statewide goal matching looks for (river, housing, road, ...)
+PROJECT_PHRASES = [
+    'new single family home', 'two story addition', 'detached garage', 'covered deck', 'cedar fence',
+    'accessory dwelling unit', 'retail building', 'parking lot expansion', 'riverfront patio',
+    'driveway access from the county road', 'housing for seasonal workers', 'solar panel installation',
+    'septic system replacement', 'floodplain elevation certificate', 'tree removal near the river',
+    'storm drainage improvements', 'farm equipment storage barn', 'public park restrooms',
+]
+
+DOCUMENT_SENTENCES = [
+    'The proposed structure maintains a front setback of {front} feet and a side setback of {side} feet.',
+    'Building height will not exceed {height} feet measured from average grade.',
+    'Lot coverage after construction is estimated at {coverage} percent of the parcel.',
+    'Stormwater will be retained on site through a drywell sized for the new impervious area.',
+    'The site is served by municipal water and an on-site septic system.',
+    'No work is proposed within the riparian buffer along the Rogue River.',
+    'Two off-street parking spaces are provided on the existing gravel driveway.',
+    'Construction will follow the Oregon Residential Specialty Code.',
+    'Erosion control fencing will be installed before any ground disturbance.',
+    'The applicant requests review under the standard {days} day timeline.',
+]
+
+BATCH_SIZE = 5000
+
+
+class GeneratedCity(NamedTuple):
+    """Primary keys of what was generated, for picking benchmark inputs"""
+    property_ids: List[int]
+    permit_type_ids: List[int]
+    application_ids: List[int]
+    counts: Dict[str, int]
+    seconds: float
+
+
+def project_description(rng: random.Random) -> str:
+    return ', '.join(rng.sample(PROJECT_PHRASES, rng.randint(1, 3))).capitalize()
+
+
+def project_details(rng: random.Random) -> dict:
+    """Inputs the fee and compliance checks read, some deliberately out of bounds"""
+    return {
+        'square_footage': rng.randint(80, 4000),
+        'project_value': rng.randint(2000, 900000),
+        'front_setback': rng.randint(5, 40),
+        'building_height': rng.randint(10, 45),
+        'lot_coverage': rng.randint(10, 60),
+        'stories': rng.randint(1, 3),
+        'bedrooms': rng.randint(0, 5),
+        'parking_spaces': rng.randint(0, 4),
+        'description': project_description(rng),
+    }
+
+
+def document_text(rng: random.Random, words: int = 1500) -> str:
+    """Plain-text planning document of roughly ``words`` words"""
+    sentences = []
+    count = 0
+    while count < words:
+        sentence = rng.choice(DOCUMENT_SENTENCES).format(
+            front=rng.randint(5, 40), side=rng.randint(3, 15), height=rng.randint(12, 40),
+            coverage=rng.randint(10, 60), days=rng.choice([7, 14, 21, 30]),
+        )
+        sentences.append(sentence)
+        count += len(sentence.split())
+    return ' '.join(sentences)
+
+
+def _insert(model, objects):
+    """
+    Insert through one prepared statement per batch. bulk_create would
+    overwrite the timestamps (auto_now_add), which the generator spreads over
+    two years, and is much slower at this size. Objects must have every
+    timestamp set.
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        for offset in range(0, len(objects), BATCH_SIZE):
+            cursor.executemany(sql, [
+                [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields]
+                for obj in objects[offset:offset + BATCH_SIZE]
+            ])
+
+
+def generate_city(scale: CityScale, seed: int = 42, prefix: str = 'SYN') -> GeneratedCity:
+    """
+    Create a synthetic city. Parcels and extra permit types are keyed by
+    ``prefix`` (tax lots PREFIX-0000001, codes PREFIX-PT1, ...), so a city can
+    be generated next to real data; the standard permit types and zoning
+    rules are reused when they already exist.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    now = timezone.now()
+
+    with transaction.atomic():
+        permit_types = _generate_permit_types(scale.permit_types, prefix)
+        rules = _generate_zoning_rules(scale.rules_per_district, prefix)
+        property_ids = _generate_properties(rng, scale.parcels, prefix, now)
+        application_ids = _generate_applications(rng, scale.applications, property_ids, permit_types, now)
+        _generate_documents(rng, scale.documents, application_ids, now)
+
+    # Bulk inserts send no model signals (signals.py)
+    invalidate_namespaces(PERMIT_TYPES, ZONING_RULES)
+
+    return GeneratedCity(
+        property_ids=property_ids,
+        permit_type_ids=[permit_type.id for permit_type in permit_types],
+        application_ids=application_ids,
+        counts={
+            'parcels': len(property_ids),
+            'permit_types': len(permit_types),
+            'zoning_rules': rules,
+            'applications': len(application_ids),
+            'documents': min(scale.documents, len(application_ids)),
+        },
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _generate_permit_types(count, prefix):
+    PermitType.objects.bulk_create([
+        PermitType(
+            code=code, name=name, description=f'{name} permit', base_fee=base_fee,
+            per_square_foot_fee=per_square_foot_fee, requires_public_notice=notice,
+            requires_public_hearing=hearing, standard_review_days=review_days, can_auto_approve=auto_approve,
+        )
+        for code, name, base_fee, per_square_foot_fee, notice, hearing, review_days, auto_approve in STANDARD_PERMIT_TYPES
+    ], ignore_conflicts=True)
+
+    extra = max(count - len(STANDARD_PERMIT_TYPES), 0)
+    PermitType.objects.bulk_create([
+        PermitType(
+            code=f'{prefix}-PT{number}', name=f'Synthetic Permit {number}', description='Synthetic permit type',
+            base_fee=Decimal(50 + 25 * (number % 20)), per_square_foot_fee=Decimal('0.10') if number % 3 else Decimal('0'),
+            per_unit_fee=Decimal('25.00') if number % 4 == 0 else Decimal('0'),
+            standard_review_days=7 * (1 + number % 6), can_auto_approve=number % 2 == 0,
+        )
+        for number in range(1, extra + 1)
+    ], ignore_conflicts=True)
+
+    codes = [row[0] for row in STANDARD_PERMIT_TYPES] + [f'{prefix}-PT{number}' for number in range(1, extra + 1)]
+    return list(PermitType.objects.filter(code__in=codes).order_by('id'))
+
+
+def _generate_zoning_rules(rules_per_district, prefix):
+    rules = []
+    for district in ZONING_WEIGHTS:
+        for rule_type, description, parameters in STANDARD_RULES[:rules_per_district]:
+            rules.append(ZoningRule(
+                zoning_district=district, rule_type=rule_type,
+                rule_description=f'{description} for {district} zone', rule_parameters=parameters,
+            ))
+        for number in range(1, rules_per_district - len(STANDARD_RULES) + 1):
+            rules.append(ZoningRule(
+                zoning_district=district, rule_type=f'{prefix.lower()}_rule_{number}',
+                rule_description=f'Synthetic rule {number} for {district} zone',
+                rule_parameters={'max_value': 10 * number},
+            ))
+    ZoningRule.objects.bulk_create(rules, ignore_conflicts=True)
+    return len(rules)
+
+
+def _generate_properties(rng, count, prefix, now):
+    districts = list(ZONING_WEIGHTS)
+    weights = list(ZONING_WEIGHTS.values())
+    properties = []
+    for number in range(1, count + 1):
+        floodplain = rng.random() < 0.12
+        properties.append(Property(
+            address=f'{100 + number % 9900} {STREETS[number % len(STREETS)]}',
+            tax_lot_number=f'{prefix}-{number:07d}',
+            latitude=Decimal(f'{42.60 + rng.random() * 0.03:.7f}'),
+            longitude=Decimal(f'{-122.83 + rng.random() * 0.04:.7f}'),
+            acres=Decimal(f'{rng.uniform(0.1, 5):.4f}'),
+            zoning=rng.choices(districts, weights)[0],
+            floodplain_overlay=floodplain,
+            # Floodplain parcels are mostly along the river
+            riparian_overlay=rng.random() < (0.6 if floodplain else 0.04),
+            easements='Standard utility easements along property lines' if rng.random() < 0.3 else '',
+            created_at=now,
+            updated_at=now,
+        ))
+    _insert(Property, properties)
+    return list(
+        Property.objects.filter(tax_lot_number__startswith=f'{prefix}-').order_by('id').values_list('id', flat=True)
+    )
+
+
+def _generate_applications(rng, count, property_ids, permit_types, now):
+    if not property_ids or not permit_types:
+        return []
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    first_id = (PermitApplication.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+
+    applications = []
+    for _ in range(count):
+        permit_type = rng.choice(permit_types)
+        status = rng.choices(statuses, weights)[0]
+        created_at = now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+        square_footage = Decimal(rng.randint(80, 4000))
+        application = PermitApplication(
+            property_id=rng.choice(property_ids),
+            permit_type=permit_type,
+            applicant_name=f'Applicant {rng.randint(1, 99999)}',
+            applicant_email=f'applicant{rng.randint(1, 99999)}@example.com',
+            applicant_phone='541-555-0100',
+            project_description=project_description(rng),
+            project_value=Decimal(rng.randint(2000, 900000)),
+            square_footage=square_footage,
+            status=status,
+            calculated_fee=permit_type.base_fee + square_footage * permit_type.per_square_foot_fee,
+            fee_paid=status != 'DRAFT' and rng.random() < 0.8,
+            compliance_check_passed=rng.random() < 0.6,
+            compliance_issues=[],
+            submitted_at=created_at if status != 'DRAFT' else None,
+            review_completed_at=created_at + timedelta(days=rng.randint(1, 45)) if status in REVIEWED_STATUSES else None,
+        )
+        application.created_at = application.updated_at = created_at
+        applications.append(application)
+
+    _insert(PermitApplication, applications)
+    return list(
+        PermitApplication.objects.filter(id__gte=first_id).order_by('id').values_list('id', flat=True)
+    )
+
+
+def _generate_documents(rng, count, application_ids, now):
+    if not application_ids:
+        return
+    document_types = [code for code, _ in ApplicationDocument.DOCUMENT_TYPES]
+    documents = []
+    for number in range(1, min(count, len(application_ids)) + 1):
+        document_type = rng.choice(document_types)
+        filename = f'{document_type.lower()}_{number}.pdf'
+        document = ApplicationDocument(
+            application_id=rng.choice(application_ids),
+            document_type=document_type,
+            file=f'application_documents/{filename}',
+            filename=filename,
+            file_size=rng.randint(20000, 8000000),
+            ai_processed=rng.random() < 0.3,
+        )
+        document.uploaded_at = now
+        documents.append(document)
+    _insert(ApplicationDocument, documents)
+
+
+def delete_city(prefix: str = 'SYN') -> Dict[str, int]:
+    """
+    Delete a city made by generate_city with the same prefix. The standard
+    permit types and zoning rules it may have added are kept, since other
+    data may use them. Rows go in single DELETE statements; deleting through
+    the ORM would load every row and send a signal per parcel.
+    """
+    applications = PermitApplication.objects.filter(property__tax_lot_number__startswith=f'{prefix}-')
+    querysets = [
+        ('documents', ApplicationDocument.objects.filter(application__in=applications.values('id'))),
+        ('compliance_checks', ComplianceCheck.objects.filter(application__in=applications.values('id'))),
+        ('applications', applications),
+        ('parcels', Property.objects.filter(tax_lot_number__startswith=f'{prefix}-')),
+        ('permit_types', PermitType.objects.filter(code__startswith=f'{prefix}-PT')),
+        ('zoning_rules', ZoningRule.objects.filter(rule_type__startswith=f'{prefix.lower()}_rule_')),
+    ]
+    deleted = {}
+    with transaction.atomic():
+        for name, queryset in querysets:
+            deleted[name] = queryset._raw_delete(queryset.db)
+    invalidate_namespaces(PERMIT_TYPES, ZONING_RULES)
+    return deleted
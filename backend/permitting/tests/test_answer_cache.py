@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from permitting import answer_cache
+from permitting.models import AnsweredQuestion
+
+
+class AnswerCacheTests(TestCase):
+
+    question = 'Do I need a variance to reduce the front setback in R-1?'
+
+    def setUp(self):
+        cache.clear()
+        answer_cache._index = None
+        with self.captureOnCommitCallbacks(execute=True):
+            answer_cache.store(self.question, None, 'Yes, a variance is required.', 'claude-test')
+
+    def other_worker_stores(self, question, **fields):
+        # A row another process inserted, announced through the shared count
+        row = AnsweredQuestion.objects.create(
+            question=question, context_key='', answer='Stored elsewhere.', source='claude-test', **fields
+        )
+        answer_cache._increment(answer_cache.ADDED_KEY)
+        return row
+
+    def test_rewording_is_answered_from_the_cache(self):
+        match = answer_cache.lookup('do i need a variance to reduce the front setback in r1')
+        self.assertIsNotNone(match)
+        self.assertEqual(match.answer, 'Yes, a variance is required.')
+        self.assertGreaterEqual(match.similarity, answer_cache.DEFAULT_SIMILARITY_THRESHOLD)
+
+    def test_different_question_is_not(self):
+        self.assertIsNone(answer_cache.lookup('Do I need a variance to reduce the rear setback in C-G?'))
+
+    def test_threshold_and_context(self):
+        self.assertIsNone(answer_cache.lookup(self.question, threshold=1.01))
+        self.assertIsNone(answer_cache.lookup(self.question, {'property_id': 7}))
+        self.assertIsNotNone(answer_cache.lookup(self.question))
+
+    def test_hits_are_counted(self):
+        answer_cache.reset_stats()
+        answer_cache.lookup(self.question)
+        answer_cache.lookup('When is the planning office open?')
+        stats = answer_cache.stats()
+        self.assertEqual((stats['lookups'], stats['hits'], stats['misses']), (2, 1, 1))
+        self.assertEqual(AnsweredQuestion.objects.get().hit_count, 1)
+
+    def test_answers_stored_elsewhere_are_added_without_a_rebuild(self):
+        index = answer_cache.get_answer_index()
+        self.other_worker_stores('Is a public hearing required for a conditional use permit?')
+
+        self.assertIsNotNone(answer_cache.lookup('Is a public hearing required for a conditional use permit?'))
+        self.assertIs(answer_cache.get_answer_index(), index)
+        self.assertEqual(len(index), 2)
+
+    def test_row_committed_after_a_newer_row_is_added(self):
+        newer = self.other_worker_stores('Is a public hearing required for a conditional use permit?', id=1000)
+        answer_cache.get_answer_index()
+        # Inserted before `newer`, with a lower id, but committed after it
+        late = self.other_worker_stores('Can I appeal a denied building permit?', id=999)
+        AnsweredQuestion.objects.filter(pk=late.pk).update(created_at=newer.created_at - timedelta(seconds=1))
+
+        self.assertIsNotNone(answer_cache.lookup('Can I appeal a denied building permit?'))
+
+    def test_edits_rebuild_the_index(self):
+        index = answer_cache.get_answer_index()
+        AnsweredQuestion.objects.update(is_active=False)
+        row = AnsweredQuestion.objects.get()
+        row.save()
+
+        self.assertIsNot(answer_cache.get_answer_index(), index)
+        self.assertIsNone(answer_cache.lookup(self.question))
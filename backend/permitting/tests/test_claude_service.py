@@ -0,0 +1,28 @@
+from django.test import TestCase
+
+from permitting.claude_service import REFERENCE_TOKENS, STATEWIDE_GOALS, ClaudeService
+from permitting.models import Property, ZoningRule
+from permitting.prompting import estimate_tokens
+
+
+class MunicipalReferenceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        ZoningRule.objects.bulk_create([
+            ZoningRule(
+                zoning_district=district, rule_type=f'standard_{number}',
+                rule_description=f'Development standard {number} applying to new construction in this zone',
+                rule_parameters={'max_feet': number, 'min_feet': number // 2},
+            )
+            for district, _ in Property.ZONING_CHOICES
+            for number in range(200 // len(Property.ZONING_CHOICES) + 1)
+        ])
+
+    def test_goals_survive_trimming(self):
+        reference = ClaudeService(client=object())._build_municipal_reference()
+
+        self.assertIn('[...', reference)
+        for goal in STATEWIDE_GOALS.strip().splitlines():
+            self.assertIn(goal, reference)
+        self.assertLessEqual(estimate_tokens(reference), REFERENCE_TOKENS)
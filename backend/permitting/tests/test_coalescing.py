@@ -0,0 +1,90 @@
+import threading
+import time
+
+from django.db import connection
+from django.test import TransactionTestCase
+from prometheus_client import REGISTRY
+
+from permitting.coalescing import Coalescer
+
+
+class CoalescerTests(TransactionTestCase):
+
+    def shared_calls(self, service):
+        return REGISTRY.get_sample_value('civiai_coalesced_calls_total', {'service': service, 'how': 'in_process'}) or 0
+
+    def test_concurrent_calls_share_one_call(self):
+        # No result cache: followers can only get the result from the call in flight
+        coalescer = Coalescer('test-share', result_seconds=0)
+        key = coalescer.key('/check', {'application': 1})
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'compliant': True}
+
+        def caller():
+            try:
+                results.append(coalescer.call(key, fn))
+            finally:
+                connection.close()
+
+        leader = threading.Thread(target=caller)
+        leader.start()
+        self.assertTrue(started.wait(5))
+        followers = [threading.Thread(target=caller) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while self.shared_calls('test-share') < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.shared_calls('test-share'), 4)
+        self.assertEqual(results, [{'compliant': True}] * 5)
+        self.assertIs(results[0], results[-1])
+
+    def test_followers_get_the_exception(self):
+        coalescer = Coalescer('test-error', result_seconds=0)
+        key = coalescer.key('/check')
+        started, release = threading.Event(), threading.Event()
+        errors = []
+
+        def fn():
+            started.set()
+            release.wait(5)
+            raise ConnectionError('MCP server unavailable')
+
+        def caller():
+            try:
+                coalescer.call(key, fn)
+            except ConnectionError as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=caller)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        threads.append(threading.Thread(target=caller))
+        threads[1].start()
+        deadline = time.monotonic() + 5
+        while self.shared_calls('test-error') < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(errors), 2)
+        self.assertIs(errors[0], errors[1])
+
+    def test_key_ignores_argument_order(self):
+        coalescer = Coalescer('test-key')
+        self.assertEqual(coalescer.key('/check', {'a': 1, 'b': 2}), coalescer.key('/check', {'b': 2, 'a': 1}))
+        self.assertNotEqual(coalescer.key('/check', {'a': 1}), Coalescer('other').key('/check', {'a': 1}))
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from permitting.fees import FeeEngine, FeeSchedule, to_decimal
+from permitting.models import PermitType
+
+
+class FeeEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = FeeEngine([
+            FeeSchedule(1, 'ADD', 'Addition', Decimal('150.00'), Decimal('0.0050'), Decimal('0.00')),
+            FeeSchedule(2, 'MFR', 'Multi-Family', Decimal('99.99'), Decimal('0.0000'), Decimal('25.00')),
+        ])
+
+    def test_quote_rounds_half_up_to_cents(self):
+        quote = self.engine.quote(1, square_footage='1')
+        # 1 sq ft at $0.005 is half a cent
+        self.assertEqual(quote.additional_fees, Decimal('0.01'))
+        self.assertEqual(quote.total_fee, Decimal('150.01'))
+
+    def test_quote_is_exact_for_float_input(self):
+        quote = self.engine.quote(1, square_footage=0.1 + 0.2)
+        self.assertEqual(to_decimal(0.1 + 0.2), Decimal('0.30000000000000004'))
+        self.assertEqual(quote.additional_fees, Decimal('0.00'))
+        self.assertEqual(self.engine.quote(1, square_footage=1234.5).additional_fees, Decimal('6.17'))
+
+    def test_total_is_sum_of_rounded_parts(self):
+        quote = self.engine.quote(2, project_value='250000')
+        self.assertEqual(quote.base_fee, Decimal('99.99'))
+        self.assertEqual(quote.additional_fees, Decimal('25.00'))
+        self.assertEqual(quote.total_fee, quote.base_fee + quote.additional_fees)
+        self.assertEqual([amount for _, amount in quote.breakdown], [Decimal('99.99'), Decimal('25.00')])
+
+    def test_development_quote(self):
+        quote = self.engine.quote_development(1, square_footage=1000, project_value='20000.50')
+        # $0.10/sq ft for an addition, plus 0.5% of the $10,000.50 over the threshold
+        self.assertEqual(quote.additional_fees, Decimal('150.00'))
+
+    def test_invalid_input(self):
+        with self.assertRaises(PermitType.DoesNotExist):
+            self.engine.quote(99)
+        with self.assertRaises(ValueError):
+            self.engine.quote(1, square_footage='lots')
+        self.assertEqual(self.engine.quote_many([
+            {'permit_type_id': 1, 'square_footage': 100},
+            {'permit_type_id': 99},
+            {'permit_type_id': 1, 'project_value': 'nan'},
+        ]), [self.engine.quote(1, 100), None, None])
@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.test import SimpleTestCase
+
+from permitting.knowledge_index import KnowledgeEntry, KnowledgeIndex, load_configured_index, tokenize
+
+
+class TokenizeTests(SimpleTestCase):
+
+    def test_folds_spellings(self):
+        self.assertEqual(tokenize("R-1 zone"), tokenize("r1 zones"))
+        self.assertEqual(tokenize("the property's fees"), ['property', 'fee'])
+        self.assertEqual(tokenize('What are the properties?'), ['property'])
+
+
+class KnowledgeIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = KnowledgeIndex([
+            KnowledgeEntry('permits', 'deck_permit', 'Decks over 30 inches above grade need a building permit.'),
+            KnowledgeEntry('permits', 'fence_permit', 'Fences over 6 feet high need a permit.'),
+            KnowledgeEntry('zoning', 'r1_requirements', 'R-1 allows single-family homes; the front setback is 20 feet.'),
+            KnowledgeEntry('zoning', 'r2_requirements', 'R-2 allows duplexes; the front setback is 15 feet.'),
+            KnowledgeEntry('fees', 'permit_fees', 'Permit fees depend on the permit type and project value.'),
+        ])
+
+    def keys(self, hits):
+        return [hit.entry.key for hit in hits]
+
+    def test_best_match_first(self):
+        self.assertEqual(self.keys(self.index.search('Do I need a permit for my deck?', k=1)), ['deck_permit'])
+        self.assertEqual(self.keys(self.index.search('front setback in R1', k=1)), ['r1_requirements'])
+
+    def test_key_terms_outweigh_body_terms(self):
+        # "fee" is in the permit_fees key; other entries only mention permits
+        self.assertEqual(self.keys(self.index.search('fee', k=1)), ['permit_fees'])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search('office hours'), [])
+        self.assertEqual(self.index.search('deck', k=0), [])
+
+    def test_scores_descend(self):
+        scores = [hit.score for hit in self.index.search('permit setback feet', k=5)]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_pruned_top_k_matches_exhaustive_scoring(self):
+        index = load_configured_index()
+        queries = [
+            'Do I need a permit to build a deck?', 'What are the setbacks in R-2?',
+            'How long does review take for a variance?', 'floodplain riparian river development',
+            'fees for an accessory dwelling unit', 'public notice hearing appeal',
+        ]
+        for query in queries:
+            totals = defaultdict(float)
+            for term in set(tokenize(query)):
+                for doc_id, weight in index.postings.get(term, ()):
+                    totals[doc_id] += weight
+            for k in (1, 3, 5):
+                with self.subTest(query=query, k=k):
+                    expected = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:k]
+                    hits = index.search(query, k)
+                    self.assertEqual([hit.entry for hit in hits], [index.entries[doc_id] for doc_id, _ in expected])
+                    for hit, (_, score) in zip(hits, expected):
+                        self.assertAlmostEqual(hit.score, score)
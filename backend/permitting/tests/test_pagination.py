@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from permitting.models import PermitApplication, PermitType, Property
+from permitting.pagination import keyset_page
+
+
+class KeysetPageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        property_obj = Property.objects.create(address='1 Main Street', tax_lot_number='TEST-1', zoning='R1')
+        permit_type = PermitType.objects.create(name='Test Permit', code='TEST', description='Test', base_fee=100)
+        for number in range(5):
+            PermitApplication.objects.create(
+                property=property_obj, permit_type=permit_type, applicant_name=f'Applicant {number}',
+                applicant_email='applicant@example.com', applicant_phone='555-0100',
+                project_description='Test project',
+            )
+
+    def setUp(self):
+        self.queryset = PermitApplication.objects.all()
+        self.ordered = list(self.queryset.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def ids(self, page):
+        return [application.id for application in page]
+
+    def test_walks_forward_and_back(self):
+        first = keyset_page(self.queryset, page_size=2)
+        second = keyset_page(self.queryset, first.next_cursor, page_size=2)
+        last = keyset_page(self.queryset, second.next_cursor, page_size=2)
+
+        self.assertEqual(self.ids(first) + self.ids(second) + self.ids(last), self.ordered)
+        self.assertIsNone(first.previous_cursor)
+        self.assertIsNone(last.next_cursor)
+        self.assertEqual(self.ids(keyset_page(self.queryset, second.previous_cursor, page_size=2)), self.ids(first))
+        self.assertEqual(self.ids(keyset_page(self.queryset, last.previous_cursor, page_size=2)), self.ids(second))
+
+    def test_empty_last_page_links_back(self):
+        first = keyset_page(self.queryset, page_size=2)
+        PermitApplication.objects.filter(id__in=self.ordered[2:]).delete()
+
+        empty = keyset_page(self.queryset, first.next_cursor, page_size=2)
+        self.assertEqual(len(empty), 0)
+        self.assertIsNone(empty.next_cursor)
+        self.assertIsNotNone(empty.previous_cursor)
+        self.assertEqual(self.ids(keyset_page(self.queryset, empty.previous_cursor, page_size=2)), self.ids(first))
+
+    def test_empty_queryset_has_no_links(self):
+        page = keyset_page(PermitApplication.objects.none())
+        self.assertEqual(len(page), 0)
+        self.assertFalse(page.has_other_pages())
+
+    def test_malformed_cursor(self):
+        with self.assertRaises(ValueError):
+            keyset_page(self.queryset, 'not-a-cursor')
@@ -0,0 +1,84 @@
+from django.test import SimpleTestCase
+
+from permitting.prompting import PromptBuilder, deduplicate, estimate_tokens, trim
+
+
+class PromptBudgetTests(SimpleTestCase):
+
+    def setUp(self):
+        subjects = ['front setback', 'height limit', 'lot coverage', 'parking area', 'riparian buffer', 'sign']
+        places = ['the R-1 zone', 'the C-G zone', 'a floodplain', 'a corner lot', 'the river frontage']
+        paragraphs = [
+            f'The {subject} in {place} shall be reviewed by the planning office before a permit is issued.'
+            for subject in subjects for place in places
+        ] * 2
+        self.text = '\n\n'.join(paragraphs)
+
+    def test_trim_stays_within_budget(self):
+        for budget in range(0, estimate_tokens(self.text) + 50, 7):
+            with self.subTest(budget=budget):
+                self.assertLessEqual(estimate_tokens(trim(self.text, budget)), budget)
+
+    def test_trim_keeps_text_within_budget(self):
+        self.assertEqual(trim(self.text, estimate_tokens(self.text)), self.text)
+
+    def test_trim_is_empty_without_room_for_a_marker(self):
+        self.assertEqual(trim(self.text, 5), '')
+        self.assertEqual(trim(self.text, -10), '')
+
+    def test_builder_trims_to_budget(self):
+        for budget in (200, 500, 1000):
+            with self.subTest(budget=budget):
+                prompt = (PromptBuilder(budget=budget)
+                          .add('Answer the question below.')
+                          .add(self.text, title='Document Content', trim=True)
+                          .add(self.text, title='Context', trim=True, max_tokens=100)
+                          .build())
+                self.assertTrue(prompt.trimmed)
+                self.assertLessEqual(prompt.estimated_tokens, budget)
+
+    def test_builder_drops_trimmable_sections_past_the_budget(self):
+        instructions = 'Answer the question below. ' * 20
+        prompt = (PromptBuilder(budget=10)
+                  .add(instructions)
+                  .add(self.text, title='Document Content', trim=True)
+                  .build())
+        self.assertEqual(prompt.text, instructions.strip())
+
+
+class DeduplicateTests(SimpleTestCase):
+
+    table = '\n'.join([
+        'R-1 Low Density Residential',
+        'Minimum lot size: 7,000 square feet',
+        'Maximum height: 35 feet',
+        'R-2 Medium Density Residential',
+        'Minimum lot size: 5,000 square feet',
+        'Maximum height: 45 feet',
+    ])
+
+    def test_keeps_rows_differing_in_numbers(self):
+        self.assertEqual(deduplicate(self.table), self.table)
+
+    def test_keeps_standards_shared_by_two_zones(self):
+        text = self.table.replace('45 feet', '35 feet')
+        self.assertEqual(deduplicate(text), text)
+
+    def test_drops_page_headers(self):
+        pages = [
+            f'Shady Cove Development Code - Page {number} of 3\nSection {number} text of the code.'
+            for number in (1, 2, 3)
+        ]
+        self.assertEqual(deduplicate('\n'.join(pages)), '\n'.join([
+            'Shady Cove Development Code - Page 1 of 3',
+            'Section 1 text of the code.',
+            'Section 2 text of the code.',
+            'Section 3 text of the code.',
+        ]))
+
+    def test_builder_leaves_sections_within_budget_alone(self):
+        header = 'Shady Cove Development Code'
+        text = '\n'.join([header, self.table] * 3)
+        prompt = PromptBuilder(budget=1000).add(text, title='Document Content', trim=True).build()
+        self.assertFalse(prompt.trimmed)
+        self.assertEqual(prompt.text.count(header), 3)
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase, override_settings
+
+from permitting.routing import DEEP, FAST, model_tiers, route
+
+
+class RoutingTests(SimpleTestCase):
+
+    def test_long_form_calls_are_deep(self):
+        self.assertEqual(route('staff_report'), DEEP)
+        self.assertEqual(route('statewide_goals', 'short'), DEEP)
+
+    def test_questions_by_planning_terms(self):
+        self.assertEqual(route('question', 'When is the office open?'), FAST)
+        self.assertEqual(route('question', 'Can I appeal this decision?'), FAST)
+        self.assertEqual(route('question', 'Does the variance need a public hearing?'), DEEP)
+
+    def test_large_inputs_are_deep(self):
+        self.assertEqual(route('question', 'word ' * 2000), DEEP)
+        self.assertEqual(route('document', 'word ' * 1000), FAST)
+        self.assertEqual(route('document', 'word ' * 5000), DEEP)
+
+    @override_settings(CLAUDE_MODELS={'fast': 'fast-model'})
+    def test_models_from_settings(self):
+        tiers = model_tiers()
+        self.assertEqual(tiers[FAST].model, 'fast-model')
+        self.assertEqual(tiers[DEEP].model, 'claude-3-5-sonnet-20241022')
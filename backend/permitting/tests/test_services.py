@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from permitting.services import ServiceRegistry
+
+
+class Counter:
+    built = 0
+
+    def __init__(self):
+        Counter.built += 1
+
+
+class ServiceRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        Counter.built = 0
+        self.registry = ServiceRegistry(check_interval=0)
+        self.registry.register('counter', Counter)
+        self.registry.register('dotted', 'collections.OrderedDict')
+
+    def test_built_once_on_first_use(self):
+        self.assertFalse(self.registry.is_loaded('counter'))
+        first = self.registry.get('counter')
+        self.assertIs(self.registry.get('counter'), first)
+        self.assertEqual(Counter.built, 1)
+        self.assertEqual(type(self.registry.get('dotted')).__name__, 'OrderedDict')
+
+    def test_unknown_service(self):
+        with self.assertRaises(LookupError):
+            self.registry.get('missing')
+
+    def test_reload_rebuilds_on_next_use(self):
+        first = self.registry.get('counter')
+        self.registry.reload('counter')
+        self.assertFalse(self.registry.is_loaded('counter'))
+        self.assertIsNot(self.registry.get('counter'), first)
+        self.assertEqual(Counter.built, 2)
+
+    def test_reload_requested_by_another_process(self):
+        other = ServiceRegistry(check_interval=0)
+        first = self.registry.get('counter')
+        # Another process asks every process to rebuild
+        other.request_reload()
+        self.assertIsNot(self.registry.get('counter'), first)
+        second = self.registry.get('counter')
+        self.assertIs(self.registry.get('counter'), second)
+
+    def test_override(self):
+        first = self.registry.get('counter')
+        with self.registry.override(counter=dict):
+            self.assertEqual(self.registry.get('counter'), {})
+        self.assertIsInstance(self.registry.get('counter'), Counter)
+        self.assertIsNot(self.registry.get('counter'), first)
+
+    def test_warm_up_skips_failing_services(self):
+        def broken():
+            raise RuntimeError('no API key')
+        self.registry.register('broken', broken)
+        with self.assertLogs('permitting.services', level='ERROR'):
+            timings = self.registry.warm_up()
+        self.assertEqual(set(timings), {'counter', 'dotted'})
+        self.assertTrue(self.registry.is_loaded('counter'))
@@ -0,0 +1,141 @@
+import json
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory
+
+from permitting import answer_cache
+from permitting.api_views_enhanced import ask_planning_question_stream
+from permitting.routing import DEFAULT_TIERS, FAST
+from permitting.services import registry
+from permitting.streaming import EventStreamRenderer, sse_event, stream_events
+
+COMPLEX_QUESTION = 'Does a variance need a public hearing?'
+
+
+def parse(body: bytes):
+    """(event, data) pairs of a text/event-stream body"""
+    events = []
+    for block in body.decode('utf-8').split('\n\n'):
+        if block:
+            event, data = block.split('\n')
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def chunks(*parts, fail=False):
+    yield from parts
+    if fail:
+        raise ConnectionError('stream interrupted')
+
+
+class StreamEventsTests(SimpleTestCase):
+
+    def events(self, *args, **kwargs):
+        return parse(b''.join(stream_events(*args, **kwargs)))
+
+    def test_meta_deltas_then_done(self):
+        events = self.events(chunks('Yes, ', 'a hearing.'), {'source': 'test'}, lambda text: {'answer': text})
+        self.assertEqual(events, [
+            ('meta', {'source': 'test'}),
+            ('delta', {'text': 'Yes, '}),
+            ('delta', {'text': 'a hearing.'}),
+            ('done', {'answer': 'Yes, a hearing.'}),
+        ])
+
+    def test_failure_sends_error_then_fallback(self):
+        with self.assertLogs('permitting.streaming', level='ERROR'):
+            events = self.events(chunks('Yes, ', fail=True), {'source': 'test'}, lambda text: {'answer': text},
+                                 fallback=lambda: {'answer': 'Local answer'})
+        self.assertEqual([event for event, _ in events], ['meta', 'delta', 'error', 'done'])
+        self.assertEqual(events[2][1], {'error': 'stream interrupted', 'success': False})
+        self.assertEqual(events[3][1], {'answer': 'Local answer'})
+
+    def test_failure_without_fallback_ends_with_error(self):
+        with self.assertLogs('permitting.streaming', level='ERROR'):
+            events = self.events(chunks(fail=True), {}, lambda text: {'answer': text})
+        self.assertEqual([event for event, _ in events], ['meta', 'error'])
+
+    def test_event_is_one_data_line(self):
+        self.assertEqual(sse_event('delta', {'text': 'two\nlines'}), b'event: delta\ndata: {"text": "two\\nlines"}\n\n')
+
+    def test_renderer_sends_whole_responses_as_one_event(self):
+        class Response:
+            status_code = 400
+        renderer = EventStreamRenderer()
+        self.assertEqual(parse(renderer.render({'answer': 'x'})), [('done', {'answer': 'x'})])
+        self.assertEqual(parse(renderer.render({'error': 'bad'}, renderer_context={'response': Response()})),
+                         [('error', {'error': 'bad'})])
+
+
+class FakeClaude:
+    available = True
+    fail = False
+
+    def tier_for(self, call, text=''):
+        return DEFAULT_TIERS[FAST]
+
+    def stream_complex_question(self, question, context=None, tier=None):
+        return chunks('A variance ', 'needs a hearing.', fail=self.fail)
+
+
+class FakeComplianceEngine:
+
+    def answer_planning_question(self, question):
+        return 'Local answer'
+
+
+class AskQuestionStreamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        answer_cache._index = None
+        FakeClaude.fail = False
+        override = registry.override(claude=FakeClaude, compliance_engine=FakeComplianceEngine)
+        override.__enter__()
+        self.addCleanup(override.__exit__, None, None, None)
+
+    def ask(self, question, accept='text/event-stream'):
+        request = APIRequestFactory().post(
+            '/api/ask-question/stream/', {'question': question}, format='json', HTTP_ACCEPT=accept
+        )
+        return ask_planning_question_stream(request)
+
+    def streamed_events(self, response):
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        return parse(b''.join(response.streaming_content))
+
+    def test_claude_answer_is_streamed_and_stored(self):
+        events = self.streamed_events(self.ask(COMPLEX_QUESTION))
+
+        self.assertEqual([event for event, _ in events], ['meta', 'delta', 'delta', 'done'])
+        self.assertEqual(events[0][1]['tier'], FAST)
+        self.assertEqual(events[-1][1]['answer'], 'A variance needs a hearing.')
+        self.assertEqual(answer_cache.lookup(COMPLEX_QUESTION).answer, 'A variance needs a hearing.')
+
+    def test_cached_answer_is_one_done_event(self):
+        answer_cache.store(COMPLEX_QUESTION, {}, 'Stored answer.', 'claude-test')
+        response = self.ask(COMPLEX_QUESTION)
+        response.render()
+        self.assertEqual(parse(response.content), [('done', {
+            'answer': 'Stored answer.', 'source': 'Answer cache', 'model': 'claude-test', 'similarity': 1.0,
+            'matched_question': COMPLEX_QUESTION, 'complexity': 'high',
+        })])
+
+    def test_interrupted_stream_falls_back_to_local_answer(self):
+        FakeClaude.fail = True
+        with self.assertLogs('permitting.streaming', level='ERROR'):
+            events = self.streamed_events(self.ask(COMPLEX_QUESTION))
+        self.assertEqual([event for event, _ in events], ['meta', 'delta', 'delta', 'error', 'done'])
+        self.assertEqual(events[-1][1]['answer'], 'Local answer')
+
+    def test_json_clients_get_json(self):
+        response = self.ask('When is the office open?', accept='application/json')
+        response.render()
+        self.assertEqual(json.loads(response.content)['answer'], 'Local answer')
+
+    def test_missing_question_is_an_error_event(self):
+        response = self.ask('')
+        response.render()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(parse(response.content), [('error', {'error': 'Question is required'})])
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views, api_views
+from . import views, api_views, api_views_enhanced
 
 app_name = 'permitting'
 
@@ -17,7 +17,17 @@ urlpatterns = [
     # Original API endpoints (working)
     path('api/ask-question/', api_views.ask_planning_question, name='ask_question'),
     path('api/calculate-fees/', api_views.calculate_fees, name='calculate_fees'),
+    path('api/calculate-fees/batch/', api_views.calculate_fees_batch, name='calculate_fees_batch'),
+    path('api/fee-quote/', views.calculate_fee_api, name='calculate_fee_api'),
     path('api/check-compliance/', api_views.check_project_compliance, name='check_compliance'),
     path('api/search-properties/', api_views.search_properties, name='search_properties'),
     path('api/permit-requirements/<int:permit_type_id>/', api_views.get_permit_requirements, name='permit_requirements'),
+    path('api/applications/', api_views.list_applications, name='list_applications'),
+    path('api/applications/export/', api_views.export_applications, name='export_applications'),
+    path('api/compliance-checks/export/', api_views.export_compliance_checks, name='export_compliance_checks'),
+    path('api/metrics/', api_views.request_metrics, name='request_metrics'),
+    
+    # Claude answers streamed as server-sent events, or JSON
+    path('api/ask-question/stream/', api_views_enhanced.ask_planning_question_stream, name='ask_question_stream'),
+    path('api/staff-report/stream/', api_views_enhanced.generate_staff_report_stream, name='staff_report_stream'),
 ]
\ No newline at end of file
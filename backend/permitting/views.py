@@ -3,13 +3,15 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
-from django.core.paginator import Paginator
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 import json
 
 from .models import Property, PermitType, PermitApplication, ZoningRule
+from .cache import zoning_rules_for_district
+from .fees import get_fee_engine
+from .pagination import keyset_page, approximate_count
 from .serializers import PropertySerializer, PermitApplicationSerializer
 
 
@@ -20,7 +22,7 @@ def home(request):
     context = {
         'city_name': 'Shady Cove',
         'total_properties': Property.objects.count(),
-        'active_applications': PermitApplication.objects.filter(status__in=['SUBMITTED', 'UNDER_REVIEW']).count(),
+        'active_applications': PermitApplication.objects.filter(status__in=PermitApplication.ACTIVE_STATUSES).count(),
         'permit_types': PermitType.objects.filter(is_active=True),
     }
     return render(request, 'permitting/home.html', context)
@@ -59,10 +61,7 @@ def permit_wizard(request, property_id):
     permit_types = PermitType.objects.filter(is_active=True)
     
     # Get applicable zoning rules for this property
-    zoning_rules = ZoningRule.objects.filter(
-        zoning_district=property_obj.zoning,
-        is_active=True
-    )
+    zoning_rules = zoning_rules_for_district(property_obj.zoning)
     
     context = {
         'property': property_obj,
@@ -111,7 +110,7 @@ def application_detail(request, application_id):
     """
     Display details of a specific permit application
     """
-    application = get_object_or_404(PermitApplication, application_id=application_id)
+    application = get_object_or_404(PermitApplication.objects.with_related(), application_id=application_id)
     
     context = {
         'application': application,
@@ -126,17 +125,19 @@ def applications_list(request):
     """
     List all permit applications (for staff use)
     """
-    applications = PermitApplication.objects.all().order_by('-created_at')
+    applications = PermitApplication.objects.for_listing()
     
     # Filter by status if requested
     status_filter = request.GET.get('status')
     if status_filter:
         applications = applications.filter(status=status_filter)
     
-    # Pagination
-    paginator = Paginator(applications, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Cursor pagination: flat cost however deep staff page
+    try:
+        page_obj = keyset_page(applications, request.GET.get('cursor'), 25)
+    except ValueError:
+        page_obj = keyset_page(applications, None, 25)
+    page_obj.count, page_obj.count_is_exact = approximate_count(applications)
     
     context = {
         'page_obj': page_obj,
@@ -173,24 +174,14 @@ def calculate_fee_api(request):
     square_footage = request.data.get('square_footage', 0)
     
     try:
-        permit_type = PermitType.objects.get(id=permit_type_id)
-        
-        base_fee = float(permit_type.base_fee)
-        additional_fees = 0
-        
-        if square_footage and permit_type.per_square_foot_fee:
-            additional_fees += float(square_footage) * float(permit_type.per_square_foot_fee)
-        
-        if project_value and permit_type.per_unit_fee:
-            additional_fees += float(permit_type.per_unit_fee)
-        
-        total_fee = base_fee + additional_fees
+        quote = get_fee_engine().quote(permit_type_id, square_footage, project_value)
         
         return Response({
-            'base_fee': base_fee,
-            'additional_fees': additional_fees,
-            'total_fee': total_fee,
-            'permit_type': permit_type.name
+            'base_fee': float(quote.base_fee),
+            'additional_fees': float(quote.additional_fees),
+            'total_fee': float(quote.total_fee),
+            'permit_type': quote.permit_type,
+            'schedule_version': quote.schedule_version,
         })
     
     except PermitType.DoesNotExist:
@@ -214,10 +205,7 @@ def compliance_check_api(request):
         permit_type = PermitType.objects.get(id=permit_type_id)
         
         # Get applicable zoning rules
-        zoning_rules = ZoningRule.objects.filter(
-            zoning_district=property_obj.zoning,
-            is_active=True
-        )
+        zoning_rules = zoning_rules_for_district(property_obj.zoning)
         
         compliance_results = []
         
@@ -300,6 +288,7 @@ def dashboard(request):
     return render(request, 'permitting/dashboard.html')
 
 
+@api_view(['GET'])
 def dashboard_stats_api(request):
     """
     API endpoint for dashboard statistics
@@ -317,7 +306,7 @@ def dashboard_stats_api(request):
         'total_properties': Property.objects.count(),
         'total_applications': PermitApplication.objects.count(),
         'active_applications': PermitApplication.objects.filter(
-            status__in=['SUBMITTED', 'UNDER_REVIEW']
+            status__in=PermitApplication.ACTIVE_STATUSES
         ).count(),
         'approved_this_month': PermitApplication.objects.filter(
             status='APPROVED',
@@ -346,7 +335,7 @@ def dashboard_stats_api(request):
         ).count(),
         'needs_review': PermitApplication.objects.filter(
             compliance_check_passed=False,
-            status__in=['SUBMITTED', 'UNDER_REVIEW']
+            status__in=PermitApplication.ACTIVE_STATUSES
         ).count(),
     }
     